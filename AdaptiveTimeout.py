@@ -0,0 +1,81 @@
+"""
+Adaptive Timeout
+Zegar retransmisji liczony z RTT ostatnich komend (jak w TCP, RFC 6298)
+
+Zamiast stałego 1 s: RTO = SRTT + 4 * RTTVAR, ograniczone do
+[MIN_RTO, MAX_RTO]. Szybki link USB zgubioną ramkę wykrywa po
+kilkudziesięciu ms, a wolny Bluetooth SPP dostaje dłuższy czas, zanim
+ramka zostanie uznana za zgubioną. Stan jest osobny dla każdego portu
+i przeżywa ponowne połączenie; ręczny timeout (robot.timeout = x)
+trzyma instancja robota, nie wspólny zegar portu.
+"""
+
+import random
+import threading
+
+INITIAL_RTO = 1.0       # przed pierwszym pomiarem [s]
+MIN_RTO = 0.1           # dolne ograniczenie (obsługa komendy w loop() firmware) [s]
+MAX_RTO = 8.0           # górne ograniczenie po podwajaniu [s]
+GRANULARITY = 0.01      # minimalny zapas ponad SRTT [s]
+ALPHA = 1 / 8           # waga nowej próbki w SRTT
+BETA = 1 / 4            # waga nowej próbki w RTTVAR
+K = 4
+BACKOFF_BASE = 0.02     # odstęp przed pierwszym ponowieniem bez pomiarów [s]
+BACKOFF_CAP = 1.0       # maks. odstęp między rundami ponowień [s]
+
+
+class RetransmitTimer:
+    """SRTT/RTTVAR jednego łącza, podwajanie RTO po utracie ramki"""
+
+    def __init__(self, initial=INITIAL_RTO):
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial
+        self.samples = 0
+        self.backoffs = 0
+        self._lock = threading.Lock()
+
+    def timeout(self):
+        """Czas oczekiwania na odpowiedź na ramkę [s]"""
+        return self.rto
+
+    def sample(self, rtt):
+        """Pomiar RTT ramki wysłanej raz (reguła Karna pilnuje wołający)"""
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar += BETA * (abs(self.srtt - rtt) - self.rttvar)
+                self.srtt += ALPHA * (rtt - self.srtt)
+            self.rto = min(MAX_RTO, max(MIN_RTO, self.srtt + max(GRANULARITY, K * self.rttvar)))
+            self.samples += 1
+            self.backoffs = 0
+
+    def backoff(self):
+        """Ramka zgubiona - podwojenie RTO do czasu następnego pomiaru"""
+        with self._lock:
+            self.rto = min(MAX_RTO, self.rto * 2)
+            self.backoffs += 1
+
+    def retry_delay(self, attempt):
+        """Odstęp przed ponowieniem: wykładniczy z pełnym losowaniem"""
+        base = self.srtt if self.srtt is not None else BACKOFF_BASE
+        return random.uniform(0, min(BACKOFF_CAP, base * 2 ** attempt))
+
+    def summary(self):
+        return {'rto': self.timeout(), 'srtt': self.srtt, 'rttvar': self.rttvar,
+                'samples': self.samples, 'backoffs': self.backoffs}
+
+
+_timers = {}
+_timers_lock = threading.Lock()
+
+
+def timer_for(port):
+    """Wspólny zegar dla danego portu (ten sam stan po ponownym połączeniu)"""
+    with _timers_lock:
+        timer = _timers.get(port)
+        if timer is None:
+            timer = _timers[port] = RetransmitTimer()
+        return timer
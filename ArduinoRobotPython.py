@@ -1,42 +1,652 @@
+import os
 import serial
-import serial.tools.list_ports
+import threading
+import queue
+import re
+import struct
 import time
+from collections import deque
 from datetime import datetime
 
+import AdaptiveTimeout
+import BaudNegotiation
+import BinaryProtocol
+import SessionLog
+from LinkMetrics import LinkMetrics
+from ParameterCache import ParameterCache, UNCHANGED
+import SessionRecorder
+import RobotSimulator
+
 # Pip install pyserial
 
-class RobotInterface:
-    def __init__(self):
+try:
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+
+# Okres odpytywania portu przez wątek czytający (timeout pojedynczego read)
+READER_POLL = 0.05
+# Maksymalna liczba niewypompowanych linii telemetrii / ramek RESULT
+TELEMETRY_QUEUE_SIZE = 10000
+# Liczba ramek wysłanych bez potwierdzenia (bufor RX Arduino ma 64 bajty)
+BATCH_WINDOW = 3
+# Szybkie łączenie: PING co PROBE_INTERVAL zamiast stałych 2 s na bootloader
+PROBE_INTERVAL = 0.05
+BOOT_TIMEOUT = 3.0
+# Numer sekwencyjny odsyłany przez firmware na końcu odpowiedzi: ...|@<seq>
+SEQ_TAG = re.compile(r"\|@(\d+)$")
+SEQ_MODULO = 10000
+# Fragment odpowiedzi, po którym rozpoznajemy komendę (firmware bez |@seq)
+REPLY_ECHO = {
+    'PING': 'PONG',
+    'STATUS': ('KP:', 'Kp:'),
+    'READ_DISTANCE': 'DIST:',
+    'READ_LINE': 'POS:',
+    'TEST_START': 'TEST_MODE_ON',
+    'TEST_STOP': 'TEST_MODE_OFF',
+    'SET_TARGET': 'TARGET_SET',
+    'SET_SERVO_ZERO': 'SERVO_ZERO_SET',
+    'EXAM_START': 'EXAM_STARTED',
+    'EXAM_STOP': 'EXAM_STOPPED',
+    'P': 'LINE_FOLLOW_ON',
+    'S': 'LINE_FOLLOW_OFF',
+    'Kp': 'Kp=',
+    'Ki': 'Ki=',
+    'Kd': 'Kd=',
+    'Vref': 'Vref=',
+    'T': 'T_sample=',
+    'TELEMETRY_ON': 'TELEMETRY_ON',
+    'TELEMETRY_OFF': 'TELEMETRY_OFF',
+    'CALIBRATE': 'CALIBRATE_START',
+    'FZ_DIM': 'FZ_DIM=',
+    'FZ_LUT': 'FZ_LUT=',
+    'FZ_CRC': 'FZ_READY',
+    'FZ_ON': 'FZ_ON',
+    'FZ_OFF': 'FZ_OFF',
+}
+# Liczba ostatnich wpisów logu trzymanych w pamięci (reszta idzie na dysk)
+LOG_MEMORY = 2000
+
+
+def _telemetry_ring():
+    """TelemetryRing importowany dopiero tu - numpy to większość czasu startu"""
+    try:
+        from TelemetryBuffer import TelemetryRing
+    except ImportError:  # brak numpy - telemetria tylko jako tekst
+        return None
+    return TelemetryRing()
+
+class SendWindow:
+    """Jedna runda potokowej wysyłki bez I/O (wspólna dla wątków i asyncio).
+    
+    Nadaje numery sekwencyjne, pilnuje do `window` ramek w locie, dopasowuje
+    odpowiedzi, próbkuje RTO i liczy metryki. Klient tylko zapisuje bajty
+    z frames() na łącze i podaje odpowiedzi z wait_reply(wait_time()) do
+    handle(), dopóki done nie jest prawdą."""
+    
+    def __init__(self, protocol, cmds, todo, results, window, retransmit=False, nacks=None):
+        self.protocol = protocol
+        self.cmds = cmds
+        self.todo = todo
+        self.results = results
+        self.window = window
+        self.retransmit = retransmit
+        self.nacks = nacks
+        self.failed = []
+        self.inflight = {}  # seq -> (indeks komendy, czas wysłania)
+        self.expired = {}   # seq -> (indeks, czas wysłania) ramek uznanych za zgubione
+        self.backed_off = False
+        self.pos = 0
+    
+    @property
+    def done(self):
+        return self.pos >= len(self.todo) and not self.inflight
+    
+    def frames(self):
+        """Bajty kolejnych ramek, aż okno się zapełni (czas wysłania liczony
+        po zapisie, więc generator trzeba przejść do końca)"""
+        p = self.protocol
+        while self.pos < len(self.todo) and len(self.inflight) < self.window:
+            i = self.todo[self.pos]
+            self.pos += 1
+            seq = p._next_seq()
+            frame = p.build_frame(self.cmds[i], seq)
+            yield p._encode(frame)
+            p.log_message(f"TX: {frame.strip('#')}")
+            p.metrics.on_send(self.cmds[i])
+            self.inflight[seq] = (i, time.monotonic())
+    
+    def _oldest(self):
+        return min(self.inflight, key=lambda k: self.inflight[k][1])
+    
+    def wait_time(self):
+        """Czas oczekiwania na odpowiedź dla najstarszej ramki w locie"""
+        return self.inflight[self._oldest()][1] + self.protocol.timeout - time.monotonic()
+    
+    def handle(self, reply):
+        """Odpowiedź (seq, ramka) z wait_reply albo None po upływie wait_time()"""
+        p = self.protocol
+        cmds = self.cmds
+        if reply is None:
+            # Ramka zgubiona - pozostałe czekają dalej
+            oldest = self._oldest()
+            i, sent = self.expired[oldest] = self.inflight.pop(oldest)
+            p.metrics.on_timeout(cmds[i])
+            self.failed.append(i)
+            if not self.backed_off:
+                p.rto.backoff()
+                self.backed_off = True
+            return
+        seq, frame = reply
+        tagged = seq is not None
+        if seq is None:
+            # Firmware bez numerów sekwencyjnych - pierwsza pasująca ramka
+            seq = next((k for k, (i, _) in self.inflight.items()
+                        if p._reply_matches(cmds[i], frame)), None)
+            if seq is None:
+                return
+        elif seq in self.expired:
+            # Odpowiedź po czasie: RTO za krótki, ale komenda dotarła
+            i, sent = self.expired.pop(seq)
+            p.rto.sample(time.monotonic() - sent)
+            if frame.startswith("ACK"):
+                self.failed.remove(i)
+                self.results[i] = frame
+            return
+        elif seq not in self.inflight:
+            # Spóźniona odpowiedź na wcześniejszą próbę
+            return
+        i, sent = self.inflight.pop(seq)
+        rtt = time.monotonic() - sent
+        p.metrics.on_reply(cmds[i], frame, rtt)
+        # Reguła Karna: bez numeru seq odpowiedź na ponowienie jest niejednoznaczna
+        if tagged or not self.retransmit:
+            p.rto.sample(rtt)
+        if frame.startswith("ACK"):
+            self.results[i] = frame
+        elif "BAD_CHECKSUM" in frame:
+            self.failed.append(i)
+        else:
+            p._link_note(frame)
+            if self.nacks is not None:
+                self.nacks[i] = frame
+    
+    def remaining(self):
+        """Indeksy komend do ponowienia"""
+        return sorted(self.failed)
+
+
+class RobotProtocol:
+    """Wspólna warstwa ramek dla klienta blokującego i asyncio.
+
+    Buduje ramki (checksum, numer sekwencyjny, tryb binarny) i rozdziela
+    odebrane bajty na odpowiedzi, ramki RESULT i telemetrię. Dostarczenie
+    do kolejek robią metody _deliver_* w klasie pochodnej."""
+    
+    def __init__(self, telemetry_buffer=True):
+        # Ostatnie wpisy (czas monotoniczny [ns], tekst); pełny log w log_sink
+        self.log = deque(maxlen=LOG_MEMORY)
+        self.log_count = 0
+        self.log_sink = None
+        self._sink_mark = 0     # log_count przy zamknięciu ostatniego log_sink
+        self._clock_anchor = (time.time(), time.monotonic_ns())
+        self._seq = 0
+        # Tryb binarny (COBS + CRC-8) wynegocjowany komendą BIN_ON
+        self.binary_mode = False
+        self.bad_packets = 0
+        # RTT, ponowienia, NACK, telemetria - stats() / komenda 'metrics'
+        self.metrics = LinkMetrics()
+        # Zegar retransmisji z RTT; po connect() wspólny dla portu
+        self.rto = AdaptiveTimeout.RetransmitTimer()
+        # Ręczny timeout tej instancji (robot.timeout = x), ma pierwszeństwo przed RTO
+        self._fixed_timeout = None
+        # Znane wartości parametrów firmware (unieważniane przy połączeniu)
+        # i potwierdzone nastawy przywracane po ponownym połączeniu
+        self.params = ParameterCache()
+        # Dodatkowi odbiorcy wpisów logu: hook(t_ns, msg), np. SessionExporter
+        self.log_hooks = []
+        # Zdekodowana telemetria (rekordy NumPy) do wykresów, metryk i logów;
+        # telemetry_buffer=False - bez numpy (krótkie skrypty, RobotBatch)
+        self.telemetry_buffer = _telemetry_ring() if telemetry_buffer else None
+        # Te same rekordy w pamięci współdzielonej dla innych procesów
+        self.telemetry_publisher = None
+    
+    def calculate_checksum(self, cmd):
+        return sum(ord(c) for c in cmd) % 256
+    
+    def build_frame(self, cmd, seq=None):
+        """Ramka CMD|checksum# (z numerem sekwencyjnym: CMD|checksum|@seq#)"""
+        checksum = self.calculate_checksum(cmd)
+        if seq is None:
+            return f"{cmd}|{checksum}#"
+        return f"{cmd}|{checksum}|@{seq}#"
+    
+    def _next_seq(self):
+        self._seq = self._seq % (SEQ_MODULO - 1) + 1
+        return self._seq
+    
+    def _encode(self, frame):
+        """Ramka tekstowa -> bajty na łącze w aktualnym trybie"""
+        if self.binary_mode:
+            return BinaryProtocol.encode_text(frame.rstrip('#'))
+        return frame.encode()
+    
+    @staticmethod
+    def _reply_matches(cmd, frame):
+        """Czy odpowiedź bez numeru sekwencyjnego może dotyczyć komendy cmd"""
+        if frame.startswith("NACK"):
+            return True
+        key = cmd.split(' ', 1)[0].split('(', 1)[0]
+        own = REPLY_ECHO.get(key, ())
+        own = (own,) if isinstance(own, str) else own
+        if any(token in frame for token in own):
+            return True
+        # Echo innej komendy = spóźniona odpowiedź; brak echa = nie wiadomo
+        for other in REPLY_ECHO.values():
+            other = (other,) if isinstance(other, str) else other
+            if any(token in frame for token in other):
+                return False
+        return True
+    
+    @staticmethod
+    def _pid_settings(side, kp, ki, kd):
+        suffix = 'left' if side == 'L' else 'right'
+        settings = []
+        for name, value in (("KP", kp), ("KI", ki), ("KD", kd)):
+            if value is not None:
+                label = f"{name[0]}{name[1].lower()}_{suffix}"
+                settings.append((f"{name}_{side} {value}", label, value))
+        return settings
+    
+    def _feed(self, buf):
+        """Wyjęcie z bufora kompletnych ramek i ich rozdzielenie"""
+        while True:
+            # Separator zależy od trybu - BIN_ON/BIN_OFF przełącza go
+            # w trakcie _route_*, więc sprawdzamy go przed każdą ramką
+            if self.binary_mode:
+                end = buf.find(BinaryProtocol.DELIMITER)
+                if end < 0:
+                    break
+                packet = bytes(buf[:end])
+                del buf[:end + 1]
+                if packet:
+                    self._route_packet(packet)
+                continue
+            nl = buf.find(b'\n')
+            if nl < 0:
+                break
+            line = buf[:nl].decode('utf-8', errors='ignore').strip()
+            del buf[:nl + 1]
+            if line:
+                self._route_line(line)
+    
+    def _route_line(self, line):
+        """Rozdzielenie odebranej linii do właściwej kolejki"""
+        # Telemetria (bez '#')
+        if not line.endswith('#') and not line.startswith(('ACK', 'NACK')):
+            if self.telemetry_buffer is not None:
+                self.telemetry_buffer.push_line(line)
+            if self.telemetry_publisher is not None:
+                self.telemetry_publisher.push_line(line)
+            self.metrics.on_telemetry()
+            self._deliver_telemetry(line)
+            return
+        # Ramka z '#'
+        self._route_frame(line.strip('#'))
+    
+    def _route_packet(self, packet):
+        """Rozdzielenie ramki binarnej"""
+        try:
+            ftype, payload = BinaryProtocol.decode_frame(packet)
+            if ftype == BinaryProtocol.FRAME_TEXT:
+                self._route_frame(payload.decode('utf-8', errors='ignore'))
+                return
+            kind, values = BinaryProtocol.decode_telemetry(ftype, payload)
+        except (ValueError, struct.error):
+            self.bad_packets += 1
+            self.metrics.on_bad_packet()
+            return
+        if self.telemetry_buffer is not None:
+            self.telemetry_buffer.push_values(kind, values)
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.push_values(kind, values)
+        self.metrics.on_telemetry()
+        self._deliver_telemetry(BinaryProtocol.format_telemetry(kind, values))
+    
+    def _route_frame(self, frame):
+        self.log_message(f"RX: {frame}")
+        if frame.startswith(('ACK', 'NACK')):
+            if frame.startswith("ACK|BIN_ON"):
+                self.binary_mode = True
+            elif frame.startswith("ACK|BIN_OFF"):
+                self.binary_mode = False
+            seq = None
+            tag = SEQ_TAG.search(frame)
+            if tag:
+                seq = int(tag.group(1))
+                frame = frame[:tag.start()]
+            self._deliver_reply(seq, frame)
+        else:
+            # Inne ramki (RESULT itp.)
+            self._deliver_result(frame)
+    
+    @property
+    def timeout(self):
+        """Bieżący czas oczekiwania na odpowiedź (ręczny albo adaptacyjny RTO)"""
+        if self._fixed_timeout is not None:
+            return self._fixed_timeout
+        return self.rto.timeout()
+    
+    @timeout.setter
+    def timeout(self, value):
+        # Ręczna wartość wyłącza adaptację tylko w tej instancji;
+        # None przywraca RTO z pomiarów
+        self._fixed_timeout = value
+    
+    def _use_port_timer(self, port):
+        """Wspólne SRTT/RTTVAR portu; ręczny timeout zostaje w instancji"""
+        self.rto = AdaptiveTimeout.timer_for(port)
+    
+    def stats(self):
+        """Metryki łącza (LinkMetrics) i bieżące ustawienia wysyłki"""
+        stats = self.metrics.stats()
+        stats['rto'] = self.rto.summary()
+        supervisor = getattr(self, 'supervisor', None)
+        if supervisor is not None:
+            stats['supervisor'] = supervisor.stats()
+        stats['settings'] = {'timeout': self.timeout,
+                             'max_retries': getattr(self, 'max_retries', None),
+                             'binary_mode': self.binary_mode}
+        return stats
+    
+    def log_message(self, msg):
+        t_ns = time.monotonic_ns()
+        self.log.append((t_ns, msg))
+        self.log_count += 1
+        if self.log_sink:
+            self.log_sink.write(t_ns, msg)
+        for hook in self.log_hooks:
+            hook(t_ns, msg)
+    
+    def open_log(self, directory="logs", **kwargs):
+        """Strumieniowy zapis logu na dysk (SessionLog.LogSink). Wpisy sprzed
+        otwarcia (np. wymiana przy connect()) trafiają do pliku jako pierwsze."""
+        self.close_log()
+        sink = SessionLog.LogSink(directory, **kwargs)
+        pending = min(self.log_count - self._sink_mark, len(self.log))
+        for t_ns, msg in list(self.log)[len(self.log) - pending:]:
+            sink.write(t_ns, msg)
+        self.log_sink = sink
+        return sink
+    
+    def close_log(self):
+        if self.log_sink:
+            self.log_sink.close()
+            self.log_sink = None
+            self._sink_mark = self.log_count
+    
+    def publish_telemetry(self, name=None, capacity=None):
+        """Zapis telemetrii także do pamięci współdzielonej (SharedTelemetry) -
+        czytelnicy w innych procesach bez dostępu do portu"""
+        self.stop_publishing()
+        try:
+            from SharedTelemetry import SharedTelemetryRing, SHARED_NAME
+            from TelemetryBuffer import TELEMETRY_CAPACITY
+        except ImportError:
+            print("Publikacja telemetrii wymaga numpy")
+            return None
+        try:
+            self.telemetry_publisher = SharedTelemetryRing.create(
+                name or SHARED_NAME, capacity or TELEMETRY_CAPACITY)
+        except (FileExistsError, OSError) as e:
+            print(f"✗ Publikacja niemożliwa: {e}")
+            return None
+        print(f"Telemetria publikowana jako '{self.telemetry_publisher.name}'")
+        return self.telemetry_publisher
+    
+    def stop_publishing(self):
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.close()
+            self.telemetry_publisher = None
+    
+    def log_entries(self):
+        """Ostatnie wpisy w formacie tekstowym [HH:MM:SS.fff] msg"""
+        wall0, mono0 = self._clock_anchor
+        for t_ns, msg in list(self.log):
+            kind, text = SessionLog.split_kind(msg)
+            yield SessionLog.format_entry(wall0 + (t_ns - mono0) / 1e9, kind, text)
+    
+    def _begin_attempt(self, cmds, todo, attempt):
+        """Początek próby wysłania paczki (ponowienia do metryk)"""
+        if attempt:
+            for i in todo:
+                self.metrics.on_retry(cmds[i])
+    
+    def _end_attempt(self, cmds, todo, attempt, retries):
+        """Próba z ramkami bez odpowiedzi; zwraca pauzę przed ponowieniem [s]"""
+        for i in todo:
+            self._link_note(f"Timeout {cmds[i]} (próba {attempt+1}/{retries})")
+        return self.rto.retry_delay(attempt)
+    
+    def _record_batch(self, cmds, results):
+        """Potwierdzone nastawy do pamięci parametrów"""
+        self.params.record_results(cmds, results)
+    
+    def _link_note(self, text):
+        """Komunikat o NACK / timeoucie (klient wielu robotów dodaje port)"""
+        print(text)
+    
+    def _probe_frame(self):
+        """Ramka PING sondy gotowości (zapisana w logu jak zwykła komenda)"""
+        frame = self.build_frame("PING", self._next_seq())
+        self.log_message(f"TX: {frame.strip('#')}")
+        return self._encode(frame)
+    
+    def _deliver_reply(self, seq, frame):
+        raise NotImplementedError
+    
+    def _deliver_result(self, frame):
+        raise NotImplementedError
+    
+    def _deliver_telemetry(self, line):
+        raise NotImplementedError
+
+
+# Port -> tryb ramek (True = binarny), w jakim firmware zostało po ostatniej
+# sesji; bez resetu przy otwarciu portu robot nadal jest w tym trybie
+_ready_ports = {}
+
+
+def _clear_hupcl(ser):
+    """POSIX: DTR zostaje aktywne po zamknięciu portu, więc następne
+    otwarcie nie daje zbocza DTR i nie resetuje Arduino"""
+    if termios is None:
+        return
+    try:
+        attrs = termios.tcgetattr(ser.fd)
+        attrs[2] &= ~termios.HUPCL
+        termios.tcsetattr(ser.fd, termios.TCSANOW, attrs)
+    except (AttributeError, OSError, termios.error):
+        pass
+
+
+class RobotInterface(RobotProtocol):
+    def __init__(self, telemetry_buffer=True):
+        super().__init__(telemetry_buffer)
         self.ser = None
-        self.log = []
+        self.port = None
+        self.baudrate = 9600
+        self.binary_preferred = True
         self.history = []
-        self.timeout = 1.0
         self.max_retries = 3
         self. connected = False
         self.telemetry_enabled = False  
+        # Wątek czytający jest jedynym właścicielem odczytu z portu i
+        # rozdziela linie na: odpowiedzi ACK/NACK, ramki RESULT i telemetrię
+        self._reader = None
+        self._reader_stop = threading.Event()
+        self._reply_cond = threading.Condition()
+        self._replies = deque()
+        self.results = queue.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        self.telemetry = queue.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        self.last_rx = time.monotonic()
+        # Jedna runda wysyłki naraz (wątek nadzorcy wysyła PING w tle)
+        self._send_lock = threading.RLock()
+        self.supervisor = None
+        self.exporter = None
+        # Pamięć wynegocjowanych prędkości i klucz urządzenia (None - URL)
+        self._baud_store = BaudNegotiation.memory
+        self._baud_key = None
         
-    def calculate_checksum(self, cmd):
-        return sum(ord(c) for c in cmd) % 256
-    
     def list_ports(self):
+        import serial.tools.list_ports
         ports = serial.tools.list_ports.comports()
         print("\n=== Dostępne porty szeregowe ===")
         for i, port in enumerate(ports, 1):
             print(f"{i}. {port.device} - {port.description}")
         return [p.device for p in ports]
     
-    def connect(self, port, baudrate=9600):
+    def _open_port(self, port, baudrate, record=None, keep_dtr=False, meta=None):
+        """Port szeregowy, URL pyserial (loop://, socket://), replay://plik,
+        sim://profil (symulator firmware) lub unix://gniazdo (SerialBridge;
+        mostek na TCP to zwykłe socket://host:port).
+        
+        keep_dtr - bez resetu Arduino przez DTR, o ile system na to pozwala
+        (Windows: DTR nieaktywne od otwarcia, POSIX: bez HUPCL przy zamknięciu)"""
+        if port.startswith(SessionRecorder.REPLAY_SCHEME):
+            ser = SessionRecorder.open_replay(port, timeout=READER_POLL)
+        elif port.startswith(RobotSimulator.SIM_SCHEME):
+            ser = RobotSimulator.open_sim(port, timeout=READER_POLL)
+        elif port.startswith("unix://"):
+            from SerialBridge import open_unix
+            ser = open_unix(port, timeout=READER_POLL)
+        else:
+            ser = serial.serial_for_url(port, baudrate, timeout=READER_POLL, do_not_open=True)
+            if keep_dtr and os.name == 'nt' and isinstance(ser, serial.Serial):
+                ser.dtr = False
+                ser.rts = False
+            ser.open()
+            if keep_dtr and isinstance(ser, serial.Serial):
+                _clear_hupcl(ser)
+        if record:
+            ser = SessionRecorder.RecordingSerial(ser, record, meta)
+        return ser
+    
+    def connect(self, port, baudrate=9600, binary=True, record=None, fast=True, negotiate=True):
+        """fast=True: bez resetu przez DTR i bez stałego czekania - sonda
+        PING co PROBE_INTERVAL aż firmware odpowie (gotowe po bootloaderze).
+        negotiate=True: po PING podniesienie prędkości (BaudNegotiation);
+        baudrate to prędkość startowa firmware (SERIAL_BAUD_RATE)"""
         try:
-            self.ser = serial.Serial(port, baudrate, timeout=self.timeout)
-            time.sleep(2)
+            self.binary_mode = _ready_ports.get(port, False) if fast else False
+            self._baud_store = BaudNegotiation.memory
+            self._baud_key = BaudNegotiation.device_key(port)
+            options = self._connect_options(binary, fast, negotiate) if record else None
+            self.ser = self._open_port(port, baudrate, record, keep_dtr=fast,
+                                       meta={'connect': options})
+            if isinstance(self.ser, SessionRecorder.ReplaySerial):
+                binary, fast, negotiate = self._replay_options(binary, fast, negotiate)
+            self.port = port
+            self.baudrate = baudrate
+            self.binary_preferred = binary
+            self.params.invalidate()
+            self._use_port_timer(port)
+            if not fast and isinstance(getattr(self.ser, 'ser', self.ser), serial.Serial):
+                time.sleep(2)   # reset Arduino po otwarciu portu
             print(f"Połączono z {port} ({baudrate} baud)")
             self.connected = True
-            self.watchdog_test()
+            self.start_reader()
+            if fast and not self.wait_ready():
+                self._probe_remembered_baud()
+            if self.watchdog_test():
+                if negotiate and self._baud_switchable():
+                    BaudNegotiation.negotiate(self, store=self._baud_store, key=self._baud_key)
+                if binary and not self.binary_mode:
+                    self.enable_binary()
             return True
         except Exception as e:
             print(f"Błąd połączenia: {e}")
             return False
     
+    def _connect_options(self, binary, fast, negotiate):
+        """Opcje connect() zapisywane w nagraniu (record=...) - replay:// powtarza
+        z nimi tę samą wymianę: sondy PING, negocjację prędkości, BIN_ON"""
+        key = self._baud_key
+        return {'binary': binary, 'fast': fast, 'negotiate': negotiate,
+                'binary_mode': self.binary_mode, 'baud_key': key,
+                'baud_remembered': self._baud_store.get(key) if key is not None else None}
+    
+    def _replay_options(self, binary, fast, negotiate):
+        """Opcje z nagrania zamiast podanych; pamięć prędkości tylko z nagrania
+        (bez ~/.iss_baud.json). Nagranie bez opcji - podane bez zmian."""
+        options = self.ser.meta.get('connect')
+        if not options:
+            return binary, fast, negotiate
+        self.binary_mode = options['binary_mode']
+        self._baud_key = options['baud_key']
+        self._baud_store = BaudNegotiation.BaudMemory(path=None)
+        if self._baud_key is not None and options['baud_remembered']:
+            self._baud_store.set(self._baud_key, options['baud_remembered'])
+        return options['binary'], options['fast'], options['negotiate']
+    
+    def wait_ready(self, timeout=BOOT_TIMEOUT):
+        """Sonda PING co PROBE_INTERVAL aż przyjdzie jakakolwiek odpowiedź
+        (ACK|READY, PONG, także NACK po śmieciach z czasu bootowania).
+        
+        Jeśli firmware zostało w trybie binarnym, nie wiadomo, czy w międzyczasie
+        nie było resetu (wtedy ASCII) - sondy idą na zmianę w obu trybach."""
+        alternate = self.binary_mode
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.ser.write(self._probe_frame())
+            self.ser.flush()
+            if self.wait_reply(PROBE_INTERVAL) is not None:
+                with self._reply_cond:
+                    self._replies.clear()
+                return True
+            if alternate:
+                self.binary_mode = not self.binary_mode
+        self.binary_mode = False
+        return False
+    
+    @property
+    def link_baud(self):
+        """Bieżąca prędkość łącza (po negocjacji)"""
+        return getattr(self.ser, 'baudrate', None) or self.baudrate
+    
+    def set_link_baud(self, rate):
+        """Zmiana prędkości otwartego portu (wątek czytający działa dalej)"""
+        getattr(self.ser, 'ser', self.ser).baudrate = rate
+    
+    def _baud_switchable(self):
+        # Port szeregowy, symulator albo nagranie (ta sama negocjacja co przy
+        # nagrywaniu); gniazda mają stałe tempo
+        return isinstance(getattr(self.ser, 'ser', self.ser),
+                          (serial.Serial, RobotSimulator.SimulatorSerial,
+                           SessionRecorder.ReplaySerial))
+    
+    def _probe_remembered_baud(self):
+        """Firmware bez resetu (zerwane łącze) mogło zostać na prędkości
+        z poprzedniej sesji - sonda na zapamiętanej prędkości"""
+        key = self._baud_key
+        rate = self._baud_store.get(key) if key is not None else None
+        if not rate or rate == self.link_baud or not self._baud_switchable():
+            return False
+        self.set_link_baud(rate)
+        self.binary_mode = _ready_ports.get(self.port, False)
+        if self.wait_ready():
+            return True
+        self.set_link_baud(self.baudrate)
+        return False
+    
+    def set_baud(self, rate):
+        """Ręczna zmiana prędkości (BAUD + seria ECHO + BAUD_OK)"""
+        ok = BaudNegotiation.switch(self, rate)
+        print(f"Prędkość łącza: {self.link_baud} baud" +
+              ("" if ok else " (zmiana nieudana)" if ok is False else " (odrzucona przez firmware)"))
+        return bool(ok)
+    
     def watchdog_test(self):
         response = self.send_command("PING", retries=1)
         if response and "PONG" in response: 
@@ -47,59 +657,228 @@ class RobotInterface:
             self.connected = False
             return False
         
+    def enable_binary(self):
+        """Przejście na ramki binarne; przy starym firmware zostaje ASCII"""
+        response = self.send_command("BIN_ON", retries=1)
+        if response and self.binary_mode:
+            print("Tryb binarny: włączony (COBS + CRC-8)")
+            return True
+        print("Tryb binarny: niedostępny, używam ramek ASCII")
+        return False
+    
+    def disable_binary(self):
+        """Powrót do ramek ASCII"""
+        return self.send_command("BIN_OFF", retries=1)
+    
     def send_command(self, cmd, retries=None):
+        return self.send_batch([cmd], retries=retries)[0]
+    
+    def send_batch(self, cmds, retries=None, window=BATCH_WINDOW, nacks=None):
+        """Potokowe wysłanie wielu komend; zwraca listę odpowiedzi (None = błąd).
+        
+        Ramki są wysyłane jedna za drugą (do `window` bez potwierdzenia),
+        odpowiedzi dopasowywane po numerze sekwencyjnym, a ponawiane są
+        tylko ramki, które nie dostały ACK. Przy aktywnym LinkSupervisor
+        komendy z czasu awarii czekają w kolejce na wznowienie sesji.
+        nacks - słownik, do którego trafia treść NACK: indeks -> ramka"""
+        if self._queue_for_supervisor():
+            return self.supervisor.submit(cmds, retries=retries, window=window)
         if not self.ser or not self.ser.is_open:
             print("Brak połączenia")
-            return None
-        
+            return [None] * len(cmds)
+        results = self._send_rounds(cmds, retries, window, nacks)
+        self._record_batch(cmds, results)
+        return results
+    
+    def _send_rounds(self, cmds, retries, window, nacks=None):
         retries = retries if retries is not None else self.max_retries
-        checksum = self.calculate_checksum(cmd)
-        frame = f"{cmd}|{checksum}#"
+        results = [None] * len(cmds)
+        todo = list(range(len(cmds)))
         
         for attempt in range(retries):
-            try:
-                self.ser.reset_input_buffer()
-                self.ser.reset_output_buffer()
-                
-                self.ser.write(frame.encode())
-                self.ser.flush()
-                self.log_message(f"TX: {frame. strip('#')}")
-                
-                start = time.time()
-                while (time.time() - start) < self.timeout:
-                    if self.ser.in_waiting > 0:
-                        line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                        if not line:
-                            continue
-                        # Telemetria (bez '#') – pokaż jeśli włączona i pomiń
-                        if not line.endswith('#'):
-                            if self.telemetry_enabled:
-                                print(line)
-                            continue
-                        # Ramka z '#'
-                        self.log_message(f"RX: {line. strip('#')}")
-                        if line.startswith("ACK"):
-                            return line. strip('#')
-                        if line.startswith("NACK"):
-                            print(line)
-                            return None
-                        # Inne ramki (RESULT itp.)
-                        print(f"[FRAME] {line}")
-                    else:
-                        time.sleep(0.01)
-                
-                print(f"Timeout (próba {attempt+1}/{retries})")
-                time.sleep(0.1)
-                    
-            except Exception as e: 
-                print(f"Błąd komunikacji: {e}")
+            self._begin_attempt(cmds, todo, attempt)
+            lost = None
+            with self._send_lock:
+                try:
+                    # Bez czyszczenia bufora portu: telemetria i ramki RESULT, które
+                    # już są w drodze, trafiają do swoich kolejek. Odrzucamy tylko
+                    # stare odpowiedzi, które przyszły przed tą rundą.
+                    with self._reply_cond:
+                        self._replies.clear()
+                    todo = self._send_window(cmds, todo, results, window, attempt > 0, nacks)
+                except (serial.SerialException, OSError) as e:
+                    lost = e
+                except Exception as e: 
+                    print(f"Błąd komunikacji: {e}")
+            if lost is not None:
+                self.link_lost(lost)
+                if self._queue_for_supervisor():
+                    rest = self.supervisor.submit([cmds[i] for i in todo], retries=retries, window=window)
+                    for i, result in zip(todo, rest):
+                        results[i] = result
+                else:
+                    print(f"Błąd komunikacji: {lost}")
+                return results
+            if not todo:
+                return results
+            time.sleep(self._end_attempt(cmds, todo, attempt, retries))
         
-        print("Brak odpowiedzi po wszystkich próbach")
-        return None
+        self._link_note("Brak odpowiedzi po wszystkich próbach")
+        return results
     
-    def log_message(self, msg):
-        timestamp = datetime.now().strftime("%H:%M:%S. %f")[:-3]
-        self.log.append(f"[{timestamp}] {msg}")
+    def _link_note(self, text):
+        # Wątek nadzorcy (heartbeat, przywracanie nastaw) pisze do logu -
+        # komunikaty nie wpadają w prompt interfejsu
+        supervisor = self.supervisor
+        if supervisor is not None and threading.current_thread() is supervisor.thread:
+            self.log_message(f"LINK: {text}")
+        else:
+            print(text)
+    
+    def _queue_for_supervisor(self):
+        supervisor = self.supervisor
+        return (supervisor is not None and supervisor.outage and
+                threading.current_thread() is not supervisor.thread)
+    
+    def try_lock_send(self):
+        return self._send_lock.acquire(blocking=False)
+    
+    def unlock_send(self):
+        self._send_lock.release()
+    
+    def link_lost(self, reason):
+        """Łącze zerwane (błąd portu, brak odpowiedzi) - powiadomienie nadzorcy"""
+        if not self.connected:
+            return
+        self.connected = False
+        if self.supervisor is None:
+            print(f"✗ Utracono połączenie z {self.port}: {reason}")
+        self.log_message(f"LINK_LOST: {reason}")
+        self.params.invalidate()
+        if self.port is not None:
+            _ready_ports[self.port] = self.binary_mode
+        if self.supervisor is not None:
+            self.supervisor.notify_lost()
+    
+    def reconnect(self):
+        """Ponowne otwarcie portu po zerwaniu łącza (bez BIN_OFF - łącza i tak nie ma)"""
+        self._reader_stop.set()
+        try:
+            if self.ser:
+                self.ser.close()
+        except Exception:
+            pass
+        self.stop_reader()
+        self.connected = False
+        return self.connect(self.port, self.baudrate, self.binary_preferred) and self.connected
+    
+    def _send_window(self, cmds, todo, results, window, retransmit=False, nacks=None):
+        """Jedna runda wysyłki (SendWindow); zwraca indeksy komend do ponowienia"""
+        sw = SendWindow(self, cmds, todo, results, window, retransmit, nacks)
+        while not sw.done:
+            for data in sw.frames():
+                self.ser.write(data)
+            self.ser.flush()
+            sw.handle(self.wait_reply(sw.wait_time()))
+        return sw.remaining()
+    
+    # ========================= WĄTEK CZYTAJĄCY =========================
+    
+    def start_reader(self):
+        """Uruchomienie wątku czytającego dla otwartego portu"""
+        self.stop_reader()
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._reader_loop,
+                                        name="robot-reader", daemon=True)
+        self._reader.start()
+    
+    def stop_reader(self):
+        """Zatrzymanie wątku czytającego"""
+        if self._reader is None:
+            return
+        self._reader_stop.set()
+        if self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
+        self._reader = None
+    
+    def _reader_loop(self):
+        buf = bytearray()
+        while not self._reader_stop.is_set():
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                if not self._reader_stop.is_set():
+                    print(f"Błąd odczytu: {e}")
+                    self.link_lost(e)
+                break
+            if not chunk:
+                continue
+            self.last_rx = time.monotonic()
+            buf.extend(chunk)
+            self._feed(buf)
+    
+    def _deliver_reply(self, seq, frame):
+        with self._reply_cond:
+            self._replies.append((seq, frame))
+            self._reply_cond.notify_all()
+    
+    def _deliver_result(self, frame):
+        if self._put_dropping(self.results, frame):
+            self.metrics.on_queue_drop('results')
+    
+    def _deliver_telemetry(self, line):
+        if self._put_dropping(self.telemetry, line):
+            self.metrics.on_queue_drop('telemetry')
+    
+    @staticmethod
+    def _put_dropping(q, item):
+        """Dodanie do kolejki; przy przepełnieniu wypada najstarszy element.
+        Zwraca True, jeśli coś wypadło."""
+        dropped = False
+        while True:
+            try:
+                q.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    dropped = True
+                except queue.Empty:
+                    pass
+    
+    def wait_reply(self, timeout):
+        """Oczekiwanie (bez odpytywania) na odpowiedź ACK/NACK: (seq, ramka)"""
+        deadline = time.monotonic() + timeout
+        with self._reply_cond:
+            while not self._replies:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._reply_cond.wait(remaining)
+            return self._replies.popleft()
+    
+    def disconnect(self):
+        """Zatrzymanie wątku czytającego i zamknięcie portu"""
+        if self.exporter is not None:
+            self.export_session()
+        self.stop_publishing()
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        if self.connected and self.ser and self.ser.is_open and self.link_baud != self.baudrate:
+            # Jak BIN_OFF: następne połączenie bez resetu zaczyna od prędkości startowej
+            BaudNegotiation.switch(self, self.baudrate, burst=0)
+        if self.connected and self.binary_mode and self.ser and self.ser.is_open:
+            # Firmware bez resetu przy następnym połączeniu zaczyna od ASCII
+            self.send_command("BIN_OFF", retries=1)
+        if self.port is not None:
+            _ready_ports[self.port] = self.binary_mode
+        self._reader_stop.set()
+        if self.ser and self.ser.is_open:
+            self.ser.close()
+            print("Połączenie zamknięte")
+        self.stop_reader()
+        self.connected = False
+        self.binary_mode = False
     
     # ========================= PROJEKT 4 - FUNKCJE =========================
     
@@ -119,53 +898,62 @@ class RobotInterface:
             self.telemetry_enabled = False
         return response
     
-    def set_pid_left(self, kp=None, ki=None, kd=None):
-        """Ustaw parametry PID lewego koła"""
+    def push_settings(self, cmds, force=False, retries=None):
+        """Wysłanie tylko komend zmieniających znane parametry (ParameterCache);
+        pominięte dostają odpowiedź UNCHANGED"""
+        todo = list(range(len(cmds))) if force else self.params.changed(cmds)
+        results = [UNCHANGED] * len(cmds)
+        if todo:
+            responses = self.send_batch([cmds[i] for i in todo], retries=retries)
+            for i, response in zip(todo, responses):
+                results[i] = response
+        return results
+    
+    def apply_settings(self, settings):
+        """Wysłanie listy (komenda, etykieta, wartość) jedną paczką ramek"""
+        responses = self.push_settings([cmd for cmd, _, _ in settings])
         results = []
-        if kp is not None:
-            response = self.send_command(f"KP_L {kp}")
-            if response:
-                print(f"✓ Kp_left = {kp}")
-                results. append(response)
-        if ki is not None:
-            response = self.send_command(f"KI_L {ki}")
+        for (_, label, value), response in zip(settings, responses):
             if response:
-                print(f"✓ Ki_left = {ki}")
-                results.append(response)
-        if kd is not None: 
-            response = self.send_command(f"KD_L {kd}")
-            if response: 
-                print(f"✓ Kd_left = {kd}")
+                note = " (bez zmian)" if response == UNCHANGED else ""
+                print(f"✓ {label} = {value}{note}")
                 results.append(response)
         return results
     
+    def set_pid_left(self, kp=None, ki=None, kd=None):
+        """Ustaw parametry PID lewego koła"""
+        return self.apply_settings(self._pid_settings('L', kp, ki, kd))
+    
     def set_pid_right(self, kp=None, ki=None, kd=None):
         """Ustaw parametry PID prawego koła"""
-        results = []
-        if kp is not None: 
-            response = self.send_command(f"KP_R {kp}")
-            if response: 
-                print(f"✓ Kp_right = {kp}")
-                results.append(response)
-        if ki is not None:
-            response = self.send_command(f"KI_R {ki}")
-            if response:
-                print(f"✓ Ki_right = {ki}")
-                results.append(response)
-        if kd is not None:
-            response = self.send_command(f"KD_R {kd}")
-            if response:
-                print(f"✓ Kd_right = {kd}")
-                results.append(response)
-        return results
+        return self.apply_settings(self._pid_settings('R', kp, ki, kd))
     
     def set_vmax(self, vmax):
         """Ustaw prędkość maksymalną"""
-        response = self.send_command(f"VMAX {vmax}")
+        response = self.push_settings([f"VMAX {vmax}"])[0]
         if response:
             print(f"✓ V_max = {vmax}")
         return response
     
+    def push_fuzzy(self, size=None, enable=True):
+        """Kompilacja bazy reguł (FuzzyController) do tablicy i wysyłka do robota"""
+        try:
+            import FuzzyController
+        except ImportError:
+            print("Regulator rozmyty wymaga numpy")
+            return False
+        lut = FuzzyController.FuzzyController().compile_lut(*(size or FuzzyController.LUT_SIZE))
+        return FuzzyController.push_lut(self, lut, enable=enable)
+    
+    def set_fuzzy(self, enabled):
+        """Przełączenie zadanej prędkości: tablica rozmyta / proporcjonalna"""
+        response = self.send_command("FZ_ON" if enabled else "FZ_OFF")
+        if response and response.startswith("ACK"):
+            print(f"✓ Regulator rozmyty {'WŁĄCZONY' if enabled else 'WYŁĄCZONY'}")
+        elif response:
+            print(f"✗ {response} (najpierw: fuzzy push)")
+        return response
+    
     def read_distance(self):
         """Jednorazowy pomiar odległości"""
         response = self.send_command("READ_DISTANCE")
@@ -173,12 +961,19 @@ class RobotInterface:
             print(f"Odległość: {response}")
         return response
     
-    def get_status(self):
-        """Odczyt parametrów z Arduino"""
-        response = self.send_command("STATUS")
-        if response:
-            print(f"Parametry: {response}")
-        return response
+    def get_status(self, refresh=False):
+        """Parametry robota jako słownik; z pamięci podręcznej, jeśli pełna,
+        w przeciwnym razie (lub refresh=True) przez STATUS"""
+        source = "pamięć podręczna"
+        if refresh or not self.params.complete:
+            if not self.send_command("STATUS"):
+                return None
+            source = "STATUS"
+        params = self.params.snapshot()
+        values = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                           for k, v in params.items())
+        print(f"Parametry ({source}): {values}")
+        return params
     
     def interactive_config_wheels(self):
         """Interaktywna konfiguracja PID kół"""
@@ -209,27 +1004,25 @@ class RobotInterface:
         vmax = float(vmax) if vmax else 50.0
         
         print("\nWysyłanie konfiguracji...")
-        self.set_pid_left(kp_l, ki_l, kd_l)
-        self.set_pid_right(kp_r, ki_r, kd_r)
-        self.set_vmax(vmax)
+        self.apply_settings(self._pid_settings('L', kp_l, ki_l, kd_l) +
+                            self._pid_settings('R', kp_r, ki_r, kd_r) +
+                            [(f"VMAX {vmax}", "V_max", vmax)])
         print("\n✓ Konfiguracja zakończona")
     
     def pump_telemetry(self):
-        """Nieblokujące wypompowanie dostępnych linii."""
-        if not self.ser or not self. ser.is_open:
-            return
-        try:
-            while self.ser.in_waiting > 0:
-                line = self. ser.readline().decode('utf-8', errors='ignore').strip()
-                if not line:
-                    continue
-                if line.endswith('#'):
-                    print(f"[FRAME] {line}")
-                else:
-                    if self.telemetry_enabled:
-                        print(line)
-        except Exception: 
-            pass
+        """Nieblokujące wypompowanie linii zebranych przez wątek czytający."""
+        while True:
+            try:
+                print(f"[FRAME] {self.results.get_nowait()}#")
+            except queue.Empty:
+                break
+        while True:
+            try:
+                line = self.telemetry.get_nowait()
+            except queue.Empty:
+                break
+            if self.telemetry_enabled:
+                print(line)
 
     def monitor(self, seconds=0):
         """Podgląd telemetrii.  seconds=0 => bez limitu, Ctrl+C aby przerwać."""
@@ -240,17 +1033,50 @@ class RobotInterface:
         deadline = time.time() + seconds if seconds > 0 else None
         try:
             while deadline is None or time.time() < deadline:
-                line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    if line.endswith('#') or line.startswith(('ACK', 'NACK')):
-                        print(f"[FRAME] {line}")
-                    else:
-                        print(line)
-                else:
-                    time.sleep(0.01)
+                while True:
+                    try:
+                        print(f"[FRAME] {self.results.get_nowait()}#")
+                    except queue.Empty:
+                        break
+                try:
+                    print(self.telemetry.get(timeout=0.1))
+                except queue.Empty:
+                    pass
         except KeyboardInterrupt:
             pass
     
+    def live_plot(self, seconds=0, png=None):
+        """Wykres telemetrii na żywo; png - bez okna, migawki do pliku"""
+        if self.telemetry_buffer is None:
+            print("Wykres wymaga numpy (bufor TelemetryRing)")
+            return
+        from LivePlot import LivePlot
+        try:
+            plot = LivePlot(self.telemetry_buffer, headless=bool(png))
+        except ImportError:
+            print("Wykres wymaga matplotlib (pip install matplotlib)")
+            return
+        print("Wykres telemetrii: zamknij okno lub Ctrl+C aby przerwać.")
+        plot.run(seconds, png)
+        if png:
+            print(f"Wykres zapisany do: {png}")
+    
+    def export_session(self, path=None):
+        """Start eksportu przebiegu do pliku .npz/.parquet; bez ścieżki - koniec"""
+        if self.exporter is not None:
+            rows = self.exporter.close()
+            print(f"✓ Eksport zakończony: {self.exporter.path} "
+                  f"({rows['telemetry']} rekordów, {rows['events']} zdarzeń)")
+            self.exporter = None
+        if path:
+            from SessionExport import SessionExporter
+            try:
+                self.exporter = SessionExporter(self, path).start()
+            except (RuntimeError, OSError) as e:
+                print(f"✗ Eksport niemożliwy: {e}")
+                return
+            print(f"Eksport przebiegu do: {path} (export - koniec)")
+    
     def show_help(self):
         print("""
 ╔════════════════════════════════════════════════════════════╗
@@ -267,13 +1093,21 @@ class RobotInterface:
 ║   ki-r <val>    - Ustaw Ki prawego koła                    ║
 ║   kd-r <val>    - Ustaw Kd prawego koła                    ║
 ║   vmax <val>    - Ustaw prędkość maksymalną                ║
+║   autotune [n]  - Strojenie PID egzaminami (n prób)        ║
+║   fuzzy [on|off]- Regulator rozmyty (sam fuzzy - wysyłka)  ║
+║   fuzzy push n m- Tablica n x m (domyślnie 24 x 24)        ║
 ║                                                            ║
 ║ DIAGNOSTYKA:                                               ║
-║   status        - Status i parametry robota                ║
+║   status [refresh]- Status i parametry robota              ║
 ║   read-dist     - Jednorazowy pomiar odległości            ║
 ║   telemetry-on  - Włącz telemetrię (DIST/VREF/PWM)         ║
 ║   telemetry-off - Wyłącz telemetrię                        ║
 ║   monitor [s]   - Monitor telemetrii (opcjonalnie s sek)   ║
+║   plot [png] [s]- Wykres telemetrii na żywo / migawki PNG  ║
+║   export [plik] - Eksport przebiegu .npz/.parquet (stop)   ║
+║   publish [nazwa|off] - Telemetria dla innych procesów     ║
+║   metrics [plik]- Metryki łącza (plik: format Prometheus)  ║
+║   baud [rate]   - Prędkość łącza / zmiana z testem ECHO    ║
 ║                                                            ║
 ║ SYSTEM:                                                     ║
 ║   help          - Ta pomoc                                 ║
@@ -289,9 +1123,12 @@ class RobotInterface:
         if self.ser and self.ser.is_open:
             print(f"Port: {self.ser.port}")
             print(f"Baudrate: {self.ser.baudrate}")
-            print(f"Timeout: {self.timeout}s")
+            mode = "stały" if self._fixed_timeout is not None else f"adaptacyjny, {self.rto.samples} pomiarów RTT"
+            print(f"Timeout: {self.timeout:.3f}s ({mode})")
         print(f"Liczba komend: {len(self.history)}")
-        print(f"Liczba logów: {len(self.log)}")
+        print(f"Liczba logów: {self.log_count}")
+        if self.log_sink:
+            print(f"Log na dysku: {self.log_sink.files[-1] if self.log_sink.files else self.log_sink.directory}")
         self.watchdog_test()
     
     def show_history(self):
@@ -305,8 +1142,13 @@ class RobotInterface:
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(f"=== LOG KOMUNIKACJI ROBOT ARDUINO - PROJEKT 4 ===\n")
                 f.write(f"Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                for entry in self.log:
-                    f.write(entry + '\n')
+                if self.log_sink:
+                    # Cała sesja z dysku (pamięć trzyma tylko ostatnie wpisy)
+                    self.log_sink.flush()
+                    SessionLog.convert_to_text(self.log_sink.files, f)
+                else:
+                    for entry in self.log_entries():
+                        f.write(entry + '\n')
             print(f"Log zapisany do:  {filename}")
         except Exception as e:
             print(f"Błąd zapisu: {e}")
@@ -319,12 +1161,11 @@ class RobotInterface:
         # Wybór portu
         ports = self.list_ports()
         if not ports:
-            print("Brak dostępnych portów szeregowych")
-            return
+            print("Brak dostępnych portów szeregowych (można podać URL mostka)")
         
         try:
-            choice = int(input("\nWybierz port (numer): ")) - 1
-            port = ports[choice]
+            choice = input("\nWybierz port (numer lub URL, np. socket://localhost:7777): ").strip()
+            port = choice if "://" in choice else ports[int(choice) - 1]
         except: 
             print("Nieprawidłowy wybór")
             return
@@ -332,7 +1173,11 @@ class RobotInterface:
         baudrate = input("Baudrate [9600]: ").strip()
         baudrate = int(baudrate) if baudrate else 9600
         
+        # Log na bieżąco na dysk (logs/*.isslog) - nie ginie przy awarii;
+        # otwarty przed connect(), żeby objął sondy PING, BAUD i BIN_ON
+        self.open_log()
         if not self.connect(port, baudrate):
+            self.close_log()
             return
         
         print("\nWpisz 'help' aby zobaczyć dostępne komendy\n")
@@ -359,7 +1204,7 @@ class RobotInterface:
                 
                 elif command == 'status': 
                     self.show_status()
-                    self.get_status()
+                    self.get_status(refresh=len(parts) > 1 and parts[1] == 'refresh')
                 
                 elif command == 'history':
                     self.show_history()
@@ -467,6 +1312,21 @@ class RobotInterface:
                         except ValueError: 
                             print("Błąd: Wartość musi być liczbą")
                 
+                elif command == 'autotune':
+                    from OnlineTuner import OnlineTuner
+                    budget = int(parts[1]) if len(parts) > 1 else 20
+                    OnlineTuner(self, 'wall', budget).tune()
+                
+                elif command == 'fuzzy':
+                    action = parts[1] if len(parts) > 1 else 'push'
+                    if action == 'push':
+                        size = tuple(int(p) for p in parts[2:4]) if len(parts) > 3 else None
+                        self.push_fuzzy(size)
+                    elif action in ('on', 'off'):
+                        self.set_fuzzy(action == 'on')
+                    else:
+                        print("Użycie: fuzzy [push [n_e n_de]|on|off]")
+                
                 elif command == 'read-dist':
                     self.read_distance()
                 
@@ -485,6 +1345,37 @@ class RobotInterface:
                 elif command == 'monitor': 
                     secs = int(parts[1]) if len(parts) > 1 else 0
                     self.monitor(secs)
+                
+                elif command == 'export':
+                    self.export_session(parts[1] if len(parts) > 1 else None)
+                
+                elif command == 'publish':
+                    if len(parts) > 1 and parts[1] == 'off':
+                        self.stop_publishing()
+                        print("Publikacja telemetrii zakończona")
+                    else:
+                        self.publish_telemetry(parts[1] if len(parts) > 1 else None)
+                
+                elif command == 'plot':
+                    args = parts[1:]
+                    png = args.pop(0) if args and args[0].endswith('.png') else None
+                    self.live_plot(float(args[0]) if args else 0, png)
+                
+                elif command == 'baud':
+                    if len(parts) > 1:
+                        self.set_baud(int(parts[1]))
+                    else:
+                        print(f"Prędkość łącza: {self.link_baud} baud")
+                
+                elif command == 'metrics':
+                    print(self.metrics.format_report())
+                    if self.supervisor is not None:
+                        sv = self.supervisor.stats()
+                        print(f"Nadzorca łącza: wznowień {sv['reconnects']}, PING bez odpowiedzi "
+                              f"{sv['missed']}/{sv['heartbeats']}, wstrzymanych {sv['suspended']}")
+                    if len(parts) > 1:
+                        path = self.metrics.dump_prometheus(parts[1], {'port': self.ser.port})
+                        print(f"Metryki zapisane do: {path}")
 
                 else:
                     print("Nieznana komenda. Wpisz 'help' aby zobaczyć pomoc.")
@@ -496,9 +1387,8 @@ class RobotInterface:
                 print(f"Błąd: {e}")
         
         # Zamknięcie połączenia
-        if self.ser and self.ser. is_open:
-            self. ser.close()
-            print("Połączenie zamknięte")
+        self.disconnect()
+        self.close_log()
 
 
 if __name__ == "__main__":
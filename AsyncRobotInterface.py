@@ -0,0 +1,244 @@
+"""
+Async Robot Interface
+Nieblokujący klient asyncio - jedna pętla zdarzeń obsługuje wiele robotów
+
+    async def main():
+        robots = [AsyncRobotInterface(), AsyncRobotInterface()]
+        await asyncio.gather(robots[0].connect("COM3"), robots[1].connect("COM4"))
+        await asyncio.gather(*(r.set_pid_left(kp=2.0) for r in robots))
+        async for line in robots[0].telemetry_lines():
+            print(line)
+
+Wymaga: pip install pyserial-asyncio
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import ArduinoRobotPython
+from ArduinoRobotPython import (RobotProtocol, SendWindow, BATCH_WINDOW, TELEMETRY_QUEUE_SIZE,
+                                PROBE_INTERVAL, BOOT_TIMEOUT)
+
+# Rozmiar jednorazowego odczytu ze strumienia
+READ_CHUNK = 256
+
+
+class AsyncRobotInterface(RobotProtocol):
+    def __init__(self):
+        super().__init__()
+        self.port = None
+        self.reader = None
+        self.writer = None
+        self.max_retries = 3
+        self.connected = False
+        self._reader_task = None
+        self._replies = deque()
+        self._reply_event = asyncio.Event()
+        self.results = asyncio.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        self.telemetry = asyncio.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+
+    async def connect(self, port, baudrate=9600, binary=True, fast=True):
+        try:
+            import serial_asyncio
+        except ImportError:
+            print("Brak pyserial-asyncio (pip install pyserial-asyncio)")
+            return False
+        try:
+            reader, writer = await serial_asyncio.open_serial_connection(
+                url=port, baudrate=baudrate)
+        except Exception as e:
+            print(f"Błąd połączenia: {e}")
+            return False
+        if not fast:
+            # Reset Arduino po otwarciu portu - czekamy bez blokowania pętli
+            await asyncio.sleep(2)
+        print(f"Połączono z {port} ({baudrate} baud)")
+        return await self.attach(reader, writer, port, binary, probe=fast)
+
+    async def attach(self, reader, writer, port=None, binary=True, probe=False):
+        """Podpięcie gotowych strumieni (port szeregowy, gniazdo TCP...);
+        probe - sonda PING aż firmware skończy bootowanie"""
+        self.port = port
+        if port is not None:
+            self._use_port_timer(port)
+        self.reader, self.writer = reader, writer
+        self.binary_mode = ArduinoRobotPython._ready_ports.get(port, False) if probe else False
+        self.connected = True
+        self._reader_task = asyncio.create_task(self._reader_loop())
+        if probe:
+            await self.wait_ready()
+        if await self.watchdog_test() and binary and not self.binary_mode:
+            await self.enable_binary()
+        return self.connected
+
+    async def wait_ready(self, timeout=BOOT_TIMEOUT):
+        """Jak RobotInterface.wait_ready"""
+        alternate = self.binary_mode
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.writer.write(self._probe_frame())
+            await self.writer.drain()
+            if await self.wait_reply(PROBE_INTERVAL) is not None:
+                self._replies.clear()
+                return True
+            if alternate:
+                self.binary_mode = not self.binary_mode
+        self.binary_mode = False
+        return False
+
+    async def close(self):
+        if self.connected and self.binary_mode and self.writer:
+            await self.send_command("BIN_OFF", retries=1)
+        if self.port is not None:
+            ArduinoRobotPython._ready_ports[self.port] = self.binary_mode
+        self.connected = False
+        self.stop_publishing()
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        self.binary_mode = False
+
+    async def watchdog_test(self):
+        response = await self.send_command("PING", retries=1)
+        if response and "PONG" in response:
+            return True
+        print(f"Watchdog {self.port}: Brak odpowiedzi")
+        self.connected = False
+        return False
+
+    async def enable_binary(self):
+        response = await self.send_command("BIN_ON", retries=1)
+        return bool(response) and self.binary_mode
+
+    # ========================= ODCZYT =========================
+
+    async def _reader_loop(self):
+        buf = bytearray()
+        while True:
+            try:
+                chunk = await self.reader.read(READ_CHUNK)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Błąd odczytu {self.port}: {e}")
+                break
+            if not chunk:
+                break
+            buf.extend(chunk)
+            self._feed(buf)
+        self.connected = False
+
+    def _deliver_reply(self, seq, frame):
+        self._replies.append((seq, frame))
+        self._reply_event.set()
+
+    def _deliver_result(self, frame):
+        if self._put_dropping(self.results, frame):
+            self.metrics.on_queue_drop('results')
+
+    def _deliver_telemetry(self, line):
+        if self._put_dropping(self.telemetry, line):
+            self.metrics.on_queue_drop('telemetry')
+
+    @staticmethod
+    def _put_dropping(q, item):
+        dropped = q.full()
+        if dropped:
+            q.get_nowait()
+        q.put_nowait(item)
+        return dropped
+
+    async def wait_reply(self, timeout):
+        """Oczekiwanie na odpowiedź ACK/NACK: (seq, ramka) lub None"""
+        deadline = time.monotonic() + timeout
+        while not self._replies:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._reply_event.clear()
+            try:
+                await asyncio.wait_for(self._reply_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self._replies.popleft()
+
+    async def telemetry_lines(self):
+        """Asynchroniczny iterator po liniach telemetrii"""
+        while self.connected or not self.telemetry.empty():
+            try:
+                yield await asyncio.wait_for(self.telemetry.get(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+
+    # ========================= WYSYŁANIE =========================
+
+    async def send_command(self, cmd, retries=None):
+        return (await self.send_batch([cmd], retries=retries))[0]
+
+    async def send_batch(self, cmds, retries=None, window=BATCH_WINDOW, nacks=None):
+        """Jak RobotInterface.send_batch, ale bez blokowania pętli zdarzeń"""
+        if not self.writer:
+            print("Brak połączenia")
+            return [None] * len(cmds)
+
+        retries = retries if retries is not None else self.max_retries
+        results = [None] * len(cmds)
+        todo = list(range(len(cmds)))
+
+        for attempt in range(retries):
+            self._begin_attempt(cmds, todo, attempt)
+            try:
+                self._replies.clear()
+                todo = await self._send_window(cmds, todo, results, window, attempt > 0, nacks)
+            except Exception as e:
+                print(f"Błąd komunikacji {self.port}: {e}")
+            if not todo:
+                break
+            await asyncio.sleep(self._end_attempt(cmds, todo, attempt, retries))
+        self._record_batch(cmds, results)
+        return results
+
+    async def _send_window(self, cmds, todo, results, window, retransmit=False, nacks=None):
+        """Jak RobotInterface._send_window (SendWindow), z oczekiwaniem w pętli zdarzeń"""
+        sw = SendWindow(self, cmds, todo, results, window, retransmit, nacks)
+        while not sw.done:
+            for data in sw.frames():
+                self.writer.write(data)
+            await self.writer.drain()
+            sw.handle(await self.wait_reply(sw.wait_time()))
+        return sw.remaining()
+
+    def _link_note(self, text):
+        print(f"{self.port}: {text}")
+
+    # ========================= KOMENDY =========================
+
+    async def set_pid_left(self, kp=None, ki=None, kd=None):
+        """Ustaw parametry PID lewego koła"""
+        settings = self._pid_settings('L', kp, ki, kd)
+        return await self.send_batch([cmd for cmd, _, _ in settings])
+
+    async def set_pid_right(self, kp=None, ki=None, kd=None):
+        """Ustaw parametry PID prawego koła"""
+        settings = self._pid_settings('R', kp, ki, kd)
+        return await self.send_batch([cmd for cmd, _, _ in settings])
+
+    async def set_vmax(self, vmax):
+        """Ustaw prędkość maksymalną"""
+        return await self.send_command(f"VMAX {vmax}")
+
+    async def read_distance(self):
+        """Jednorazowy pomiar odległości"""
+        return await self.send_command("READ_DISTANCE")
+
+    async def get_status(self):
+        """Odczyt parametrów z Arduino"""
+        return await self.send_command("STATUS")
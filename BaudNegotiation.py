@@ -0,0 +1,178 @@
+"""
+Baud Negotiation
+Podniesienie prędkości łącza po pierwszym PING (firmware zaczyna od 9600)
+
+Przełączenie jednej prędkości:
+  1. BAUD <r>   - ACK przychodzi jeszcze na starej prędkości, potem firmware
+                  przechodzi na nową
+  2. ECHO ...   - seria ramek z echem na nowej prędkości (suma kontrolna
+                  sprawdzana w firmware, treść echa tutaj)
+  3. BAUD_OK    - zatwierdzenie; bez niego firmware po BAUD_CONFIRM wraca
+                  do starej prędkości, więc błąd nie zrywa łącza
+
+Próbowane są kolejno coraz wyższe prędkości aż do pierwszego błędu. Najlepsza
+działająca jest zapamiętywana dla portu / urządzenia (BAUD_MEMORY) i przy
+następnym połączeniu ustawiana od razu. Porty podane jako URL (sim://,
+replay://...) negocjują za każdym razem, bez zapisu do BAUD_MEMORY.
+"""
+
+import json
+import os
+import threading
+import time
+
+BASE_BAUD = 9600
+BAUD_RATES = (57600, 115200, 250000, 500000)
+# Czas, po którym firmware bez BAUD_OK wraca do poprzedniej prędkości [s]
+BAUD_CONFIRM = 1.0
+ECHO_BURST = 8          # ramek ECHO na próbę
+ECHO_LENGTH = 24        # znaków w jednym echu
+BAUD_MEMORY = os.path.join(os.path.expanduser("~"), ".iss_baud.json")
+
+# Znaki echa: drukowalne ASCII bez separatorów ramki ('#', '|')
+_ECHO_CHARS = "".join(chr(c) for c in range(0x21, 0x7F) if chr(c) not in "#|")
+
+
+def echo_payloads(count=ECHO_BURST, length=ECHO_LENGTH):
+    """Różne treści, żeby każdy bit ramki był w serii i zerem, i jedynką"""
+    n = len(_ECHO_CHARS)
+    return ["".join(_ECHO_CHARS[(i * 7 + k * (i + 1)) % n] for k in range(length))
+            for i in range(count)]
+
+
+def echo_matches(response, payload):
+    """'ACK|ECHO=<treść>' (Line Follower dokleja jeszcze '|suma')"""
+    parts = (response or "").split('|')
+    return len(parts) > 1 and parts[0] == "ACK" and parts[1] == f"ECHO={payload}"
+
+
+def device_key(port):
+    """Klucz pamięci: VID:PID:numer seryjny adaptera USB, inaczej nazwa portu.
+    None dla URL (sim://, replay://, socket://...) - to nie urządzenia: bez
+    wpisu w BAUD_MEMORY i bez wyliczania portów przy każdym połączeniu"""
+    if not port or "://" in port:
+        return None
+    try:
+        import serial.tools.list_ports
+        for info in serial.tools.list_ports.comports():
+            if info.device == port and info.vid is not None:
+                return f"{info.vid:04x}:{info.pid:04x}:{info.serial_number or port}"
+    except Exception:
+        pass
+    return port
+
+
+class BaudMemory:
+    """Najlepsza prędkość dla każdego portu / urządzenia (plik JSON)"""
+
+    def __init__(self, path=BAUD_MEMORY):
+        self.path = path            # None - tylko w pamięci (odtwarzanie nagrania)
+        self._lock = threading.Lock()
+        self._rates = None
+
+    def _load(self):
+        if self._rates is None and self.path is None:
+            self._rates = {}
+        if self._rates is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._rates = json.load(f)
+            except (OSError, ValueError):
+                self._rates = {}
+        return self._rates
+
+    def get(self, key):
+        with self._lock:
+            return self._load().get(key)
+
+    def _save(self):
+        if self.path is None:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._rates, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Nie zapisano prędkości łącza: {e}")
+
+    def set(self, key, rate):
+        with self._lock:
+            if self._load().get(key) != rate:
+                self._rates[key] = rate
+                self._save()
+
+    def forget(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+
+memory = BaudMemory()
+
+
+def echo_burst(robot, count=ECHO_BURST):
+    """Seria ECHO w zwykłym oknie wysyłki; True, gdy każde echo się zgadza"""
+    payloads = echo_payloads(count)
+    results = robot.send_batch([f"ECHO {p}" for p in payloads], retries=1)
+    return all(echo_matches(r, p) for r, p in zip(results, payloads))
+
+
+def _probe(robot, rate, binary, timeout):
+    robot.set_link_baud(rate)
+    robot.binary_mode = binary      # wait_ready bez odpowiedzi zeruje tryb
+    return robot.wait_ready(timeout)
+
+
+def switch(robot, rate, burst=ECHO_BURST):
+    """Przejście na prędkość rate: True - gotowe, False - błąd (łącze
+    wraca na starą prędkość), None - firmware nie zna BAUD / tej prędkości"""
+    old = robot.link_baud
+    if rate == old:
+        return True
+    response = robot.send_command(f"BAUD {rate}", retries=1)
+    if not response or not response.startswith("ACK|BAUD"):
+        return None
+    binary = robot.binary_mode
+    robot.set_link_baud(rate)
+    if (not burst or echo_burst(robot, burst)) and robot.send_command("BAUD_OK", retries=2):
+        return True
+    # Firmware samo wraca na starą prędkość po BAUD_CONFIRM
+    if _probe(robot, old, binary, BAUD_CONFIRM * 2):
+        return False
+    # BAUD_OK doszło, zgubiło się tylko potwierdzenie
+    if _probe(robot, rate, binary, BAUD_CONFIRM):
+        return True
+    robot.set_link_baud(old)
+    robot.binary_mode = binary
+    return False
+
+
+def negotiate(robot, rates=BAUD_RATES, store=memory, key=None):
+    """Najwyższa działająca prędkość z rates; zwraca ustawioną prędkość.
+    key - klucz w store (domyślnie device_key(robot.port))"""
+    key = key if key is not None else device_key(robot.port)
+    if key is None:
+        store = None
+    start = time.monotonic()
+    best = store.get(key) if store is not None else None
+    if best is not None and best != robot.link_baud:
+        if not switch(robot, best):
+            # Zmiana kabla / adaptera / firmware - negocjacja od nowa
+            store.forget(key)
+            best = None
+    supported = best is not None
+    if best is None:
+        for rate in rates:
+            if rate <= robot.link_baud:
+                continue
+            ok = switch(robot, rate)
+            supported = supported or ok is not None
+            if not ok:
+                break
+    # Stare firmware: bez zapamiętywania, po aktualizacji negocjacja ruszy sama
+    if store is not None and supported:
+        store.set(key, robot.link_baud)
+    print(f"Prędkość łącza: {robot.link_baud} baud "
+          f"(negocjacja {(time.monotonic() - start) * 1000:.0f} ms)")
+    return robot.link_baud
@@ -0,0 +1,116 @@
+"""
+Binary Protocol
+Zwarte ramki binarne (COBS + CRC-8) - opcjonalny tryb transmisji
+
+Ramka na łączu:  COBS([typ, dane..., crc8]) 0x00
+  - FRAME_TEXT: komenda/odpowiedź tekstowa bez '#' (np. "Kp 20|xxx|@7")
+  - FRAME_BEAM, FRAME_LINE: telemetria spakowana do int16 (struct)
+Tryb włącza komenda BIN_ON (odpowiedź ACK przychodzi jeszcze tekstowo),
+wyłącza BIN_OFF (odpowiedź przychodzi już binarnie).
+"""
+
+import struct
+
+FRAME_TEXT = 0x01
+FRAME_BEAM = 0x10   # RobotArduino.ino
+FRAME_LINE = 0x11   # LineFollowerPID.ino
+
+DELIMITER = b'\x00'
+
+# dist, error, output [x100]
+BEAM_STRUCT = struct.Struct('<hhh')
+# pos, error [x10000], output [x100], PWM L, PWM R, ENC_L, ENC_R
+LINE_STRUCT = struct.Struct('<Hhhhhhh')
+
+
+def _crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8 = _crc8_table()
+
+
+def crc8(data):
+    """CRC-8 (wielomian 0x07, start 0x00) - ta sama funkcja co w firmware"""
+    crc = 0
+    for b in data:
+        crc = _CRC8[crc ^ b]
+    return crc
+
+
+def cobs_encode(data):
+    out = bytearray(b'\x00')
+    code_idx = 0
+    code = 1
+    for b in data:
+        if b == 0:
+            out[code_idx] = code
+            code_idx = len(out)
+            out.append(0)
+            code = 1
+        else:
+            out.append(b)
+            code += 1
+            if code == 0xFF:
+                out[code_idx] = code
+                code_idx = len(out)
+                out.append(0)
+                code = 1
+    out[code_idx] = code
+    return bytes(out)
+
+
+def cobs_decode(data):
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n:
+            raise ValueError("Uszkodzona ramka COBS")
+        out += data[i + 1:i + code]
+        i += code
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def encode_frame(ftype, payload=b''):
+    raw = bytes((ftype,)) + payload
+    return cobs_encode(raw + bytes((crc8(raw),))) + DELIMITER
+
+
+def decode_frame(packet):
+    """Pakiet bez separatora -> (typ, dane); ValueError przy błędzie CRC/COBS"""
+    raw = cobs_decode(packet)
+    if len(raw) < 2 or crc8(raw[:-1]) != raw[-1]:
+        raise ValueError("Błędna suma CRC-8")
+    return raw[0], raw[1:-1]
+
+
+def encode_text(text):
+    return encode_frame(FRAME_TEXT, text.encode())
+
+
+def decode_telemetry(ftype, payload):
+    """Ramka telemetrii -> (rodzaj 'beam'/'line', krotka wartości)"""
+    if ftype == FRAME_BEAM:
+        dist, err, out = BEAM_STRUCT.unpack(payload)
+        return 'beam', (dist / 100.0, err / 100.0, out / 100.0)
+    if ftype == FRAME_LINE:
+        pos, err, out, l, r, enc_l, enc_r = LINE_STRUCT.unpack(payload)
+        return 'line', (pos, err / 10000.0, out / 100.0, l, r, enc_l, enc_r)
+    raise ValueError(f"Nieznany typ ramki: {ftype:#04x}")
+
+
+def format_telemetry(kind, values):
+    """Tekst w formacie telemetrii ASCII danego firmware"""
+    if kind == 'beam':
+        return "{:.2f} : {:.2f} : {:.2f}".format(*values)
+    return "POS:{} ERR:{:.3f} OUT:{:.2f} L:{} R:{} ENC_L:{} ENC_R:{}".format(*values)
@@ -0,0 +1,144 @@
+"""
+Fleet Manager
+Równoległe łączenie i konfiguracja wielu robotów naraz
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial.tools.list_ports
+
+from ArduinoRobotPython import RobotInterface
+from QuickPIDConfig import CONFIGS, config_commands
+
+# Górny limit równoległych połączeń
+MAX_WORKERS = 32
+
+
+class FleetManager:
+    def __init__(self, baudrate=9600, max_workers=MAX_WORKERS):
+        self.baudrate = baudrate
+        self.max_workers = max_workers
+        self.robots = {}    # port -> RobotInterface (tylko aktywne)
+
+    def discover(self):
+        """Lista wszystkich portów szeregowych w systemie"""
+        return [p.device for p in serial.tools.list_ports.comports()]
+
+    def _map(self, fn, items):
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+    def _connect_one(self, port):
+        robot = RobotInterface()
+        start = time.monotonic()
+        ok = robot.connect(port, self.baudrate) and robot.connected
+        latency = time.monotonic() - start
+        if not ok:
+            robot.disconnect()
+            return port, None, {'ok': False, 'latency': latency}
+        return port, robot, {'ok': True, 'latency': latency}
+
+    def connect_all(self, ports=None):
+        """Równoległe połączenie + PING; zwraca raport {port: {'ok', 'latency'}}"""
+        ports = self.discover() if ports is None else ports
+        report = {}
+        for port, robot, status in self._map(self._connect_one, ports):
+            report[port] = status
+            if robot:
+                self.robots[port] = robot
+        return report
+
+    def ping_all(self):
+        """Watchdog wszystkich robotów w puli; martwe są z niej usuwane"""
+        def ping(item):
+            port, robot = item
+            start = time.monotonic()
+            ok = bool(robot.send_command("PING", retries=1))
+            return port, {'ok': ok, 'latency': time.monotonic() - start}
+        report = dict(self._map(ping, list(self.robots.items())))
+        for port, status in report.items():
+            if not status['ok']:
+                self.robots.pop(port).disconnect()
+        return report
+
+    def push(self, cmds):
+        """Wysłanie tych samych komend do wszystkich robotów naraz.
+
+        Raport: {port: {'ok', 'acked', 'total', 'latency'}}"""
+        def send(item):
+            port, robot = item
+            start = time.monotonic()
+            responses = robot.send_batch(cmds)
+            acked = sum(1 for r in responses if r)
+            return port, {'ok': acked == len(cmds), 'acked': acked,
+                          'total': len(cmds), 'latency': time.monotonic() - start}
+        return dict(self._map(send, list(self.robots.items())))
+
+    def push_config(self, config):
+        """Preset z QuickPIDConfig.CONFIGS na wszystkie roboty"""
+        return self.push(config_commands(config))
+
+    def push_pid(self, kp=None, ki=None, kd=None, vmax=None):
+        """PID obu kół (i opcjonalnie VMAX) na wszystkie roboty"""
+        settings = (RobotInterface._pid_settings('L', kp, ki, kd) +
+                    RobotInterface._pid_settings('R', kp, ki, kd))
+        cmds = [cmd for cmd, _, _ in settings]
+        if vmax is not None:
+            cmds.append(f"VMAX {vmax}")
+        return self.push(cmds)
+
+    def close_all(self):
+        self._map(lambda robot: robot.disconnect(), list(self.robots.values()))
+        self.robots.clear()
+
+
+def print_report(report):
+    print(f"\n{'PORT':<24} {'STATUS':<8} {'ACK':<7} {'CZAS':>8}")
+    for port, status in sorted(report.items()):
+        acked = f"{status['acked']}/{status['total']}" if 'acked' in status else "-"
+        print(f"{port:<24} {'OK' if status['ok'] else 'BŁĄD':<8} {acked:<7} "
+              f"{status['latency'] * 1000:7.1f}ms")
+    ok = sum(1 for s in report.values() if s['ok'])
+    print(f"Razem: {ok}/{len(report)} OK")
+
+
+def main():
+    print("╔════════════════════════════════════════════════════════╗")
+    print("║         FLEET MANAGER - KONFIGURACJA WIELU ROBOTÓW      ║")
+    print("╚════════════════════════════════════════════════════════╝")
+
+    baudrate = input("Baudrate [9600]: ").strip()
+    fleet = FleetManager(int(baudrate) if baudrate else 9600)
+
+    print("\nWyszukiwanie robotów...")
+    report = fleet.connect_all()
+    print_report(report)
+    if not fleet.robots:
+        print("Brak aktywnych robotów")
+        return
+
+    while True:
+        print("\nKonfiguracje:")
+        for key, config in CONFIGS.items():
+            print(f"  {key} - {config['name']}")
+        print("  p - Ping wszystkich")
+        print("  q - Wyjście")
+        choice = input("\nWybór: ").strip().lower()
+        if choice == 'q':
+            break
+        elif choice in CONFIGS:
+            print_report(fleet.push_config(CONFIGS[choice]))
+        elif choice == 'p':
+            print_report(fleet.ping_all())
+        else:
+            print("Nieznana opcja")
+
+    fleet.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Fuzzy Controller
+Regulator rozmyty jazdy do ściany (Projekt 4) liczony na PC
+
+Wejścia: uchyb odległości e = dist - cel [cm] i jego pochodna de [cm/s]
+(de < 0 - robot zbliża się do ściany). Wyjście: zadana prędkość kół jako
+ułamek VMAX (-1..1, dodatnia - jazda w stronę ściany). Wnioskowanie
+Mamdaniego (AND = min, agregacja = max), wyostrzanie metodą środka ciężkości;
+funkcje przynależności i reguły liczone wektorowo w numpy dla całej siatki.
+
+Arduino nie liczy reguł: baza reguł jest kompilowana do gęstej tablicy
+n_e x n_de wartości int8 (LookupTable), wysyłanej kawałkami przez zwykły
+protokół ramek. W każdym cyklu firmware tylko interpoluje między czterema
+sąsiednimi komórkami tablicy:
+
+    FZ_DIM(n_e,n_de,e_min,e_max,de_min,de_max)  - wymiary i zakresy osi
+    FZ_LUT <offset> <hex>                       - kawałek tablicy (wierszami po e)
+    FZ_CRC <crc8>                               - kontrola całości -> FZ_READY
+    FZ_ON / FZ_OFF                              - regulator rozmyty / proporcjonalny
+
+    python FuzzyController.py --check
+    python FuzzyController.py --port COM3 --size 24 24 --on
+
+Wymaga: pip install numpy
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+import BinaryProtocol
+
+E_RANGE = (-40.0, 40.0)       # uchyb odległości [cm]
+DE_RANGE = (-60.0, 60.0)      # pochodna uchybu [cm/s]
+OUT_RANGE = (-1.0, 1.0)       # ułamek VMAX
+UNIVERSE_POINTS = 201         # dyskretyzacja wyjścia do środka ciężkości
+
+LUT_SIZE = (24, 24)           # komórek tablicy (e, de) - 576 B w SRAM Arduino
+LUT_MAX_CELLS = 576           # FZ_MAX_CELLS w WallApproachFuzzy.ino
+LUT_SCALE = 127               # wyjście 1.0 -> int8 127
+# 16 bajtów = 32 znaki hex. Najdłuższa ramka: "FZ_LUT 560 " (11) + 32 hex
+# + "|255" (4) + "|@9999" (6) + "#" (1) = 54 B; binarnie (typ, CRC-8, COBS,
+# 0x00) 57 B - mieści się w 64 B bufora RX Arduino
+LUT_CHUNK = 16
+# Jedna ramka w locie: dwie (2 x 54 = 108 B) przepełniłyby bufor RX, gdy
+# loop() firmware jest zajęty, a FZ_LUT nie ma sterowania przepływem.
+# Połowa kawałka też nie wystarcza (2 x 38 = 76 B), a 4-bajtowe kawałki
+# (2 x 30 B) to 144 ramki zamiast 36 - wolniej niż okno 1.
+LUT_WINDOW = 1
+
+# Terminy lingwistyczne: nazwa -> trapez (a, b, c, d); trójkąt ma b == c.
+# Skrajne terminy wychodzą poza zakres (wejście jest do niego przycinane).
+E_TERMS = {
+    'NB': (-80.0, -80.0, -30.0, -12.0),   # dużo za blisko
+    'NS': (-30.0, -12.0, -12.0, 0.0),
+    'Z': (-8.0, 0.0, 0.0, 8.0),
+    'PS': (0.0, 12.0, 12.0, 30.0),
+    'PB': (12.0, 30.0, 80.0, 80.0),       # daleko od celu
+}
+DE_TERMS = {
+    'N': (-120.0, -120.0, -30.0, 0.0),    # zbliża się
+    'Z': (-15.0, 0.0, 0.0, 15.0),
+    'P': (0.0, 30.0, 120.0, 120.0),       # oddala się
+}
+OUT_TERMS = {
+    'NB': (-1.0, -1.0, -1.0, -0.5),       # szybko do tyłu
+    'NS': (-0.8, -0.35, -0.35, 0.0),
+    'Z': (-0.2, 0.0, 0.0, 0.2),
+    'PS': (0.0, 0.35, 0.35, 0.8),
+    'PB': (0.5, 1.0, 1.0, 1.0),           # pełna prędkość do ściany
+}
+# RULES[e][de] -> termin wyjścia
+RULES = {
+    'NB': {'N': 'NB', 'Z': 'NB', 'P': 'NS'},
+    'NS': {'N': 'NS', 'Z': 'NS', 'P': 'Z'},
+    'Z': {'N': 'NS', 'Z': 'Z', 'P': 'PS'},
+    'PS': {'N': 'PS', 'Z': 'PS', 'P': 'PB'},
+    'PB': {'N': 'PB', 'Z': 'PB', 'P': 'PB'},
+}
+
+
+def trapmf(x, a, b, c, d):
+    """Przynależność trapezowa dla tablicy x (a == b / c == d - pionowe zbocze)"""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rise = np.where(b > a, (x - a) / (b - a), (x >= b).astype(float))
+        fall = np.where(d > c, (d - x) / (d - c), (x <= c).astype(float))
+    return np.clip(np.minimum(rise, fall), 0.0, 1.0)
+
+
+def memberships(x, terms):
+    """Tablica (liczba terminów, *x.shape) stopni przynależności"""
+    return np.stack([trapmf(x, *shape) for shape in terms.values()])
+
+
+class FuzzyController:
+    """Baza reguł + wektorowe wnioskowanie dla dowolnej liczby punktów (e, de)"""
+
+    def __init__(self, e_terms=E_TERMS, de_terms=DE_TERMS, out_terms=OUT_TERMS,
+                 rules=RULES, e_range=E_RANGE, de_range=DE_RANGE, out_range=OUT_RANGE,
+                 points=UNIVERSE_POINTS):
+        self.e_terms, self.de_terms, self.out_terms = e_terms, de_terms, out_terms
+        self.e_range, self.de_range = e_range, de_range
+        out_names = list(out_terms)
+        # Reguły jako maska (e, de, wyjście) - agregacja bez pętli po regułach
+        self.rule_mask = np.zeros((len(e_terms), len(de_terms), len(out_terms)), dtype=bool)
+        for i, e in enumerate(e_terms):
+            for j, de in enumerate(de_terms):
+                self.rule_mask[i, j, out_names.index(rules[e][de])] = True
+        self.universe = np.linspace(*out_range, points)
+        self.out_mf = memberships(self.universe, out_terms)        # (wyjścia, punkty)
+
+    def firing(self, e, de):
+        """Siła odpalenia każdego terminu wyjścia: (wyjścia, N)"""
+        mu_e = memberships(np.clip(e, *self.e_range), self.e_terms)       # (n_e, N)
+        mu_de = memberships(np.clip(de, *self.de_range), self.de_terms)   # (n_de, N)
+        strength = np.minimum(mu_e[:, None, :], mu_de[None, :, :])        # (n_e, n_de, N)
+        masked = np.where(self.rule_mask[..., None], strength[:, :, None, :], 0.0)
+        return masked.max(axis=(0, 1))
+
+    def evaluate(self, e, de):
+        """Wyjście (ułamek VMAX) dla tablic e, de dowolnego, zgodnego kształtu"""
+        e, de = np.broadcast_arrays(np.asarray(e, dtype=float), np.asarray(de, dtype=float))
+        shape = e.shape
+        firing = self.firing(e.ravel(), de.ravel())                       # (wyjścia, N)
+        # Ucięte terminy wyjścia, złożenie max -> (N, punkty)
+        aggregated = np.minimum(firing[:, :, None], self.out_mf[:, None, :]).max(axis=0)
+        area = aggregated.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.where(area > 0, aggregated @ self.universe / area, 0.0)
+        return out.reshape(shape)
+
+    def compile_lut(self, n_e=LUT_SIZE[0], n_de=LUT_SIZE[1]):
+        """Gęsta tablica n_e x n_de w węzłach siatki, kwantyzowana do int8"""
+        if n_e < 2 or n_de < 2 or n_e * n_de > LUT_MAX_CELLS:
+            raise ValueError(f"rozmiar tablicy 2..{LUT_MAX_CELLS} komórek, siatka co najmniej 2x2")
+        e_axis = np.linspace(*self.e_range, n_e)
+        de_axis = np.linspace(*self.de_range, n_de)
+        grid = self.evaluate(e_axis[:, None], de_axis[None, :])
+        table = np.clip(np.rint(grid * LUT_SCALE), -LUT_SCALE, LUT_SCALE).astype(np.int8)
+        return LookupTable(table, self.e_range, self.de_range)
+
+
+class LookupTable:
+    """Skompilowana baza reguł: int8 [n_e, n_de] + zakresy osi"""
+
+    def __init__(self, table, e_range, de_range):
+        self.table = np.ascontiguousarray(table, dtype=np.int8)
+        self.e_range, self.de_range = tuple(e_range), tuple(de_range)
+
+    @property
+    def shape(self):
+        return self.table.shape
+
+    @staticmethod
+    def _axis(x, low, high, n):
+        """Komórka i ułamek położenia między węzłami (przycięte do zakresu)"""
+        pos = np.clip((np.asarray(x, dtype=float) - low) * (n - 1) / (high - low), 0, n - 1)
+        i = np.minimum(pos.astype(int), n - 2)
+        return i, pos - i
+
+    def lookup(self, e, de):
+        """Wyjście jak na Arduino (ułamek VMAX): interpolacja dwuliniowa
+        z czterech sąsiednich komórek - stały koszt niezależnie od reguł"""
+        n_e, n_de = self.shape
+        i, fx = self._axis(e, *self.e_range, n_e)
+        j, fy = self._axis(de, *self.de_range, n_de)
+        t = self.table
+        value = ((1 - fx) * ((1 - fy) * t[i, j] + fy * t[i, j + 1]) +
+                 fx * ((1 - fy) * t[i + 1, j] + fy * t[i + 1, j + 1]))
+        return value / LUT_SCALE
+
+    def data(self):
+        return self.table.tobytes()
+
+    def crc(self):
+        return BinaryProtocol.crc8(self.data())
+
+    def commands(self, chunk=LUT_CHUNK):
+        """Komendy wysyłki: FZ_DIM, kawałki FZ_LUT, FZ_CRC"""
+        n_e, n_de = self.shape
+        (e0, e1), (d0, d1) = self.e_range, self.de_range
+        data = self.data()
+        cmds = [f"FZ_DIM({n_e},{n_de},{e0:g},{e1:g},{d0:g},{d1:g})"]
+        cmds += [f"FZ_LUT {pos} {data[pos:pos + chunk].hex().upper()}"
+                 for pos in range(0, len(data), chunk)]
+        cmds.append(f"FZ_CRC {self.crc()}")
+        return cmds
+
+    def error(self, controller, samples=20000, seed=0):
+        """Błąd tablicy (siatka + kwantyzacja) względem pełnego wnioskowania"""
+        rng = np.random.default_rng(seed)
+        e = rng.uniform(*self.e_range, samples)
+        de = rng.uniform(*self.de_range, samples)
+        diff = np.abs(self.lookup(e, de) - controller.evaluate(e, de))
+        return {'max': float(diff.max()), 'mean': float(diff.mean())}
+
+    def format_table(self):
+        n_e, n_de = self.shape
+        e_axis = np.linspace(*self.e_range, n_e)
+        lines = ["  e\\de " + " ".join(f"{v:4.0f}" for v in np.linspace(*self.de_range, n_de))]
+        for e, row in zip(e_axis, self.table):
+            lines.append(f"{e:6.1f} " + " ".join(f"{v:4d}" for v in row))
+        return "\n".join(lines)
+
+
+def push_lut(robot, lut, enable=False, retries=3):
+    """Wysłanie tablicy do robota; True, gdy firmware potwierdził FZ_READY"""
+    cmds = lut.commands()
+    responses = robot.send_batch(cmds, retries=retries, window=LUT_WINDOW)
+    failed = [cmd.split(' ')[0].split('(')[0] for cmd, r in zip(cmds, responses) if not r]
+    if failed or "FZ_READY" not in (responses[-1] or ""):
+        reason = f"brak odpowiedzi na {len(failed)} ramek" if failed else responses[-1]
+        print(f"✗ Tablica rozmyta nie przyjęta ({reason})")
+        return False
+    print(f"✓ Tablica rozmyta {lut.shape[0]}x{lut.shape[1]} wysłana "
+          f"({len(cmds)} ramek, CRC {lut.crc()})")
+    if enable:
+        return bool(robot.send_command("FZ_ON"))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regulator rozmyty jazdy do ściany - tablica dla Arduino")
+    parser.add_argument("--size", nargs=2, type=int, default=LUT_SIZE, metavar=("N_E", "N_DE"))
+    parser.add_argument("--check", action="store_true", help="błąd tablicy względem wnioskowania")
+    parser.add_argument("--show", action="store_true", help="wypisanie tablicy")
+    parser.add_argument("--port", help="wysłanie tablicy do robota")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--on", action="store_true", help="po wysłaniu włącz regulator (FZ_ON)")
+    args = parser.parse_args()
+
+    controller = FuzzyController()
+    try:
+        lut = controller.compile_lut(*args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Tablica {lut.shape[0]}x{lut.shape[1]}, {lut.table.nbytes} B, CRC {lut.crc()}, "
+          f"{len(lut.commands())} ramek")
+    if args.show:
+        print(lut.format_table())
+    if args.check:
+        err = lut.error(controller)
+        print(f"Błąd tablicy: maks. {err['max'] * 100:.1f}% VMAX, średnio {err['mean'] * 100:.2f}% VMAX")
+    if args.port:
+        from ArduinoRobotPython import RobotInterface
+        robot = RobotInterface()
+        if not robot.connect(args.port, args.baud):
+            return 3
+        try:
+            if not push_lut(robot, lut, enable=args.on):
+                return 1
+        finally:
+            robot.disconnect()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -50,6 +50,23 @@ unsigned long lastPIDTime = 0;
 // Stan robota
 bool lineFollowMode = false;
 String inputBuffer = "";
+String seqTag = "";  // "|@<seq>" z ostatniej ramki, odsyłany w odpowiedzi
+
+// Tryb binarny: COBS([typ, dane..., crc8]) + 0x00 (BinaryProtocol.py)
+#define FRAME_TEXT 0x01
+#define FRAME_LINE 0x11
+#define BIN_BUFFER_SIZE 72
+bool binaryMode = false;
+uint8_t binBuffer[BIN_BUFFER_SIZE];
+uint8_t binLen = 0;
+
+// Zmiana prędkości łącza (BaudNegotiation.py): BAUD <r> -> ACK jeszcze na starej
+// prędkości, przełączenie; BAUD_OK na nowej zatwierdza, bez niego po
+// BAUD_CONFIRM_MS powrót do poprzedniej - nieudana próba nie zrywa łącza
+#define BAUD_CONFIRM_MS 1000
+long baudRate = SERIAL_BAUD_RATE;
+long previousBaud = 0;  // != 0 - nowa prędkość czeka na BAUD_OK
+unsigned long baudSwitchTime = 0;
 
 // Telemetria
 bool telemetryEnabled = false;
@@ -93,12 +110,95 @@ int calculateChecksum(String cmd) {
   return sum % 256;
 }
 
-// Wysyłanie odpowiedzi
+// Numer sekwencyjny ramki (CMD|checksum|@seq) - pusty dla starych klientów
+String extractSeq(String frame) {
+  int at = frame.indexOf("|@");
+  if (at == -1) return "";
+  return frame.substring(at);
+}
+
+// ========================= TRYB BINARNY =========================
+
+uint8_t crc8(const uint8_t* data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+int16_t clamp16(float v) {
+  if (v > 32767.0) return 32767;
+  if (v < -32768.0) return -32768;
+  return (int16_t)v;
+}
+
+// Wysłanie ramki: COBS([typ, dane..., crc8]) + 0x00
+void sendFrame(uint8_t type, const uint8_t* data, uint8_t len) {
+  uint8_t raw[BIN_BUFFER_SIZE];
+  uint8_t out[BIN_BUFFER_SIZE + 2];
+  if (len > BIN_BUFFER_SIZE - 2) len = BIN_BUFFER_SIZE - 2;
+  raw[0] = type;
+  memcpy(raw + 1, data, len);
+  raw[len + 1] = crc8(raw, len + 1);
+
+  uint8_t codeIdx = 0, code = 1, o = 1;
+  for (uint8_t i = 0; i < len + 2; i++) {
+    if (raw[i] == 0) {
+      out[codeIdx] = code;
+      codeIdx = o++;
+      code = 1;
+    } else {
+      out[o++] = raw[i];
+      code++;
+    }
+  }
+  out[codeIdx] = code;
+  Serial.write(out, o);
+  Serial.write((uint8_t)0);
+}
+
+// Dekodowanie COBS w miejscu; zwraca długość lub 0 przy błędzie
+uint8_t cobsDecode(uint8_t* buf, uint8_t len) {
+  uint8_t i = 0, o = 0;
+  while (i < len) {
+    uint8_t code = buf[i++];
+    if (code == 0 || i + code - 1 > len) return 0;
+    for (uint8_t k = 1; k < code; k++) buf[o++] = buf[i++];
+    if (code < 0xFF && i < len) buf[o++] = 0;
+  }
+  return o;
+}
+
+bool baudAllowed(long rate) {
+  return rate == 9600 || rate == 19200 || rate == 38400 || rate == 57600 ||
+         rate == 115200 || rate == 250000 || rate == 500000;
+}
+
+void switchBaud(long rate) {
+  Serial.flush();  // ACK musi wyjść na starej prędkości
+  Serial.end();
+  Serial.begin(rate);
+  baudRate = rate;
+  inputBuffer = "";
+  binLen = 0;
+}
+
+// Wysyłanie odpowiedzi (z echem numeru sekwencyjnego)
 void sendResponse(String response) {
   int checksum = calculateChecksum(response);
+  if (binaryMode) {
+    String text = response + "|" + String(checksum) + seqTag;
+    sendFrame(FRAME_TEXT, (const uint8_t*)text.c_str(), text.length());
+    return;
+  }
   Serial.print(response);
   Serial.print("|");
   Serial.print(checksum);
+  Serial.print(seqTag);
   Serial.println("#");
 }
 
@@ -202,7 +302,17 @@ void computePID() {
   setMotors(leftPWM, rightPWM);
   
   // Telemetria
-  if (telemetryEnabled && (millis() - lastTelemetryTime) >= TELEMETRY_INTERVAL) {
+  if (telemetryEnabled && binaryMode && (millis() - lastTelemetryTime) >= TELEMETRY_INTERVAL) {
+    int16_t packed[7] = {(int16_t)position, clamp16(error * 10000), clamp16(output * 100),
+                         (int16_t)leftPWM, (int16_t)rightPWM,
+                         (int16_t)left_encoder_count, (int16_t)right_encoder_count};
+    sendFrame(FRAME_LINE, (uint8_t*)packed, sizeof(packed));
+
+    left_encoder_count = 0;
+    right_encoder_count = 0;
+    lastTelemetryTime = millis();
+  }
+  else if (telemetryEnabled && (millis() - lastTelemetryTime) >= TELEMETRY_INTERVAL) {
     Serial.print("POS:");
     Serial.print(position);
     Serial.print(" ERR:");
@@ -330,11 +440,43 @@ void parseCommand(String frame) {
     sendResponse("ACK|CALIBRATION_DONE");
   }
   
+  // BIN_ON / BIN_OFF - przełączenie trybu ramek
+  else if (cmd == "BIN_ON") {
+    sendResponse("ACK|BIN_ON");   // potwierdzenie jeszcze tekstowo
+    binaryMode = true;
+    binLen = 0;
+  }
+  else if (cmd == "BIN_OFF") {
+    sendResponse("ACK|BIN_OFF");  // potwierdzenie już binarnie
+    binaryMode = false;
+    inputBuffer = "";
+  }
+  
   // PING - test połączenia
   else if (cmd == "PING") {
     sendResponse("ACK|PONG");
   }
   
+  // BAUD <prędkość> / BAUD_OK / ECHO <tekst> - negocjacja prędkości łącza
+  else if (cmd.startsWith("BAUD ")) {
+    long rate = cmd.substring(5).toInt();
+    if (!baudAllowed(rate)) {
+      sendResponse("NACK|BAD_BAUD");
+    } else {
+      sendResponse("ACK|BAUD=" + String(rate));
+      if (previousBaud == 0) previousBaud = baudRate;
+      baudSwitchTime = millis();
+      switchBaud(rate);
+    }
+  }
+  else if (cmd == "BAUD_OK") {
+    previousBaud = 0;
+    sendResponse("ACK|BAUD_OK=" + String(baudRate));
+  }
+  else if (cmd.startsWith("ECHO ")) {
+    sendResponse("ACK|ECHO=" + cmd.substring(5));
+  }
+  
   // READ_LINE - odczyt pozycji linii
   else if (cmd == "READ_LINE") {
     unsigned int position = trs.readLine(sensorValues);
@@ -347,6 +489,34 @@ void parseCommand(String frame) {
   }
 }
 
+// Obsługa kompletnej ramki CMD|checksum[|@seq]
+void handleFrame(String frame) {
+  seqTag = extractSeq(frame);
+  if (validateFrame(frame)) {
+    parseCommand(frame);
+  } else {
+    sendResponse("NACK|BAD_CHECKSUM");
+  }
+  seqTag = "";
+}
+
+// Bajt w trybie binarnym - ramka kończy się na 0x00
+void handleBinaryByte(uint8_t c) {
+  if (c != 0) {
+    if (binLen < BIN_BUFFER_SIZE) binBuffer[binLen] = c;
+    if (binLen <= BIN_BUFFER_SIZE) binLen++;   // nasycenie: za długa ramka nie zawija uint8_t
+    return;
+  }
+  uint8_t n = (binLen <= BIN_BUFFER_SIZE) ? cobsDecode(binBuffer, binLen) : 0;
+  binLen = 0;
+  if (n < 2 || crc8(binBuffer, n - 1) != binBuffer[n - 1] || binBuffer[0] != FRAME_TEXT) {
+    sendResponse("NACK|BAD_CHECKSUM");
+    return;
+  }
+  binBuffer[n - 1] = 0;  // CRC -> terminator napisu
+  handleFrame(String((char*)(binBuffer + 1)));
+}
+
 // ========================= SETUP =========================
 
 void setup() {
@@ -381,15 +551,19 @@ void setup() {
 void loop() {
   unsigned long currentTime = millis();
   
+  // Nowa prędkość niezatwierdzona przez BAUD_OK - powrót do poprzedniej
+  if (previousBaud != 0 && currentTime - baudSwitchTime >= BAUD_CONFIRM_MS) {
+    switchBaud(previousBaud);
+    previousBaud = 0;
+  }
+  
   // Nieblokująca obsługa komunikacji szeregowej
   while (Serial.available()) {
     char c = Serial.read();
-    if (c == '#') {
-      if (validateFrame(inputBuffer)) {
-        parseCommand(inputBuffer);
-      } else {
-        sendResponse("NACK|BAD_CHECKSUM");
-      }
+    if (binaryMode) {
+      handleBinaryByte((uint8_t)c);
+    } else if (c == '#') {
+      handleFrame(inputBuffer);
       inputBuffer = "";
     } else if (c != '\r' && c != '\n') {
       inputBuffer += c;
@@ -0,0 +1,262 @@
+"""
+Link Metrics
+Liczniki i histogramy łącza szeregowego (RTT, ponowienia, NACK, telemetria)
+
+Histogram RTT jest log-liniowy jak HdrHistogram: kubełki o stałej
+względnej szerokości (~3%), więc percentyle od 100 µs do sekund kosztują
+jeden słownik liczników na typ komendy.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+HIST_SUB_BITS = 5           # 32 kubełki na oktawę -> błąd względny ~3%
+RATE_WINDOW = 256           # linii telemetrii do liczenia bieżącej częstotliwości
+GAP_FACTOR = 1.8            # przerwa > GAP_FACTOR * typowy odstęp -> zgubione linie
+GAP_LIMIT = 10.0            # dłuższa przerwa to wyłączona telemetria, nie straty
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def command_type(cmd):
+    """'KP_L 2.0' -> 'KP_L', 'CFG(KP=1)' -> 'CFG'"""
+    return cmd.split(' ', 1)[0].split('(', 1)[0]
+
+
+class RttHistogram:
+    """Histogram czasów [µs] w kubełkach log-liniowych"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _bucket(us):
+        shift = max(0, us.bit_length() - HIST_SUB_BITS)
+        return (us >> shift) << shift, 1 << shift   # dolna granica, szerokość
+
+    def record(self, seconds):
+        us = max(0, int(seconds * 1e6))
+        low, _ = self._bucket(us)
+        self.counts[low] = self.counts.get(low, 0) + 1
+        self.count += 1
+        self.total += us
+        self.min = us if self.min is None else min(self.min, us)
+        self.max = us if self.max is None else max(self.max, us)
+
+    def percentile(self, p):
+        """Wartość [s] poniżej której jest p% próbek (środek kubełka)"""
+        if not self.count:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for low in sorted(self.counts):
+            seen += self.counts[low]
+            if seen >= rank:
+                _, width = self._bucket(low)
+                return min(low + width / 2, self.max) / 1e6
+        return self.max / 1e6
+
+    def mean(self):
+        return self.total / self.count / 1e6 if self.count else None
+
+    def cumulative(self):
+        """(górna granica [s], liczba próbek <= granica) dla kolejnych kubełków"""
+        seen = 0
+        for low in sorted(self.counts):
+            seen += self.counts[low]
+            _, width = self._bucket(low)
+            yield (low + width) / 1e6, seen
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        out = {'count': self.count, 'mean': self.mean(),
+               'min': self.min / 1e6, 'max': self.max / 1e6}
+        for p in PERCENTILES:
+            out[f'p{p:g}'] = self.percentile(p)
+        return out
+
+
+class CommandStats:
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.nacked = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.rtt = RttHistogram()
+
+
+class LinkMetrics:
+    """Metryki jednego łącza; metody on_* wołane z warstwy ramek"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.commands = {}
+        self.bad_checksum = 0       # NACK|BAD_CHECKSUM od firmware
+        self.bad_packets = 0        # odebrane ramki binarne z błędną CRC/COBS
+        self.telemetry_lines = 0
+        self.dropped_estimate = 0   # luki w strumieniu telemetrii
+        self.queue_drops = {}       # linie wyrzucone z pełnych kolejek
+        self._arrivals = deque(maxlen=RATE_WINDOW)
+        self._interval = None       # średni odstęp linii telemetrii (EWMA)
+        self._lock = threading.Lock()
+
+    def _command(self, cmd):
+        name = command_type(cmd)
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+
+    # ----------------------------- zdarzenia -----------------------------
+
+    def on_send(self, cmd):
+        with self._lock:
+            self._command(cmd).sent += 1
+
+    def on_retry(self, cmd):
+        with self._lock:
+            self._command(cmd).retries += 1
+
+    def on_timeout(self, cmd):
+        with self._lock:
+            self._command(cmd).timeouts += 1
+
+    def on_reply(self, cmd, frame, rtt):
+        with self._lock:
+            stats = self._command(cmd)
+            stats.rtt.record(rtt)
+            if frame.startswith("ACK"):
+                stats.acked += 1
+            else:
+                stats.nacked += 1
+                if "BAD_CHECKSUM" in frame:
+                    self.bad_checksum += 1
+
+    def on_bad_packet(self):
+        self.bad_packets += 1
+
+    def on_queue_drop(self, name):
+        self.queue_drops[name] = self.queue_drops.get(name, 0) + 1
+
+    def on_telemetry(self):
+        now = time.monotonic()
+        self.telemetry_lines += 1
+        if self._arrivals:
+            gap = now - self._arrivals[-1]
+            if self._interval is None:
+                self._interval = gap
+            elif GAP_FACTOR * self._interval < gap < GAP_LIMIT * self._interval:
+                self.dropped_estimate += int(round(gap / self._interval)) - 1
+            else:
+                self._interval += 0.05 * (gap - self._interval)
+        self._arrivals.append(now)
+
+    # ----------------------------- odczyt -----------------------------
+
+    def telemetry_rate(self):
+        """Bieżąca częstotliwość linii telemetrii [1/s]"""
+        if len(self._arrivals) < 2:
+            return 0.0
+        span = self._arrivals[-1] - self._arrivals[0]
+        return (len(self._arrivals) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        with self._lock:
+            commands = {name: {'sent': s.sent, 'acked': s.acked, 'nacked': s.nacked,
+                               'retries': s.retries, 'timeouts': s.timeouts,
+                               'rtt': s.rtt.summary()}
+                        for name, s in sorted(self.commands.items())}
+        return {
+            'uptime': time.monotonic() - self.started,
+            'commands': commands,
+            'bad_checksum': self.bad_checksum,
+            'bad_packets': self.bad_packets,
+            'telemetry': {
+                'lines': self.telemetry_lines,
+                'rate': self.telemetry_rate(),
+                'dropped_estimate': self.dropped_estimate,
+                'queue_drops': dict(self.queue_drops),
+            },
+        }
+
+    def format_report(self):
+        s = self.stats()
+        ms = lambda v: "-" if v is None else f"{v * 1000:.1f}"
+        lines = [f"=== METRYKI ŁĄCZA ({s['uptime']:.0f}s) ===",
+                 f"{'komenda':<14}{'wysł':>6}{'ACK':>6}{'NACK':>6}{'ponow':>6}{'timeout':>8}"
+                 f"{'p50':>8}{'p99':>8}{'max':>8}  [ms]"]
+        for name, c in s['commands'].items():
+            rtt = c['rtt']
+            lines.append(f"{name:<14}{c['sent']:>6}{c['acked']:>6}{c['nacked']:>6}"
+                         f"{c['retries']:>6}{c['timeouts']:>8}{ms(rtt.get('p50')):>8}"
+                         f"{ms(rtt.get('p99')):>8}{ms(rtt.get('max')):>8}")
+        t = s['telemetry']
+        lines.append(f"NACK|BAD_CHECKSUM: {s['bad_checksum']}, błędne ramki binarne: {s['bad_packets']}")
+        lines.append(f"Telemetria: {t['lines']} linii, {t['rate']:.1f}/s, "
+                     f"zgubione (szac.): {t['dropped_estimate']}, "
+                     f"wyrzucone z kolejek: {sum(t['queue_drops'].values())}")
+        return "\n".join(lines)
+
+    def prometheus_text(self, labels=None):
+        """Metryki w formacie tekstowym Prometheus (node_exporter textfile)"""
+        base = ",".join(f'{k}="{v}"' for k, v in (labels or {}).items())
+
+        def lbl(extra=""):
+            joined = ",".join(x for x in (base, extra) if x)
+            return "{" + joined + "}" if joined else ""
+
+        out = []
+
+        def metric(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            commands = [('cmd="%s"' % name, c) for name, c in sorted(self.commands.items())]
+            metric("robot_commands_total", "counter", "Wysłane ramki komend")
+            for cmd_label, c in commands:
+                out.append(f"robot_commands_total{lbl(cmd_label)} {c.sent}")
+            for field, help_text in (("acked", "Potwierdzenia ACK"), ("nacked", "Odpowiedzi NACK"),
+                                     ("retries", "Ponowienia"), ("timeouts", "Przekroczenia czasu")):
+                metric(f"robot_command_{field}_total", "counter", help_text)
+                for cmd_label, c in commands:
+                    out.append(f"robot_command_{field}_total{lbl(cmd_label)} {getattr(c, field)}")
+            metric("robot_command_rtt_seconds", "histogram", "Czas odpowiedzi na komendę")
+            for cmd_label, c in commands:
+                for upper, seen in c.rtt.cumulative():
+                    le = 'le="%.6f"' % upper
+                    out.append(f"robot_command_rtt_seconds_bucket{lbl(cmd_label + ',' + le)} {seen}")
+                le = 'le="+Inf"'
+                out.append(f"robot_command_rtt_seconds_bucket{lbl(cmd_label + ',' + le)} {c.rtt.count}")
+                out.append(f"robot_command_rtt_seconds_sum{lbl(cmd_label)} {c.rtt.total / 1e6:.6f}")
+                out.append(f"robot_command_rtt_seconds_count{lbl(cmd_label)} {c.rtt.count}")
+        metric("robot_bad_checksum_total", "counter", "NACK|BAD_CHECKSUM od firmware")
+        out.append(f"robot_bad_checksum_total{lbl()} {self.bad_checksum}")
+        metric("robot_bad_packets_total", "counter", "Błędne ramki binarne")
+        out.append(f"robot_bad_packets_total{lbl()} {self.bad_packets}")
+        metric("robot_telemetry_lines_total", "counter", "Odebrane linie telemetrii")
+        out.append(f"robot_telemetry_lines_total{lbl()} {self.telemetry_lines}")
+        metric("robot_telemetry_rate", "gauge", "Bieżąca częstotliwość telemetrii [1/s]")
+        out.append(f"robot_telemetry_rate{lbl()} {self.telemetry_rate():.3f}")
+        metric("robot_telemetry_dropped_estimate_total", "counter", "Szacunek zgubionych linii")
+        out.append(f"robot_telemetry_dropped_estimate_total{lbl()} {self.dropped_estimate}")
+        metric("robot_queue_drops_total", "counter", "Linie wyrzucone z pełnych kolejek")
+        for name, count in sorted(self.queue_drops.items()):
+            queue_label = 'queue="%s"' % name
+            out.append(f"robot_queue_drops_total{lbl(queue_label)} {count}")
+        return "\n".join(out) + "\n"
+
+    def dump_prometheus(self, path, labels=None):
+        """Atomowy zapis pliku .prom (plik tymczasowy + zamiana)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(labels))
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,176 @@
+"""
+Link Supervisor
+Automatyczne wznawianie sesji po zerwaniu łącza USB / Bluetooth
+
+Nadzorca wykrywa utratę łącza (błąd portu albo brak odpowiedzi na PING),
+otwiera port ponownie, przywraca nastawy z lokalnej kopii (ParameterCache)
+i dopiero potem wysyła komendy, które czekały w kolejce w czasie awarii.
+
+    robot = RobotInterface()
+    robot.connect("COM3")
+    LinkSupervisor(robot).start()
+
+Komunikaty nadzorcy (PING bez odpowiedzi, wznawianie) idą do logu sesji
+jako wpisy "LINK: ...", a liczniki - do robot.stats()['supervisor'], żeby
+nie wpadały w prompt interfejsu.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+HEARTBEAT = 2.0             # PING, gdy od tylu sekund nic nie przyszło [s]
+MAX_MISSED = 2              # kolejne PING bez odpowiedzi -> łącze zerwane
+RECONNECT_MIN = 0.2         # pierwszy odstęp między próbami połączenia [s]
+RECONNECT_MAX = 10.0        # maks. odstęp (wykładniczy z losowaniem) [s]
+
+# Komendy blokujące loop() firmware (bez odpowiedzi na PING) -> czas [s];
+# heartbeat czeka tyle plus bieżący RTO od wysłania takiej komendy
+BUSY_COMMANDS = {'CALIBRATE': 5.1}     # LineFollowerPID.ino: 100 ms + 5 s kalibracji
+
+
+class LinkSupervisor:
+    """Wątek pilnujący łącza jednego RobotInterface"""
+
+    def __init__(self, robot, heartbeat=HEARTBEAT, max_missed=MAX_MISSED, queue_timeout=None):
+        self.robot = robot
+        self.heartbeat = heartbeat
+        self.max_missed = max_missed
+        self.queue_timeout = queue_timeout      # None - czekaj do skutku
+        self.outage = False
+        self.reconnects = 0
+        self.replayed = 0
+        self.heartbeats = 0
+        self.missed = 0
+        self.suspended = 0          # heartbeaty pominięte w czasie komend z BUSY_COMMANDS
+        self._busy_until = 0.0
+        self.thread = None
+        self._lost = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = deque()     # [komendy, argumenty send_batch, Event, wyniki]
+        robot.supervisor = self
+
+    def start(self):
+        self._stop.clear()
+        if self._on_log not in self.robot.log_hooks:
+            self.robot.log_hooks.append(self._on_log)
+        self.thread = threading.Thread(target=self._run, name="link-supervisor", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._lost.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+        if self._on_log in self.robot.log_hooks:
+            self.robot.log_hooks.remove(self._on_log)
+        self.robot.supervisor = None
+
+    def _on_log(self, t_ns, msg):
+        """Hook logu: wysłanie komendy z BUSY_COMMANDS wstrzymuje heartbeat"""
+        if not msg.startswith("TX: "):
+            return
+        busy = BUSY_COMMANDS.get(msg[4:].split('|', 1)[0].split(' ', 1)[0])
+        if busy:
+            self._busy_until = max(self._busy_until, t_ns / 1e9 + busy + self.robot.timeout)
+
+    def _note(self, text):
+        self.robot.log_message(f"LINK: {text}")
+
+    def stats(self):
+        return {'outage': self.outage, 'reconnects': self.reconnects,
+                'replayed': self.replayed, 'heartbeats': self.heartbeats,
+                'missed': self.missed, 'suspended': self.suspended}
+
+    def notify_lost(self):
+        """Wołane przez RobotInterface po błędzie portu"""
+        with self._lock:
+            self.outage = True
+        self._lost.set()
+
+    def submit(self, cmds, **kwargs):
+        """Komendy wysłane w czasie awarii: kolejka do wysłania po wznowieniu"""
+        entry = [cmds, kwargs, threading.Event(), None]
+        with self._lock:
+            if not self.outage:
+                entry = None
+            else:
+                self._pending.append(entry)
+        if entry is None:
+            return self.robot.send_batch(cmds, **kwargs)
+        if not entry[2].wait(self.queue_timeout):
+            with self._lock:
+                if entry in self._pending:
+                    self._pending.remove(entry)
+            return [None] * len(cmds)
+        return entry[3]
+
+    # ----------------------------- wątek -----------------------------
+
+    def _run(self):
+        missed = 0
+        while not self._stop.is_set():
+            if self._lost.wait(self.heartbeat / 2):
+                if self._stop.is_set():
+                    break
+                self._recover()
+                missed = 0
+                continue
+            robot = self.robot
+            now = time.monotonic()
+            if now - robot.last_rx < self.heartbeat:
+                continue
+            if now < self._busy_until:
+                # Firmware zajęte (np. CALIBRATE) - cisza na łączu to nie awaria
+                self.suspended += 1
+                missed = 0
+                continue
+            if not robot.try_lock_send():
+                continue
+            try:
+                self.heartbeats += 1
+                ok = robot.send_command("PING", retries=1) is not None
+            finally:
+                robot.unlock_send()
+            if not ok and time.monotonic() < self._busy_until:
+                continue    # komenda blokująca wysłana w trakcie PING
+            missed = 0 if ok else missed + 1
+            if not ok:
+                self.missed += 1
+                self._note(f"PING bez odpowiedzi ({missed}/{self.max_missed})")
+            if missed >= self.max_missed:
+                robot.link_lost("brak odpowiedzi na PING")
+
+    def _recover(self):
+        robot = self.robot
+        delay = RECONNECT_MIN
+        while not self._stop.is_set():
+            self._lost.clear()
+            self._note(f"ponowne łączenie z {robot.port}")
+            if robot.reconnect():
+                break
+            self._stop.wait(random.uniform(delay / 2, delay))
+            delay = min(RECONNECT_MAX, delay * 2)
+        if self._stop.is_set():
+            return
+        self.reconnects += 1
+        restore = robot.params.restore_commands()
+        if restore and not all(robot.send_batch(restore)):
+            self._note("nie wszystkie nastawy zostały przywrócone")
+        # Kolejka z czasu awarii, w kolejności zgłoszeń
+        while not self._lost.is_set():
+            with self._lock:
+                if not self._pending:
+                    self.outage = False
+                    break
+                entry = self._pending.popleft()
+            cmds, kwargs, done, _ = entry
+            entry[3] = robot.send_batch(cmds, **kwargs)
+            self.replayed += 1
+            done.set()
+        if not self.outage:
+            self._note(f"sesja wznowiona (przywrócono {len(restore)} nastaw)")
@@ -0,0 +1,258 @@
+"""
+Live Plot
+Wykresy telemetrii na żywo z bufora TelemetryRing
+
+Wątek czytający zapisuje rekordy do bufora, a wykres co klatkę (stałe FPS)
+pobiera tylko nowe rekordy (read_since) i rysuje okno ostatnich sekund
+zdziesiątkowane min/max do MAX_POINTS punktów. Wolne rysowanie gubi klatki,
+nie dane - odczyt z portu nigdy na nie nie czeka.
+
+Użycie:
+  python LivePlot.py --port COM3 --window 10
+  python LivePlot.py --port "sim://line?speed=1" --start TELEMETRY_ON --start P --png wykres.png --duration 30
+  python LivePlot.py --port sim://beam --start TEST_START
+  python LivePlot.py --shared            # telemetria z SharedTelemetry (bez portu)
+
+Wymaga: pip install numpy matplotlib
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from TelemetryBuffer import KIND_BEAM, KIND_LINE, TELEMETRY_DTYPE, add_start_argument, start_telemetry
+
+WINDOW = 10.0           # szerokość okna wykresu [s]
+FPS = 20                # maks. częstotliwość odświeżania
+MAX_POINTS = 2000       # punktów na serię po dziesiątkowaniu
+SNAPSHOT_INTERVAL = 1.0 # co ile sekund zapis PNG w trybie bez okna
+
+# Panele wykresu: (tytuł, [(pole, etykieta)])
+PANELS = {
+    KIND_BEAM: [
+        ("Odległość [cm]", [('dist', 'dist')]),
+        ("Uchyb [cm]", [('err', 'err')]),
+        ("Wyjście", [('out', 'out')]),
+    ],
+    KIND_LINE: [
+        ("Pozycja linii", [('pos', 'POS')]),
+        ("Uchyb", [('err', 'ERR')]),
+        ("Wyjście PID", [('out', 'OUT')]),
+        ("PWM", [('pwm_l', 'L'), ('pwm_r', 'R')]),
+        ("Enkodery", [('enc_l', 'ENC_L'), ('enc_r', 'ENC_R')]),
+    ],
+}
+
+
+def minmax_decimate(t, y, max_points=MAX_POINTS):
+    """Dziesiątkowanie zachowujące szpilki: min i max z każdego kubełka"""
+    n = len(t)
+    if n <= max_points:
+        return t, y
+    bucket = -(-n // (max_points // 2))
+    usable = n - n % bucket
+    rows = y[:usable].reshape(-1, bucket)
+    base = np.arange(0, usable, bucket)
+    lo = base + rows.argmin(axis=1)
+    hi = base + rows.argmax(axis=1)
+    idx = np.sort(np.concatenate((lo, hi)))
+    if usable < n:
+        idx = np.append(idx, n - 1)
+    return t[idx], y[idx]
+
+
+class PlotWindow:
+    """Okno ostatnich `window` sekund telemetrii, zasilane z TelemetryRing"""
+
+    def __init__(self, ring, window=WINDOW):
+        self.ring = ring
+        self.window = window
+        self.seq = max(0, ring.count - ring.capacity)
+        self.data = np.zeros(0, dtype=TELEMETRY_DTYPE)
+        self.dropped = 0
+
+    def update(self):
+        """Pobranie nowych rekordów; True, jeśli coś przybyło"""
+        records, self.seq, dropped = self.ring.read_since(self.seq)
+        self.dropped += dropped
+        if not len(records):
+            return False
+        data = np.concatenate((self.data, records)) if len(self.data) else records
+        self.data = data[data['t'] >= data['t'][-1] - self.window]
+        return True
+
+    @property
+    def kind(self):
+        return int(self.data['kind'][-1]) if len(self.data) else None
+
+    def series(self, field, max_points=MAX_POINTS):
+        """(czas względem ostatniej próbki, wartości) jednej serii"""
+        data = self.data[self.data['kind'] == self.kind]
+        if not len(data):
+            return np.zeros(0), np.zeros(0)
+        t = data['t'] - data['t'][-1]
+        return minmax_decimate(t, data[field].astype('f8'), max_points)
+
+
+class LivePlot:
+    """Rysowanie PlotWindow w stałym tempie; okno matplotlib albo pliki PNG"""
+
+    def __init__(self, ring, window=WINDOW, fps=FPS, max_points=MAX_POINTS, headless=False):
+        import matplotlib
+        if headless:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.view = PlotWindow(ring, window)
+        self.period = 1.0 / fps
+        self.max_points = max_points
+        self.headless = headless
+        self.frames = 0
+        self.skipped = 0
+        self.fig = None
+        self._lines = {}
+        self._kind = None
+
+    def _layout(self, kind):
+        """Nowe panele przy pierwszej próbce lub zmianie rodzaju telemetrii"""
+        if self.fig is None:
+            self.fig = self.plt.figure(figsize=(10, 7))
+        self.fig.clear()
+        self._lines = {}
+        panels = PANELS[kind]
+        axes = np.atleast_1d(self.fig.subplots(len(panels), 1, sharex=True))
+        for ax, (title, fields) in zip(axes, panels):
+            ax.set_title(title, fontsize=9, loc='left')
+            ax.set_xlim(-self.view.window, 0)
+            ax.grid(True, alpha=0.3)
+            for field, label in fields:
+                (line,) = ax.plot([], [], lw=1, label=label)
+                self._lines[field] = (ax, line)
+            if len(fields) > 1:
+                ax.legend(loc='upper left', fontsize=8)
+        axes[-1].set_xlabel("czas [s]")
+        self.fig.tight_layout()
+        self._kind = kind
+
+    def draw(self):
+        """Jedna klatka; False, gdy nie ma jeszcze danych"""
+        self.view.update()
+        kind = self.view.kind
+        if kind not in PANELS:
+            return False
+        if kind != self._kind:
+            self._layout(kind)
+        for field, (ax, line) in self._lines.items():
+            line.set_data(*self.view.series(field, self.max_points))
+        for ax in {ax for ax, _ in self._lines.values()}:
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        self.frames += 1
+        return True
+
+    def snapshot(self, path):
+        if self.draw():
+            self.fig.savefig(path, dpi=100)
+            return True
+        return False
+
+    def run(self, seconds=0, png=None, interval=SNAPSHOT_INTERVAL):
+        """Pętla rysowania (seconds=0 - do zamknięcia okna / Ctrl+C).
+        W trybie headless co `interval` s zapisuje `png`."""
+        deadline = time.monotonic() + seconds if seconds else None
+        next_frame = time.monotonic()
+        if not self.headless:
+            self.plt.ion()
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                now = time.monotonic()
+                if now < next_frame:
+                    time.sleep(next_frame - now)
+                if self.headless:
+                    self.snapshot(png)
+                    next_frame += interval
+                else:
+                    if self.draw():
+                        self.fig.canvas.draw_idle()
+                    if self.fig is not None:
+                        self.fig.canvas.flush_events()
+                        if not self.plt.fignum_exists(self.fig.number):
+                            break
+                    else:
+                        time.sleep(self.period)
+                    next_frame += self.period
+                # Za wolne rysowanie: pominięcie zaległych klatek zamiast nadrabiania
+                late = time.monotonic() - next_frame
+                if late > 0:
+                    step = interval if self.headless else self.period
+                    missed = int(late // step) + 1
+                    self.skipped += missed
+                    next_frame += missed * step
+        except KeyboardInterrupt:
+            pass
+        if self.headless and png:
+            self.snapshot(png)
+        return self.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wykres telemetrii na żywo")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--port')
+    source.add_argument('--shared', nargs='?', const='', metavar='NAZWA',
+                        help="bez portu - telemetria publikowana przez inny proces (SharedTelemetry)")
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--window', type=float, default=WINDOW, help="szerokość okna [s]")
+    parser.add_argument('--fps', type=float, default=FPS)
+    add_start_argument(parser)
+    parser.add_argument('--png', help="bez okna - zapis migawek do pliku PNG")
+    parser.add_argument('--interval', type=float, default=SNAPSHOT_INTERVAL,
+                        help="odstęp migawek PNG [s]")
+    parser.add_argument('--duration', type=float, default=0, help="czas działania [s]")
+    args = parser.parse_args()
+
+    if args.shared is not None:
+        return plot_shared(args)
+
+    from ArduinoRobotPython import RobotInterface
+
+    robot = RobotInterface()
+    if robot.telemetry_buffer is None:
+        print("Brak numpy - wykres wymaga bufora TelemetryRing")
+        return 1
+    if not robot.connect(args.port, args.baud):
+        return 3
+    try:
+        if not start_telemetry(robot, args.start):
+            return 1
+        run_plot(robot.telemetry_buffer, args)
+    finally:
+        robot.disconnect()
+    return 0
+
+
+def run_plot(ring, args):
+    plot = LivePlot(ring, args.window, args.fps, headless=bool(args.png))
+    frames = plot.run(args.duration, args.png, args.interval)
+    print(f"Klatek: {frames}, pominiętych: {plot.skipped}, "
+          f"rekordów utraconych przez wykres: {plot.view.dropped}")
+
+
+def plot_shared(args):
+    from SharedTelemetry import SharedTelemetryRing, SHARED_NAME
+
+    name = args.shared or SHARED_NAME
+    try:
+        ring = SharedTelemetryRing.attach(name)
+    except FileNotFoundError:
+        print(f"Brak publikowanej telemetrii '{name}' (publish w interfejsie albo SharedTelemetry.py --port)")
+        return 1
+    with ring:
+        run_plot(ring, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Online Tuner
+Automatyczne strojenie PID na robocie: egzamin -> MAE -> kolejne nastawy
+
+Cykl: nastawy jedną paczką ramek -> EXAM_START -> telemetria błędu
+(EXAM_STOP, gdy próba na pewno wypadnie gorzej od najlepszej) ->
+RESULT|MAE -> następny punkt z metody Neldera-Meada.
+
+Użycie:
+  python OnlineTuner.py --port COM3 --profile wall --budget 15
+  python OnlineTuner.py --port "sim://beam?speed=50" --profile beam --setup "SET_TARGET(20)"
+"""
+
+import argparse
+import queue
+import re
+import time
+from collections import deque
+
+from ArduinoRobotPython import RobotInterface, RobotProtocol
+from RobotSimulator import SimulatorSerial
+
+REACH_TIME = 10.0           # faza 1 egzaminu [s]
+MEASURE_TIME = 3.0          # faza 2 - pomiar MAE [s]
+EXAM_TIMEOUT = 25.0         # maks. czas jednej próby (zegar ścienny) [s]
+DIVERGE_FACTOR = 5.0        # błąd przed fazą 2 tyle razy większy od najlepszego MAE
+DIVERGE_WINDOW = 2.0        # okno średniej błędu do wykrycia rozbiegania [s]
+
+# "dist : err : out" - telemetria RobotArduino.ino / Projektu 4
+TELEMETRY_ERROR = re.compile(r"^\s*\S+\s*:\s*(\S+)\s*:")
+RESULT_MAE = re.compile(r"RESULT\|MAE:\s*([-\d.]+)")
+
+# Zakresy nastaw i okres regulatora (czas próbki telemetrii)
+PROFILES = {
+    'wall': {'bounds': ((0.2, 10.0), (0.0, 5.0), (0.0, 1.0)),
+             'start': (2.0, 0.5, 0.1), 'period': 0.05},
+    'beam': {'bounds': ((0.0, 30.0), (0.0, 5.0), (0.0, 15.0)),
+             'start': (15.0, 0.5, 8.0), 'period': 0.1},
+}
+
+
+def gain_commands(profile, kp, ki, kd):
+    """Komendy ustawiające Kp/Ki/Kd w danym firmware"""
+    if profile == 'beam':
+        return [f"CFG(KP={kp:.3f},KI={ki:.3f},KD={kd:.3f})"]
+    settings = RobotProtocol._pid_settings('L', kp, ki, kd) + RobotProtocol._pid_settings('R', kp, ki, kd)
+    return [cmd for cmd, _, _ in settings]
+
+
+def nelder_mead(x0, step=0.15, alpha=1.0, gamma=2.0, rho=0.5, sigma=0.5, tol=1e-3):
+    """Metoda Neldera-Meada w kostce [0, 1]^n jako generator:
+    zwraca punkt do oceny, przez send() dostaje jego wynik; kończy się,
+    gdy sympleks skurczy się poniżej tol (w każdej współrzędnej)"""
+    clip = lambda x: [min(1.0, max(0.0, v)) for v in x]
+    n = len(x0)
+    simplex = [clip(x0)]
+    for i in range(n):
+        point = list(simplex[0])
+        point[i] = point[i] + step if point[i] + step <= 1.0 else point[i] - step
+        simplex.append(clip(point))
+    scores = []
+    for point in simplex:
+        scores.append((yield point))
+
+    while True:
+        order = sorted(range(n + 1), key=scores.__getitem__)
+        simplex = [simplex[i] for i in order]
+        scores = [scores[i] for i in order]
+        best, worst = simplex[0], simplex[-1]
+        if max(abs(v - b) for p in simplex[1:] for v, b in zip(p, best)) < tol:
+            return
+        centroid = [sum(p[i] for p in simplex[:-1]) / n for i in range(n)]
+        move = lambda coef, p: clip([c + coef * (v - c) for c, v in zip(centroid, p)])
+
+        reflected = move(-alpha, worst)
+        f_r = yield reflected
+        if scores[0] <= f_r < scores[-2]:
+            simplex[-1], scores[-1] = reflected, f_r
+            continue
+        if f_r < scores[0]:
+            expanded = move(gamma, reflected)
+            f_e = yield expanded
+            simplex[-1], scores[-1] = (expanded, f_e) if f_e < f_r else (reflected, f_r)
+            continue
+        # Kontrakcja (zewnętrzna, gdy odbicie lepsze od najgorszego)
+        target = reflected if f_r < scores[-1] else worst
+        contracted = move(rho, target)
+        f_c = yield contracted
+        if f_c < min(f_r, scores[-1]):
+            simplex[-1], scores[-1] = contracted, f_c
+            continue
+        # Zmniejszenie sympleksu wokół najlepszego
+        for i in range(1, n + 1):
+            simplex[i] = clip([b + sigma * (v - b) for b, v in zip(best, simplex[i])])
+            scores[i] = yield simplex[i]
+
+
+class ExamMonitor:
+    """Bieżąca ocena egzaminu z telemetrii - decyzja o przerwaniu próby.
+
+    Czas liczony ze znaczników odbioru (kolumna 't' bufora telemetrii), nie
+    z liczby próbek - zmiana okresu (CFG T) ani zgubione linie nie
+    przesuwają granic faz. scale - sekundy firmware na sekundę PC (sim://)."""
+
+    def __init__(self, period, best=None, start=None, scale=1.0):
+        self.period = period        # nominalny okres - dopóki brak pomiaru
+        self.best = best
+        self.start = start
+        self.scale = scale
+        self.samples = 0
+        self.elapsed = 0.0
+        self.phase_sum = 0.0
+        self.phase_count = 0
+        self.recent = deque()       # (czas egzaminu, |błąd|) z ostatnich DIVERGE_WINDOW s
+
+    def add(self, error, t):
+        if self.start is None:
+            self.start = t
+        self.elapsed = (t - self.start) * self.scale
+        self.samples += 1
+        self.recent.append((self.elapsed, abs(error)))
+        while self.recent[0][0] < self.elapsed - DIVERGE_WINDOW:
+            self.recent.popleft()
+        if REACH_TIME <= self.elapsed < REACH_TIME + MEASURE_TIME:
+            self.phase_sum += abs(error)
+            self.phase_count += 1
+
+    @property
+    def interval(self):
+        """Okres próbek: mediana odstępów w oknie (odporna na zgubione linie)"""
+        times = [t for t, _ in self.recent]
+        gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+        return gaps[len(gaps) // 2] if gaps else self.period
+
+    def estimate(self):
+        """Dolne ograniczenie MAE (faza 2) albo średni błąd z ostatniego okna"""
+        if self.phase_count:
+            return self.phase_sum / max(self.phase_count, MEASURE_TIME / self.interval)
+        return sum(e for _, e in self.recent) / len(self.recent) if self.recent else float('inf')
+
+    def should_stop(self):
+        if self.best is None:
+            return False
+        if self.phase_count:
+            # Nawet same zera do końca fazy nie zejdą poniżej tej wartości
+            return self.estimate() > self.best
+        window_full = bool(self.recent) and \
+            self.recent[-1][0] - self.recent[0][0] >= DIVERGE_WINDOW - self.interval
+        return (self.elapsed >= REACH_TIME - DIVERGE_WINDOW and window_full and
+                self.estimate() > DIVERGE_FACTOR * self.best)
+
+
+def clock_scale(robot):
+    """Sekundy czasu firmware na sekundę zegara PC (symulator przyspiesza czas)"""
+    ser = getattr(robot.ser, 'ser', robot.ser)
+    return ser.speed if isinstance(ser, SimulatorSerial) else 1.0
+
+
+class OnlineTuner:
+    """Strojenie na żywym robocie (lub symulatorze) przez RobotInterface"""
+
+    def __init__(self, robot, profile='wall', budget=20, period=None,
+                 early_stop=True, before_run=None):
+        self.robot = robot
+        self.profile = profile
+        self.bounds = PROFILES[profile]['bounds']
+        self.period = period or PROFILES[profile]['period']
+        self.budget = budget
+        self.early_stop = early_stop
+        self.before_run = before_run    # np. prośba o ustawienie robota na starcie
+        self.history = []               # (kp, ki, kd, mae, przerwany)
+        self.evaluations = 0            # punkty metody, także te z pamięci
+        self._cache = {}
+
+    def _to_gains(self, x):
+        return tuple(round(low + v * (high - low), 3) for v, (low, high) in zip(x, self.bounds))
+
+    def _to_unit(self, gains):
+        return [(g - low) / (high - low) if high > low else 0.0
+                for g, (low, high) in zip(gains, self.bounds)]
+
+    def push_gains(self, gains):
+        responses = self.robot.send_batch(gain_commands(self.profile, *gains))
+        return all(r is not None and not r.startswith("NACK") for r in responses)
+
+    @staticmethod
+    def _drain(q):
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                return
+
+    def run_exam(self, best=None):
+        """Jedna próba: (MAE, czy przerwana); MAE=None przy braku wyniku"""
+        robot = self.robot
+        self._drain(robot.telemetry)
+        self._drain(robot.results)
+        ring = robot.telemetry_buffer
+        seq = ring.count if ring is not None else 0
+        if ring is not None:
+            from TelemetryBuffer import KIND_BEAM
+        if not robot.send_command("EXAM_START"):
+            return None, False
+        # Egzamin liczony od potwierdzenia EXAM_START; starsze rekordy pomijamy
+        start = time.monotonic()
+        monitor = ExamMonitor(self.period, best if self.early_stop else None,
+                              start, clock_scale(robot))
+        deadline = time.monotonic() + EXAM_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                frame = robot.results.get_nowait()
+                match = RESULT_MAE.search(frame)
+                if match:
+                    return float(match.group(1)), False
+            except queue.Empty:
+                pass
+            if ring is not None:
+                records, seq, _ = ring.read_since(seq)
+                records = records[(records['kind'] == KIND_BEAM) & (records['t'] >= start)]
+                samples = zip(records['t'].tolist(), records['err'].tolist())
+                if not len(records):
+                    time.sleep(0.01)
+            else:
+                # Bez numpy: czas odbioru z kolejki linii tekstowych
+                samples = self._queued_samples(robot.telemetry)
+            for t, error in samples:
+                monitor.add(error, t)
+                if monitor.should_stop():
+                    robot.send_command("EXAM_STOP")
+                    return monitor.estimate(), True
+        robot.send_command("EXAM_STOP")
+        return None, False
+
+    @staticmethod
+    def _queued_samples(q):
+        try:
+            line = q.get(timeout=0.05)
+        except queue.Empty:
+            return []
+        match = TELEMETRY_ERROR.match(line)
+        try:
+            return [(time.monotonic(), float(match.group(1)))] if match else []
+        except ValueError:
+            return []
+
+    def evaluate(self, gains, best=None):
+        # Każdy punkt zużywa budżet: po zaokrągleniu nastaw sympleks może
+        # krążyć po tych samych (zapamiętanych) próbach
+        self.evaluations += 1
+        if gains in self._cache:
+            return self._cache[gains]
+        if self.before_run:
+            self.before_run(gains)
+        if not self.push_gains(gains):
+            print(f"✗ Nie udało się ustawić nastaw {gains}")
+            mae, stopped = None, False
+        else:
+            mae, stopped = self.run_exam(best)
+        score = float('inf') if mae is None else mae
+        self.history.append(gains + (score, stopped))
+        self._cache[gains] = score
+        kp, ki, kd = gains
+        note = " (przerwana)" if stopped else ""
+        print(f"[{self.evaluations:2}/{self.budget}] Kp={kp:.3f} Ki={ki:.3f} Kd={kd:.3f} "
+              f"-> MAE={score:.3f}{note}")
+        return score
+
+    def tune(self, start=None, step=0.15):
+        """Pętla strojenia; zwraca (nastawy, MAE) najlepszej próby"""
+        start = start or PROFILES[self.profile]['start']
+        search = nelder_mead(self._to_unit(start), step)
+        best_gains, best_score = None, float('inf')
+        point = next(search)
+        while self.evaluations < self.budget:
+            gains = self._to_gains(point)
+            score = self.evaluate(gains, best_score if best_gains else None)
+            if score < best_score:
+                best_gains, best_score = gains, score
+            try:
+                point = search.send(score)
+            except StopIteration:
+                print("Sympleks zbiegł - koniec strojenia")
+                break
+        if best_gains:
+            self.push_gains(best_gains)
+            stopped = sum(1 for h in self.history if h[4])
+            print(f"\n✓ Najlepsze: Kp={best_gains[0]} Ki={best_gains[1]} Kd={best_gains[2]} "
+                  f"(MAE={best_score:.3f}), przerwanych prób: {stopped}")
+        return best_gains, best_score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strojenie PID na podstawie RESULT|MAE")
+    parser.add_argument('--port', required=True)
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='wall')
+    parser.add_argument('--budget', type=int, default=20, help="liczba punktów metody (powtórzone nastawy też się liczą)")
+    parser.add_argument('--start', type=float, nargs=3, metavar=('KP', 'KI', 'KD'))
+    parser.add_argument('--setup', action='append', default=[], metavar='CMD',
+                        help="komenda wysłana raz przed strojeniem, np. \"SET_TARGET(20)\"")
+    parser.add_argument('--no-early-stop', action='store_true')
+    parser.add_argument('--manual-reset', action='store_true',
+                        help="czekaj na Enter przed każdą próbą (ustawienie robota)")
+    args = parser.parse_args()
+
+    robot = RobotInterface()
+    if not robot.connect(args.port, args.baud):
+        return
+    if args.setup and not all(robot.send_batch(args.setup)):
+        print("✗ Komendy --setup nie zostały potwierdzone")
+        robot.disconnect()
+        return
+    before_run = None
+    if args.manual_reset:
+        before_run = lambda gains: input("Ustaw robota na starcie i naciśnij Enter...")
+    tuner = OnlineTuner(robot, args.profile, args.budget,
+                        early_stop=not args.no_early_stop, before_run=before_run)
+    try:
+        tuner.tune(tuple(args.start) if args.start else None)
+    except KeyboardInterrupt:
+        robot.send_command("EXAM_STOP")
+        print("\nPrzerwano strojenie")
+    finally:
+        robot.disconnect()
+
+
+if __name__ == "__main__":
+    main()
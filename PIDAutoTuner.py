@@ -0,0 +1,345 @@
+"""
+PID Auto-Tuner
+Offline strojenie PID na wektoryzowanym (NumPy) modelu robota
+
+Modele jak w RobotSimulator.py (te same stałe), ale liczone dla wielu
+kandydatów naraz. Ocena = MAE z egzaminu firmware: 10 s dojazdu, potem
+średni |błąd| przez 3 s (RESULT|MAE). Kandydaci dzieleni na paczki
+i liczeni równolegle w puli procesów; szum pomiaru kandydata zależy tylko
+od --seed i jego nastaw, więc wynik nie zależy od podziału na paczki.
+
+Użycie:
+  python PIDAutoTuner.py --model line --search refine --vref 100
+  python PIDAutoTuner.py --model wall --search grid --levels 5 --out wall.json
+  python QuickPIDConfig.py wall.json      # zastosowanie presetów
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from RobotSimulator import PHYSICS_DT, LineSim, WallSim
+
+REACH_TIME = 10.0           # faza 1 egzaminu [s]
+MEASURE_TIME = 3.0          # faza 2 - pomiar MAE [s]
+LOST_PENALTY = 10.0         # MAE kandydata, który zgubił linię / uderzył w ścianę
+CHUNK_SIZE = 256            # kandydatów w jednym zadaniu puli
+
+# Przestrzeń przeszukiwania: (min, max) albo stała wartość
+LINE_SPACE = {'Kp': (5.0, 120.0), 'Ki': (0.0, 1.0), 'Kd': (0.0, 30.0),
+              'Vref': 100, 'T': (50, 150)}
+WALL_SPACE = {'Kp': (0.2, 10.0), 'Ki': (0.0, 5.0), 'Kd': (0.0, 1.0),
+              'Vmax': (20.0, 80.0)}
+INTEGER_PARAMS = ('Vref', 'T')
+
+
+# ----------------------------- modele -----------------------------
+
+def _phase_mask(now):
+    return (now >= REACH_TIME) & (now < REACH_TIME + MEASURE_TIME)
+
+
+def candidate_noise(params, seed, steps, scale):
+    """Szum pomiaru (kandydaci x próbki): ziarno z seed i nastaw kandydata,
+    niezależne od paczki i procesu, w którym kandydat jest liczony"""
+    params = np.ascontiguousarray(params, dtype=float)
+    noise = np.empty((len(params), steps))
+    for j, row in enumerate(params):
+        digest = hashlib.blake2b(row.tobytes(), digest_size=8).digest()
+        key = [int(word) for word in np.frombuffer(digest, dtype=np.uint32)]
+        noise[j] = np.random.default_rng([seed, *key]).normal(0.0, scale, steps)
+    return noise
+
+
+def simulate_line(params, seed=0, dt=PHYSICS_DT):
+    """MAE znormalizowanego błędu (POS-2000)/2000 dla kolumn Kp, Ki, Kd, Vref, T"""
+    kp, ki, kd, vref, t_ms = (params[:, i] for i in range(5))
+    n = len(kp)
+    lengths = np.array([length for length, _ in LineSim.TRACK])
+    kappas = np.array([kappa for _, kappa in LineSim.TRACK])
+    bounds = np.cumsum(lengths)
+
+    y = np.zeros(n); psi = np.zeros(n); s = np.zeros(n)
+    v_l = np.zeros(n); v_r = np.zeros(n)
+    pwm_l = np.zeros(n); pwm_r = np.zeros(n)
+    integral = np.zeros(n); prev = np.zeros(n); filt = np.zeros(n)
+    lost = np.zeros(n, dtype=bool)
+    err_sum = np.zeros(n); err_count = np.zeros(n)
+    period = t_ms / 1000.0
+    next_control = np.zeros(n)
+    steps = int(np.ceil((REACH_TIME + MEASURE_TIME) / max(period.min(), dt))) + 2 if n else 1
+    noise = candidate_noise(params, seed, steps, 20.0)
+    sample = np.zeros(n, dtype=int)     # numer próbki regulatora kandydata
+    now = 0.0
+    k = min(1.0, dt / LineSim.MOTOR_TAU)
+
+    while now < REACH_TIME + MEASURE_TIME:
+        # Obiekt
+        v_l += (LineSim.KV * pwm_l - v_l) * k
+        v_r += (LineSim.KV * pwm_r - v_r) * k
+        v = (v_l + v_r) / 2
+        kappa = kappas[np.minimum(np.searchsorted(bounds, s % bounds[-1], side='right'), len(kappas) - 1)]
+        y += v * np.sin(psi) * dt
+        psi += ((v_r - v_l) / LineSim.TRACK_WIDTH - v * kappa) * dt
+        s += v * np.cos(psi) * dt
+        now += dt
+
+        # Regulator (computePID) w chwilach próbkowania danego kandydata
+        due = (now >= next_control) & ~lost
+        if not due.any():
+            continue
+        next_control = np.where(due, now + period, next_control)
+        lost |= due & (np.abs(y) >= LineSim.SENSOR_HALF + 10.0)
+        due &= ~lost
+        pos = np.clip(2000.0 - 2000.0 * y / LineSim.SENSOR_HALF +
+                      noise[np.arange(n), np.minimum(sample, steps - 1)], 0, 4000)
+        sample += due
+        error = (np.trunc(pos) - 2000.0) / 2000.0
+        integral = np.where(due, np.clip(integral + error * period, -LineSim.MAX_INTEGRAL, LineSim.MAX_INTEGRAL), integral)
+        derivative = (error - prev) / period
+        filt = np.where(due, LineSim.ALPHA * derivative + (1 - LineSim.ALPHA) * filt, filt)
+        output = np.trunc(kp * error + ki * integral + kd * filt)
+        left = np.clip(vref - output, -LineSim.MAX_PWM, LineSim.MAX_PWM)
+        right = np.clip(vref + output, -LineSim.MAX_PWM, LineSim.MAX_PWM)
+        for wheel in (left, right):
+            dead = (wheel != 0) & (np.abs(wheel) < LineSim.MIN_PWM)
+            wheel[dead] = np.sign(wheel[dead]) * LineSim.MIN_PWM
+        pwm_l = np.where(due, left, np.where(lost, 0.0, pwm_l))
+        pwm_r = np.where(due, right, np.where(lost, 0.0, pwm_r))
+        prev = np.where(due, error, prev)
+        measure = due & _phase_mask(now)
+        err_sum += np.where(measure, np.abs(error), 0.0)
+        err_count += measure
+
+    mae = np.divide(err_sum, err_count, out=np.zeros(n), where=err_count > 0)
+    return np.where(lost, LOST_PENALTY, mae)
+
+
+def simulate_wall(params, seed=0, dt=PHYSICS_DT):
+    """MAE odległości od celu [cm] dla kolumn Kp, Ki, Kd, Vmax (oba koła)"""
+    kp, ki, kd, vmax = (params[:, i] for i in range(4))
+    n = len(kp)
+    period = WallSim.T_SAMPLE / 1000.0
+    steps = int(np.ceil((REACH_TIME + MEASURE_TIME) / period)) + 2
+    noise = candidate_noise(params, seed, steps, WallSim.NOISE)
+    sample = 0
+    target = WallSim.TARGET
+
+    d = np.full(n, WallSim.START_DISTANCE)
+    wheel = np.zeros((2, n))
+    pwm = np.zeros((2, n))
+    integral = np.zeros((2, n)); prev = np.zeros((2, n))
+    gain = np.array([[1.0], [WallSim.RIGHT_GAIN]])
+    crashed = np.zeros(n, dtype=bool)
+    err_sum = np.zeros(n); err_count = 0
+    k = min(1.0, dt / WallSim.MOTOR_TAU)
+    now = 0.0
+    next_control = 0.0
+
+    while now < REACH_TIME + MEASURE_TIME:
+        wheel += (WallSim.KV * gain * pwm - wheel) * k
+        d -= wheel.mean(axis=0) * dt
+        hit = d < 2.0
+        crashed |= hit
+        d[hit] = 2.0
+        wheel[:, hit] = 0.0
+        now += dt
+        if now < next_control:
+            continue
+        next_control = now + period
+        error = d + noise[:, min(sample, steps - 1)] - target
+        sample += 1
+        v_set = np.clip(WallSim.K_APPROACH * error, -vmax, vmax)
+        e = v_set - wheel
+        integral += e * period
+        derivative = (e - prev) / period
+        prev = e
+        pwm = np.clip(kp * e + ki * integral + kd * derivative, -255, 255)
+        if _phase_mask(now):
+            err_sum += np.abs(error)
+            err_count += 1
+
+    mae = err_sum / max(err_count, 1)
+    return np.where(crashed, LOST_PENALTY, mae)
+
+
+MODELS = {
+    'line': (simulate_line, ('Kp', 'Ki', 'Kd', 'Vref', 'T'), LINE_SPACE),
+    'wall': (simulate_wall, ('Kp', 'Ki', 'Kd', 'Vmax'), WALL_SPACE),
+}
+
+
+# ----------------------------- przeszukiwanie -----------------------------
+
+def _finalize(space, names, columns):
+    params = np.column_stack([columns[name] for name in names]).astype(float)
+    for i, name in enumerate(names):
+        if name in INTEGER_PARAMS:
+            params[:, i] = np.round(params[:, i])
+        bounds = space[name]
+        if isinstance(bounds, tuple):
+            params[:, i] = np.clip(params[:, i], *bounds)
+    return params
+
+
+def grid_candidates(space, names, levels):
+    axes = [np.linspace(*space[name], levels) if isinstance(space[name], tuple)
+            else [space[name]] for name in names]
+    points = np.array(list(itertools.product(*axes)), dtype=float)
+    return _finalize(space, names, {name: points[:, i] for i, name in enumerate(names)})
+
+
+def random_candidates(space, names, count, rng):
+    columns = {}
+    for name in names:
+        bounds = space[name]
+        columns[name] = rng.uniform(*bounds, count) if isinstance(bounds, tuple) else np.full(count, bounds)
+    return _finalize(space, names, columns)
+
+
+def _evaluate_chunk(job):
+    model, params, seed = job
+    return MODELS[model][0](params, seed=seed)
+
+
+def evaluate(model, params, workers=None, seed=0):
+    """Wyniki MAE dla wszystkich kandydatów (paczki w puli procesów)"""
+    workers = workers or os.cpu_count() or 1
+    # Paczki po najwyżej CHUNK_SIZE, ale tyle, żeby zająć wszystkie procesy
+    size = max(1, min(CHUNK_SIZE, -(-len(params) // workers)))
+    chunks = [params[i:i + size] for i in range(0, len(params), size)]
+    jobs = [(model, chunk, seed) for chunk in chunks]
+    if workers == 1 or len(jobs) == 1:
+        scores = [_evaluate_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scores = list(pool.map(_evaluate_chunk, jobs))
+    return np.concatenate(scores) if scores else np.zeros(0)
+
+
+def refine_search(model, space, names, count, rounds, rng, workers=None, seed=0, elite=0.1):
+    """Losowanie + zawężanie wokół najlepszych (metoda entropii krzyżowej)"""
+    params = random_candidates(space, names, count, rng)
+    all_params, all_scores = [params], [evaluate(model, params, workers, seed)]
+    ranged = [name for name in names if isinstance(space[name], tuple)]
+    for _ in range(rounds - 1):
+        pool = np.concatenate(all_params)
+        scores = np.concatenate(all_scores)
+        best = pool[np.argsort(scores)[:max(2, int(len(pool) * elite))]]
+        columns = {}
+        for i, name in enumerate(names):
+            if name in ranged:
+                low, high = space[name]
+                sigma = max(best[:, i].std(), (high - low) * 0.01)
+                columns[name] = rng.normal(best[:, i].mean(), sigma, count)
+            else:
+                columns[name] = np.full(count, space[name])
+        params = _finalize(space, names, columns)
+        all_params.append(params)
+        all_scores.append(evaluate(model, params, workers, seed))
+    return np.concatenate(all_params), np.concatenate(all_scores)
+
+
+def rank(params, scores, top):
+    order = np.argsort(scores, kind='stable')[:top]
+    return params[order], scores[order]
+
+
+def wall_commands(kp, ki, kd, vmax):
+    """Komendy WallApproachFuzzy.ino: te same nastawy dla obu kół + VMAX"""
+    commands = []
+    for side in ('L', 'R'):
+        commands += [f"KP_{side} {kp}", f"KI_{side} {ki}", f"KD_{side} {kd}"]
+    return commands + [f"VMAX {vmax}"]
+
+
+def to_configs(model, names, params, scores):
+    """Najlepsi kandydaci w formacie QuickPIDConfig.CONFIGS
+
+    Model line: klucze Kp/Ki/Kd/Vref/T jak w presetach linii. Model wall:
+    firmware ściany nie zna komend Kp/Vref/T, więc preset niesie gotową
+    listę 'commands' (KP_L ... VMAX), którą wysyła QuickPIDConfig.
+    """
+    configs = {}
+    for i, (row, mae) in enumerate(zip(params, scores), 1):
+        config = {
+            'name': f'Auto #{i} ({model})',
+            'description': f'Auto-tuner: MAE={mae:.4f} (10 s + 3 s, model)',
+        }
+        for name, value in zip(names, row):
+            config[name] = int(value) if name in INTEGER_PARAMS else round(float(value), 3)
+        if model == 'wall':
+            config['commands'] = wall_commands(*(config[name] for name in names))
+        configs[str(i)] = config
+    return configs
+
+
+def parse_space(space, overrides):
+    """--set Kp=10:40 / --set Vref=120 -> nowa przestrzeń"""
+    space = dict(space)
+    for item in overrides or []:
+        name, _, value = item.partition('=')
+        if name not in space:
+            raise ValueError(f"Nieznany parametr: {name}")
+        if ':' in value:
+            low, high = value.split(':')
+            space[name] = (float(low), float(high))
+        else:
+            space[name] = float(value)
+    return space
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline strojenie PID na modelu robota")
+    parser.add_argument('--model', choices=sorted(MODELS), default='line')
+    parser.add_argument('--search', choices=('grid', 'random', 'refine'), default='refine')
+    parser.add_argument('--samples', type=int, default=1024, help="kandydatów na rundę")
+    parser.add_argument('--rounds', type=int, default=4, help="rundy dla --search refine")
+    parser.add_argument('--levels', type=int, default=6, help="punktów na oś dla --search grid")
+    parser.add_argument('--vref', type=float, help="stała prędkość (model line)")
+    parser.add_argument('--set', action='append', metavar='PARAM=MIN:MAX',
+                        help="zakres lub stała wartość parametru")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--top', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="zapis presetów do pliku JSON")
+    args = parser.parse_args()
+
+    _, names, space = MODELS[args.model]
+    space = parse_space(space, args.set)
+    if args.vref is not None and 'Vref' in space:
+        space['Vref'] = args.vref
+    rng = np.random.default_rng(args.seed)
+
+    if args.search == 'grid':
+        params = grid_candidates(space, names, args.levels)
+        scores = evaluate(args.model, params, args.workers, args.seed)
+    elif args.search == 'random':
+        params = random_candidates(space, names, args.samples, rng)
+        scores = evaluate(args.model, params, args.workers, args.seed)
+    else:
+        params, scores = refine_search(args.model, space, names, args.samples,
+                                       args.rounds, rng, args.workers, args.seed)
+    print(f"Ocenionych kandydatów: {len(params)}")
+
+    best, best_scores = rank(params, scores, args.top)
+    print(f"\n{'#':>2}  {'MAE':>8}  " + "  ".join(f"{name:>7}" for name in names))
+    for i, (row, mae) in enumerate(zip(best, best_scores), 1):
+        print(f"{i:>2}  {mae:8.4f}  " + "  ".join(f"{value:7.3f}" for value in row))
+
+    configs = to_configs(args.model, names, best, best_scores)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(configs, f, indent=4, ensure_ascii=False)
+        print(f"\nPresety zapisane do: {args.out}")
+    else:
+        print("\nCONFIGS = " + json.dumps(configs, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Parameter Cache
+Lokalna kopia parametrów firmware: odczyt bez STATUS, wysyłka tylko zmian
+
+Wartości pochodzą z potwierdzonych (ACK) komend ustawiających i z
+odpowiedzi STATUS (ACK|KP:..,KI:..,KD:..,DIST_POINT:..,SERVO_ZERO:..,T:..).
+NACK albo brak odpowiedzi unieważnia dany parametr, ponowne połączenie -
+całą kopię (firmware mogło zostać zresetowane). Osobno, w kolejności
+ustawiania, zostają ostatnie potwierdzone komendy - LinkSupervisor
+odtwarza z nich stan po resecie robota (restore_commands()).
+"""
+
+import re
+import threading
+
+# Firmware wypisuje floaty z 2 miejscami po przecinku
+STATUS_RESOLUTION = 0.005
+# Odpowiedź podstawiana za komendę pominiętą, bo wartość się nie zmieniła
+UNCHANGED = "ACK|UNCHANGED"
+
+# Komendy ustawiające stan, który firmware traci przy resecie -> parametr:
+# "NAZWA wartość" (Projekt 4, Line Follower) albo "NAZWA(wartość)" z nazwą
+# parametru z odpowiedzi STATUS; CFG(...) pochylni ustawia kilka naraz.
+# Ruch (START, P, TEST_START, EXAM_START) nie jest wznawiany automatycznie.
+SETTING_COMMANDS = {name: name for name in ('KP_L', 'KI_L', 'KD_L', 'KP_R', 'KI_R', 'KD_R',
+                                             'VMAX', 'Kp', 'Ki', 'Kd', 'Vref', 'T')}
+SETTING_COMMANDS.update({'SET_TARGET': 'DIST_POINT', 'SET_SERVO_ZERO': 'SERVO_ZERO'})
+# Stan telemetrii - odtwarzany, ale nie jest parametrem
+TELEMETRY_COMMANDS = ('TELEMETRY_ON', 'TELEMETRY_OFF')
+INT_PARAMS = {'SERVO_ZERO', 'T', 'Vref'}
+
+# "ACK|Kp=1.50", Line Follower dokleja jeszcze "|suma"
+ACK_VALUE = re.compile(r"^ACK\|\w+=([-\d.]+)(?:\|\d+)?$")
+STATUS_ITEM = re.compile(r"(\w+):([^,]*)")
+
+
+def to_value(name, text):
+    """Wartość parametru z tekstu; typ wg INT_PARAMS, nieliczbowe bez zmian"""
+    try:
+        return int(float(text)) if name in INT_PARAMS else float(text)
+    except ValueError:
+        return text.strip()
+
+
+def parse_status(frame):
+    """'ACK|KP:2.00,KI:0.30,...' -> {'KP': 2.0, 'KI': 0.3, ...}"""
+    parts = frame.split('|')
+    body = parts[1] if len(parts) > 1 else frame
+    return {name: to_value(name, value) for name, value in STATUS_ITEM.findall(body)}
+
+
+def command_params(cmd):
+    """Parametry ustawiane komendą: 'CFG(KP=1,T=50)' -> {'KP': 1.0, 'T': 50}"""
+    name, _, arg = cmd.partition(' ')
+    if name in SETTING_COMMANDS and arg:
+        param = SETTING_COMMANDS[name]
+        return {param: to_value(param, arg)}
+    name, paren, arg = cmd.partition('(')
+    if not paren or not arg.endswith(')'):
+        return {}
+    arg = arg[:-1]
+    if name == 'CFG':
+        params = {}
+        for item in arg.split(','):
+            key, _, value = item.partition('=')
+            if key:
+                params[key] = to_value(key, value)
+        return params
+    if name in SETTING_COMMANDS:
+        param = SETTING_COMMANDS[name]
+        return {param: to_value(param, arg)}
+    return {}
+
+
+class ParameterCache:
+    """Znane wartości parametrów robota i potwierdzone komendy ustawiające"""
+
+    def __init__(self):
+        self.values = {}
+        self.settings = {}      # klucz -> ostatnia potwierdzona komenda
+        self.cfg = {}           # klucze CFG(...) firmware pochylni
+        self.rounded = set()    # wartości z dokładnością STATUS (2 miejsca)
+        self.complete = False   # był STATUS i nic nie zostało unieważnione
+        self.skipped = 0        # komendy niewysłane, bo nic nie zmieniały
+        self._lock = threading.Lock()
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+    def _same(self, name, value):
+        if name not in self.values:
+            return False
+        cached = self.values[name]
+        if name in self.rounded and isinstance(value, float):
+            return abs(value - cached) <= STATUS_RESOLUTION + 1e-9
+        return value == cached
+
+    def matches(self, cmd):
+        """Czy komenda niczego nie zmieni (wszystkie jej parametry są znane)"""
+        params = command_params(cmd)
+        with self._lock:
+            return bool(params) and all(self._same(k, v) for k, v in params.items())
+
+    def changed(self, cmds):
+        """Indeksy komend, które trzeba wysłać"""
+        todo = [i for i, cmd in enumerate(cmds) if not self.matches(cmd)]
+        self.skipped += len(cmds) - len(todo)
+        return todo
+
+    def update_status(self, frame):
+        params = parse_status(frame)
+        with self._lock:
+            self.values.update(params)
+            self.rounded.update(k for k, v in params.items() if isinstance(v, float))
+            self.complete = True
+        return params
+
+    def record(self, cmd, response):
+        """Wynik komendy z send_batch (None = brak odpowiedzi)"""
+        if cmd == "STATUS":
+            if response and response.startswith("ACK"):
+                self.update_status(response)
+            return
+        acked = response is not None and response.startswith("ACK")
+        if acked:
+            self._remember(cmd)
+        params = command_params(cmd)
+        if not params:
+            return
+        if not acked:
+            # Nie wiadomo, czy firmware przyjęło wartość
+            self.invalidate(params)
+            return
+        echo = ACK_VALUE.match(response)
+        with self._lock:
+            if echo and len(params) == 1:
+                # Wartość po ograniczeniu przez firmware (np. constrain Vref / T)
+                (name,) = params
+                self.values[name] = to_value(name, echo.group(1))
+                self.rounded.add(name)
+                return
+            self.values.update(params)
+            self.rounded.difference_update(params)
+
+    def _remember(self, cmd):
+        """Potwierdzona komenda do odtworzenia po resecie (ostatnia na końcu)"""
+        name = cmd.split(' ', 1)[0].split('(', 1)[0]
+        with self._lock:
+            if name == 'CFG':
+                for item in cmd[4:-1].split(','):
+                    key, _, value = item.partition('=')
+                    if key:
+                        self.cfg[key] = value
+            elif name in SETTING_COMMANDS:
+                self.settings.pop(name, None)
+                self.settings[name] = cmd
+            elif name in TELEMETRY_COMMANDS:
+                self.settings.pop('TELEMETRY', None)
+                self.settings['TELEMETRY'] = cmd
+
+    def restore_commands(self):
+        """Komendy odtwarzające potwierdzony stan (po ponownym połączeniu)"""
+        with self._lock:
+            cmds = []
+            if self.cfg:
+                cmds.append("CFG(" + ",".join(f"{k}={v}" for k, v in self.cfg.items()) + ")")
+            cmds.extend(self.settings.values())
+            return cmds
+
+    def record_results(self, cmds, results):
+        for cmd, result in zip(cmds, results):
+            self.record(cmd, result)
+
+    def invalidate(self, names=None):
+        """Unieważnienie wybranych parametrów albo (None) wszystkich"""
+        with self._lock:
+            if names is None:
+                self.values.clear()
+                self.rounded.clear()
+            else:
+                for name in names:
+                    self.values.pop(name, None)
+                    self.rounded.discard(name)
+            self.complete = False
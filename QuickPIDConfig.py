@@ -3,50 +3,35 @@ Quick PID Configuration Tool
 Szybkie ustawianie predefiniowanych konfiguracji PID dla Line Followera
 """
 
-import serial
-import serial.tools.list_ports
-import time
+import argparse
+import json
+
+from ArduinoRobotPython import RobotInterface
+from ParameterCache import UNCHANGED
 
 class QuickConfig:
     def __init__(self):
-        self.ser = None
+        # Warstwa ramek (wątek czytający, numery sekwencyjne, paczki komend)
+        self.robot = RobotInterface()
+    
+    @property
+    def ser(self):
+        return self.robot.ser
         
     def calculate_checksum(self, cmd):
-        return sum(ord(c) for c in cmd) % 256
+        return self.robot.calculate_checksum(cmd)
     
     def send_command(self, cmd):
-        if not self.ser or not self.ser.is_open:
-            print("Brak połączenia")
-            return False
-        
-        checksum = self.calculate_checksum(cmd)
-        frame = f"{cmd}|{checksum}#"
-        
-        try:
-            self.ser.reset_input_buffer()
-            self.ser.reset_output_buffer()
-            self.ser.write(frame.encode())
-            self.ser.flush()
-            
-            start = time.time()
-            while (time.time() - start) < 1.0:
-                if self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    if line.endswith('#') and line.startswith("ACK"):
-                        return True
-            return False
-        except Exception as e:
-            print(f"Błąd: {e}")
-            return False
+        return self.robot.send_command(cmd, retries=1) is not None
+    
+    def send_batch(self, cmds):
+        return [r is not None for r in self.robot.send_batch(cmds, retries=1)]
+    
+    def connect(self, port, baudrate=9600, fast=True, negotiate=True):
+        return self.robot.connect(port, baudrate, fast=fast, negotiate=negotiate)
     
-    def connect(self, port, baudrate=9600):
-        try:
-            self.ser = serial.Serial(port, baudrate, timeout=1.0)
-            time.sleep(2)
-            return True
-        except Exception as e:
-            print(f"Błąd połączenia: {e}")
-            return False
+    def disconnect(self):
+        self.robot.disconnect()
     
     def apply_config(self, config):
         print(f"\n{'='*50}")
@@ -54,27 +39,46 @@ class QuickConfig:
         print(f"{'='*50}")
         print(f"Opis: {config['description']}")
         print(f"\nParametry:")
-        print(f"  Kp = {config['Kp']}")
-        print(f"  Ki = {config['Ki']}")
-        print(f"  Kd = {config['Kd']}")
-        print(f"  Vref = {config['Vref']}")
-        print(f"  T = {config['T']} ms")
+        if 'commands' in config:
+            for command in config['commands']:
+                print(f"  {command}")
+        else:
+            print(f"  Kp = {config['Kp']}")
+            print(f"  Ki = {config['Ki']}")
+            print(f"  Kd = {config['Kd']}")
+            print(f"  Vref = {config['Vref']}")
+            print(f"  T = {config['T']} ms")
         print()
         
-        success = True
-        success &= self.send_command(f"Kp {config['Kp']}")
-        success &= self.send_command(f"Ki {config['Ki']}")
-        success &= self.send_command(f"Kd {config['Kd']}")
-        success &= self.send_command(f"Vref {config['Vref']}")
-        success &= self.send_command(f"T {config['T']}")
+        # Wysyłane są tylko parametry różne od znanych (ParameterCache)
+        responses = self.robot.push_settings(config_commands(config), retries=1)
+        success = all(responses)
         
         if success:
-            print("✓ Konfiguracja zastosowana pomyślnie!")
+            unchanged = responses.count(UNCHANGED)
+            note = f" ({unchanged} bez zmian)" if unchanged else ""
+            print(f"✓ Konfiguracja zastosowana pomyślnie!{note}")
         else:
             print("✗ Wystąpił błąd podczas konfiguracji")
         
         return success
 
+def config_commands(config):
+    """Komendy firmware ustawiające konfigurację z CONFIGS
+
+    Preset z listą 'commands' (np. ściana z PIDAutoTuner.py) wysyła ją
+    bez zmian; pozostałe to nastawy Line Followera.
+    """
+    if 'commands' in config:
+        return list(config['commands'])
+    return [
+        f"Kp {config['Kp']}",
+        f"Ki {config['Ki']}",
+        f"Kd {config['Kd']}",
+        f"Vref {config['Vref']}",
+        f"T {config['T']}",
+    ]
+
 # Predefiniowane konfiguracje
 CONFIGS = {
     '1': {
@@ -133,7 +137,25 @@ CONFIGS = {
     }
 }
 
+def config_summary(config):
+    """Jednolinijkowy opis nastaw presetu do menu"""
+    if 'commands' in config:
+        return ", ".join(config['commands'])
+    return (f"Kp={config['Kp']}, Ki={config['Ki']}, Kd={config['Kd']}, "
+            f"Vref={config['Vref']}, T={config['T']}")
+
+def load_configs(path):
+    """Presety z pliku JSON (PIDAutoTuner.py --out)"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
 def main():
+    parser = argparse.ArgumentParser(description="Szybkie ustawianie presetów PID")
+    parser.add_argument('presets', nargs='?',
+                        help="plik JSON z presetami (PIDAutoTuner.py --out) zamiast wbudowanych")
+    args = parser.parse_args()
+    configs = load_configs(args.presets) if args.presets else CONFIGS
+
     print("╔════════════════════════════════════════════════════════╗")
     print("║      QUICK PID CONFIGURATION - LINE FOLLOWER           ║")
     print("╚════════════════════════════════════════════════════════╝")
@@ -141,14 +163,16 @@ def main():
     qc = QuickConfig()
     
     # Wybór portu
+    import serial.tools.list_ports
     ports = serial.tools.list_ports.comports()
     print("\nDostępne porty:")
     for i, port in enumerate(ports, 1):
         print(f"{i}. {port.device} - {port.description}")
     
     try:
-        choice = int(input("\nWybierz port (numer): ")) - 1
-        port = [p.device for p in ports][choice]
+        # URL zamiast numeru: socket://host:port / unix://gniazdo (SerialBridge), sim://...
+        choice = input("\nWybierz port (numer lub URL, np. socket://localhost:7777): ").strip()
+        port = choice if "://" in choice else [p.device for p in ports][int(choice) - 1]
     except:
         print("Nieprawidłowy wybór")
         return
@@ -165,11 +189,10 @@ def main():
         print("\n" + "="*60)
         print("DOSTĘPNE KONFIGURACJE:")
         print("="*60)
-        for key, config in CONFIGS.items():
+        for key, config in configs.items():
             print(f"{key}. {config['name']}")
             print(f"   {config['description']}")
-            print(f"   Kp={config['Kp']}, Ki={config['Ki']}, Kd={config['Kd']}, "
-                  f"Vref={config['Vref']}, T={config['T']}")
+            print(f"   {config_summary(config)}")
             print()
         
         print("Inne opcje:")
@@ -184,18 +207,14 @@ def main():
         
         if choice == 'q':
             break
-        elif choice in CONFIGS:
-            qc.apply_config(CONFIGS[choice])
+        elif choice in configs:
+            qc.apply_config(configs[choice])
         elif choice == 'c':
             print("\nKalibracja - przesuwaj robota nad linią...")
             if qc.send_command("CALIBRATE"):
                 print("✓ Kalibracja zakończona")
         elif choice == 's':
-            if qc.send_command("STATUS"):
-                time.sleep(0.5)
-                while qc.ser.in_waiting > 0:
-                    line = qc.ser.readline().decode('utf-8', errors='ignore').strip()
-                    print(line)
+            qc.robot.get_status()
         elif choice == 'p':
             if qc.send_command("P"):
                 print("✓ Robot uruchomiony - jedzie po linii!")
@@ -206,21 +225,12 @@ def main():
             if qc.send_command("TELEMETRY_ON"):
                 print("✓ Telemetria włączona")
                 print("Odczytywanie telemetrii (Ctrl+C aby przerwać)...")
-                try:
-                    while True:
-                        if qc.ser.in_waiting > 0:
-                            line = qc.ser.readline().decode('utf-8', errors='ignore').strip()
-                            if not line.endswith('#'):
-                                print(line)
-                        time.sleep(0.01)
-                except KeyboardInterrupt:
-                    print("\n")
+                qc.robot.monitor()
+                print("\n")
         else:
             print("Nieznana opcja")
     
-    if qc.ser and qc.ser.is_open:
-        qc.ser.close()
-    print("\nPołączenie zamknięte")
+    qc.disconnect()
 
 if __name__ == "__main__":
     main()
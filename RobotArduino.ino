@@ -16,6 +16,7 @@ float distance_point = 0.0;
 int servo_zero = 95;
 int t = 100;  // domyślnie 100ms
 String inputBuffer = "";
+String seqTag = "";  // "|@<seq>" z ostatniej ramki, odsyłany w odpowiedzi
 bool testMode = false;
 bool examMode = false;
 unsigned long examStartTime = 0;
@@ -24,6 +25,22 @@ bool stabilizationPhase = false;
 float errorSum = 0.0;
 int errorCount = 0;
 
+// Tryb binarny: COBS([typ, dane..., crc8]) + 0x00 (BinaryProtocol.py)
+#define FRAME_TEXT 0x01
+#define FRAME_BEAM 0x10
+#define BIN_BUFFER_SIZE 72
+bool binaryMode = false;
+uint8_t binBuffer[BIN_BUFFER_SIZE];
+uint8_t binLen = 0;
+
+// Zmiana prędkości łącza (BaudNegotiation.py): BAUD <r> -> ACK jeszcze na starej
+// prędkości, przełączenie; BAUD_OK na nowej zatwierdza, bez niego po
+// BAUD_CONFIRM_MS powrót do poprzedniej - nieudana próba nie zrywa łącza
+#define BAUD_CONFIRM_MS 1000
+long baudRate = SERIAL_BAUD_RATE;
+long previousBaud = 0;  // != 0 - nowa prędkość czeka na BAUD_OK
+unsigned long baudSwitchTime = 0;
+
 // Pomiar odległości z czujnika IR
 float get_dist(int n){
   long sum = 0;
@@ -35,6 +52,78 @@ float get_dist(int n){
   return distance_cm;
 }
 
+// ========================= TRYB BINARNY =========================
+
+uint8_t crc8(const uint8_t* data, uint8_t len){
+  uint8_t crc = 0;
+  for(uint8_t i = 0; i < len; i++){
+    crc ^= data[i];
+    for(uint8_t b = 0; b < 8; b++){
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+int16_t clamp16(float v){
+  if(v > 32767.0) return 32767;
+  if(v < -32768.0) return -32768;
+  return (int16_t)v;
+}
+
+// Wysłanie ramki: COBS([typ, dane..., crc8]) + 0x00
+void sendFrame(uint8_t type, const uint8_t* data, uint8_t len){
+  uint8_t raw[BIN_BUFFER_SIZE];
+  uint8_t out[BIN_BUFFER_SIZE + 2];
+  if(len > BIN_BUFFER_SIZE - 2) len = BIN_BUFFER_SIZE - 2;
+  raw[0] = type;
+  memcpy(raw + 1, data, len);
+  raw[len + 1] = crc8(raw, len + 1);
+
+  uint8_t codeIdx = 0, code = 1, o = 1;
+  for(uint8_t i = 0; i < len + 2; i++){
+    if(raw[i] == 0){
+      out[codeIdx] = code;
+      codeIdx = o++;
+      code = 1;
+    } else{
+      out[o++] = raw[i];
+      code++;
+    }
+  }
+  out[codeIdx] = code;
+  Serial.write(out, o);
+  Serial.write((uint8_t)0);
+}
+
+// Dekodowanie COBS w miejscu; zwraca długość lub 0 przy błędzie
+uint8_t cobsDecode(uint8_t* buf, uint8_t len){
+  uint8_t i = 0, o = 0;
+  while(i < len){
+    uint8_t code = buf[i++];
+    if(code == 0 || i + code - 1 > len) return 0;
+    for(uint8_t k = 1; k < code; k++) buf[o++] = buf[i++];
+    if(code < 0xFF && i < len) buf[o++] = 0;
+  }
+  return o;
+}
+
+// ========================= PRĘDKOŚĆ ŁĄCZA =========================
+
+bool baudAllowed(long rate){
+  return rate == 9600 || rate == 19200 || rate == 38400 || rate == 57600 ||
+         rate == 115200 || rate == 250000 || rate == 500000;
+}
+
+void switchBaud(long rate){
+  Serial.flush();  // ACK musi wyjść na starej prędkości
+  Serial.end();
+  Serial.begin(rate);
+  baudRate = rate;
+  inputBuffer = "";
+  binLen = 0;
+}
+
 // Regulator PID
 void PID(){
   float error = distance - distance_point;
@@ -48,8 +137,13 @@ void PID(){
   if (output > maxOut) output = maxOut;
   if (output < minOut) output = minOut;
   
-  // Telemetria w trybie TEST
-  if(testMode){
+  // Telemetria w trybie TEST i EXAM (strojenie online przerywa słabe próby)
+  bool telemetry = testMode || examMode;
+  if(telemetry && binaryMode){
+    int16_t packed[3] = {clamp16(distance * 100), clamp16(error * 100), clamp16(output * 100)};
+    sendFrame(FRAME_BEAM, (uint8_t*)packed, sizeof(packed));
+  }
+  else if(telemetry){
     Serial.print(distance);
     Serial.print(" : ");
     Serial.print(error);
@@ -87,6 +181,28 @@ bool validateFrame(String frame){
   return receivedChecksum == calculatedChecksum;
 }
 
+// Numer sekwencyjny ramki (CMD|checksum|@seq) - pusty dla starych klientów
+String extractSeq(String frame){
+  int at = frame.indexOf("|@");
+  if(at == -1) return "";
+  return frame.substring(at);
+}
+
+// Ramka tekstowa: "msg#" w ASCII lub FRAME_TEXT w trybie binarnym
+void sendText(String msg){
+  if(binaryMode){
+    sendFrame(FRAME_TEXT, (const uint8_t*)msg.c_str(), msg.length());
+  } else{
+    Serial.print(msg);
+    Serial.println("#");
+  }
+}
+
+// Odpowiedź z echem numeru sekwencyjnego
+void reply(String msg){
+  sendText(msg + seqTag);
+}
+
 // Parsowanie komendy CFG
 void applyConfig(String cfgBody){
   int pos = 0;
@@ -117,29 +233,29 @@ void parseCommand(String frame){
   if(cmd.startsWith("CFG(")){
     String cfgBody = cmd.substring(4, cmd.length() - 1);
     applyConfig(cfgBody);
-    Serial.println("ACK#");
+    reply("ACK");
   }
   else if(cmd == "TEST_START"){
     testMode = true;
     examMode = false;
     integral = 0.0;
     previousError = 0.0;
-    Serial.println("ACK|TEST_MODE_ON#");
+    reply("ACK|TEST_MODE_ON");
   }
   else if(cmd == "TEST_STOP"){
     testMode = false;
-    Serial.println("ACK|TEST_MODE_OFF#");
+    reply("ACK|TEST_MODE_OFF");
   }
   else if(cmd.startsWith("SET_TARGET(")){
     String val = cmd.substring(11, cmd.length() - 1);
     distance_point = val.toFloat();
-    Serial.println("ACK|TARGET_SET#");
+    reply("ACK|TARGET_SET");
   }
   else if(cmd.startsWith("SET_SERVO_ZERO(")){
     String val = cmd.substring(15, cmd.length() - 1);
     servo_zero = val.toInt();
     myservo.write(servo_zero);
-    Serial.println("ACK|SERVO_ZERO_SET#");
+    reply("ACK|SERVO_ZERO_SET");
   }
   else if(cmd == "EXAM_START"){
     examMode = true;
@@ -150,35 +266,90 @@ void parseCommand(String frame){
     previousError = 0.0;
     errorSum = 0.0;
     errorCount = 0;
-    Serial.println("ACK|EXAM_STARTED#");
+    reply("ACK|EXAM_STARTED");
+  }
+  else if(cmd == "EXAM_STOP"){
+    examMode = false;
+    stabilizationPhase = false;
+    integral = 0.0;
+    previousError = 0.0;
+    myservo.write(servo_zero);
+    reply("ACK|EXAM_STOPPED");
   }
   else if(cmd == "PING"){
-    Serial.println("ACK|PONG#");
+    reply("ACK|PONG");
+  }
+  else if(cmd.startsWith("BAUD ")){
+    long rate = cmd.substring(5).toInt();
+    if(!baudAllowed(rate)){
+      reply("NACK|BAD_BAUD");
+    } else{
+      reply("ACK|BAUD=" + String(rate));
+      if(previousBaud == 0) previousBaud = baudRate;
+      baudSwitchTime = millis();
+      switchBaud(rate);
+    }
+  }
+  else if(cmd == "BAUD_OK"){
+    previousBaud = 0;
+    reply("ACK|BAUD_OK=" + String(baudRate));
+  }
+  else if(cmd.startsWith("ECHO ")){
+    reply("ACK|ECHO=" + cmd.substring(5));
   }
   else if(cmd == "STATUS"){
-    Serial.print("ACK|KP:");
-    Serial.print(kp);
-    Serial.print(",KI:");
-    Serial.print(ki);
-    Serial.print(",KD:");
-    Serial.print(kd);
-    Serial.print(",DIST_POINT:");
-    Serial.print(distance_point);
-    Serial.print(",SERVO_ZERO:");
-    Serial.print(servo_zero);
-    Serial.print(",T:");
-    Serial.print(t);
-    Serial.println("#");
+    reply("ACK|KP:" + String(kp) +
+          ",KI:" + String(ki) +
+          ",KD:" + String(kd) +
+          ",DIST_POINT:" + String(distance_point) +
+          ",SERVO_ZERO:" + String(servo_zero) +
+          ",T:" + String(t));
   }
   else if(cmd == "READ_DISTANCE"){
     float dist = get_dist(100);
-    Serial.print("ACK|DIST:");
-    Serial.print(dist, 2);
-    Serial.println("#");
+    reply("ACK|DIST:" + String(dist, 2));
+  }
+  else if(cmd == "BIN_ON"){
+    reply("ACK|BIN_ON");   // potwierdzenie jeszcze tekstowo
+    binaryMode = true;
+    binLen = 0;
+  }
+  else if(cmd == "BIN_OFF"){
+    reply("ACK|BIN_OFF");  // potwierdzenie już binarnie
+    binaryMode = false;
+    inputBuffer = "";
   }
   else{
-    Serial.println("NACK|UNKNOWN_CMD#");
+    reply("NACK|UNKNOWN_CMD");
+  }
+}
+
+// Obsługa kompletnej ramki CMD|checksum[|@seq]
+void handleFrame(String frame){
+  seqTag = extractSeq(frame);
+  if(validateFrame(frame)){
+    parseCommand(frame);
+  } else{
+    reply("NACK|BAD_CHECKSUM");
   }
+  seqTag = "";
+}
+
+// Bajt w trybie binarnym - ramka kończy się na 0x00
+void handleBinaryByte(uint8_t c){
+  if(c != 0){
+    if(binLen < BIN_BUFFER_SIZE) binBuffer[binLen] = c;
+    if(binLen <= BIN_BUFFER_SIZE) binLen++;   // nasycenie: za długa ramka nie zawija uint8_t
+    return;
+  }
+  uint8_t n = (binLen <= BIN_BUFFER_SIZE) ? cobsDecode(binBuffer, binLen) : 0;
+  binLen = 0;
+  if(n < 2 || crc8(binBuffer, n - 1) != binBuffer[n - 1] || binBuffer[0] != FRAME_TEXT){
+    reply("NACK|BAD_CHECKSUM");
+    return;
+  }
+  binBuffer[n - 1] = 0;  // CRC -> terminator napisu
+  handleFrame(String((char*)(binBuffer + 1)));
 }
 
 void setup() {
@@ -190,15 +361,19 @@ void setup() {
 }
 
 void loop() {
+  // Nowa prędkość niezatwierdzona przez BAUD_OK - powrót do poprzedniej
+  if(previousBaud != 0 && millis() - baudSwitchTime >= BAUD_CONFIRM_MS){
+    switchBaud(previousBaud);
+    previousBaud = 0;
+  }
+
   // Obsługa komunikacji
   while(Serial.available()){
     char c = Serial.read();
-    if(c == '#'){
-      if(validateFrame(inputBuffer)){
-        parseCommand(inputBuffer);
-      } else{
-        Serial.println("NACK|BAD_CHECKSUM#");
-      }
+    if(binaryMode){
+      handleBinaryByte((uint8_t)c);
+    } else if(c == '#'){
+      handleFrame(inputBuffer);
       inputBuffer = "";
     } else{
       inputBuffer += c;
@@ -232,9 +407,7 @@ void loop() {
         unsigned long stabilizationTime = millis() - stabilizationStartTime;
         if(stabilizationTime >= 3000){
           float mae = (errorCount > 0) ? (errorSum / errorCount) : 0.0;
-          Serial.print("RESULT|MAE:");
-          Serial.print(mae, 2);
-          Serial.println("#");
+          sendText("RESULT|MAE:" + String(mae, 2));
           examMode = false;
           stabilizationPhase = false;
           integral = 0.0;
@@ -0,0 +1,165 @@
+"""
+Robot Batch
+Tryb nieinteraktywny: komendy z argumentów, pliku albo stdin, kod wyjścia
+
+Komendy idą w ramkach jak z RobotInterface.send_batch (potokowo, do --window
+bez potwierdzenia). Skrypt: jedna komenda firmware na linię, '#' na początku
+linii - komentarz, '@sleep s' - wysłanie dotychczasowych komend i pauza.
+Po błędzie w paczce dalsze paczki nie są wysyłane (chyba że --keep-going).
+
+    python RobotBatch.py --port COM3 "Kp 20" "Kd 5"
+    python RobotBatch.py --port /dev/ttyUSB0 -f nastawy.txt --json
+    echo STATUS | ROBOT_PORT=COM3 python RobotBatch.py
+
+Kody wyjścia: 0 - wszystkie komendy z ACK, 1 - NACK / brak odpowiedzi,
+2 - błędne argumenty lub skrypt, 3 - brak połączenia z robotem.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_CONNECT = 3
+
+
+def parse_script(lines):
+    """Linie skryptu -> [('cmd', tekst) | ('sleep', s)]; ValueError przy błędzie"""
+    steps = []
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('@'):
+            name, _, arg = line[1:].partition(' ')
+            if name != 'sleep':
+                raise ValueError(f"linia {n}: nieznana dyrektywa @{name}")
+            try:
+                steps.append(('sleep', float(arg)))
+            except ValueError:
+                raise ValueError(f"linia {n}: @sleep wymaga liczby sekund") from None
+            continue
+        if '#' in line:
+            raise ValueError(f"linia {n}: '#' kończy ramkę - niedozwolony w komendzie")
+        steps.append(('cmd', line))
+    return steps
+
+
+def batches(steps):
+    """Kolejne paczki komend wysyłane jednym send_batch, przedzielone pauzami"""
+    batch = []
+    for kind, value in steps:
+        if kind == 'cmd':
+            batch.append(value)
+            continue
+        if batch:
+            yield batch, 0
+            batch = []
+        yield [], value
+    if batch:
+        yield batch, 0
+
+
+def run(robot, steps, args):
+    """Wysłanie skryptu; zwraca [(komenda, odpowiedź lub None)]"""
+    results = []
+    for cmds, pause in batches(steps):
+        if pause:
+            time.sleep(pause)
+            continue
+        responses = robot.send_batch(cmds, retries=args.retries, window=args.window)
+        results.extend(zip(cmds, responses))
+        if not all(responses) and not args.keep_going:
+            break
+    return results
+
+
+def read_lines(args):
+    if args.file == '-':
+        return sys.stdin.read().splitlines()
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            return f.read().splitlines()
+    if args.commands:
+        return args.commands
+    if not sys.stdin.isatty():
+        return sys.stdin.read().splitlines()
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nieinteraktywne wysyłanie komend do robota")
+    parser.add_argument('commands', nargs='*', metavar='CMD', help="komendy firmware, np. \"Kp 20\"")
+    parser.add_argument('--port', default=os.environ.get('ROBOT_PORT'),
+                        help="port (domyślnie zmienna ROBOT_PORT)")
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('-f', '--file', help="plik skryptu ('-' - stdin)")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--window', type=int, help="ramek bez potwierdzenia (domyślnie BATCH_WINDOW)")
+    parser.add_argument('--timeout', type=float, help="stały czas na odpowiedź [s] (domyślnie adaptacyjny)")
+    parser.add_argument('--keep-going', action='store_true',
+                        help="po błędzie wysyłaj dalsze paczki (po @sleep)")
+    parser.add_argument('--binary', action='store_true', help="ramki binarne (BIN_ON)")
+    parser.add_argument('--negotiate', action='store_true', help="podniesienie prędkości łącza")
+    parser.add_argument('--reset', action='store_true', help="reset Arduino przy otwarciu portu")
+    parser.add_argument('--log', metavar='KATALOG', help="zapis logu komunikacji")
+    parser.add_argument('--json', action='store_true', help="wynik jako JSON")
+    parser.add_argument('-q', '--quiet', action='store_true', help="bez komunikatów na stderr")
+    args = parser.parse_args(argv)
+
+    if not args.port:
+        parser.error("wymagany --port (albo zmienna ROBOT_PORT)")
+    try:
+        steps = parse_script(read_lines(args))
+    except (OSError, ValueError) as e:
+        print(f"Błąd skryptu: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not any(kind == 'cmd' for kind, _ in steps):
+        parser.error("brak komend (argumenty, -f plik albo stdin)")
+
+    # Import dopiero po sprawdzeniu argumentów (pyserial, wątki, ...)
+    from ArduinoRobotPython import RobotInterface, BATCH_WINDOW
+    args.window = args.window or BATCH_WINDOW
+
+    start = time.monotonic()
+    chatter = open(os.devnull, 'w') if args.quiet else contextlib.nullcontext(sys.stderr)
+    # Komunikaty biblioteki na stderr - stdout zostaje dla wyników
+    with chatter as out, contextlib.redirect_stdout(out):
+        robot = RobotInterface(telemetry_buffer=False)
+        if not robot.connect(args.port, args.baud, binary=args.binary,
+                             fast=not args.reset, negotiate=args.negotiate) or not robot.connected:
+            robot.disconnect()
+            return EXIT_CONNECT
+        if args.timeout:
+            robot.timeout = args.timeout
+        if args.log:
+            robot.open_log(args.log)
+        try:
+            results = run(robot, steps, args)
+        finally:
+            robot.close_log()
+            robot.disconnect()
+
+    failed = sum(1 for _, response in results if response is None)
+    failed += sum(1 for kind, _ in steps if kind == 'cmd') - len(results)   # niewysłane
+    if args.json:
+        print(json.dumps({
+            'port': args.port,
+            'results': [{'cmd': cmd, 'response': response, 'ok': response is not None}
+                        for cmd, response in results],
+            'failed': failed,
+            'elapsed': round(time.monotonic() - start, 3),
+        }, ensure_ascii=False))
+    else:
+        for cmd, response in results:
+            print(f"{cmd}\t{response if response is not None else 'FAIL'}")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,951 @@
+"""
+Robot Simulator
+Symulator firmware (software-in-the-loop) - klienci działają bez robota
+
+Profile:
+  beam - RobotArduino.ino (pochylnia: CFG, TEST_*, EXAM_START, SET_*, ...)
+  line - LineFollowerPID.ino (P/S, Kp/Ki/Kd/Vref/T, TELEMETRY_*, CALIBRATE)
+  wall - WallApproachFuzzy.ino (START/STOP, KP_L.., VMAX, tablica FZ_*)
+
+Użycie:
+  robot.connect("sim://line?speed=20")           - w tym samym procesie
+  robot.connect("sim://line?reset=1")            - port otwierany w trakcie bootowania
+  robot.connect("sim://line?maxbaud=115200")     - łącze psujące bajty powyżej 115200
+  python RobotSimulator.py --profile beam --speed 10
+                                                  - pty dla dowolnego klienta
+"""
+
+import argparse
+import math
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+import BinaryProtocol
+
+SIM_SCHEME = "sim://"
+PHYSICS_DT = 0.002          # krok całkowania modelu obiektu [s]
+BOOT_TIME = 1.0             # setup() firmware przed pierwszą komendą [s]
+BOOTLOADER_TIME = 0.5       # bajty odebrane w tym czasie zjada bootloader [s]
+MAX_ADVANCE = 60.0          # maks. czas wirtualny jednego kroku transportu [s]
+SERIAL_BAUD_RATE = 9600
+BAUD_RATES = (9600, 19200, 38400, 57600, 115200, 250000, 500000)
+BAUD_CONFIRM = 1.0          # bez BAUD_OK powrót do poprzedniej prędkości [s]
+BIN_BUFFER_SIZE = 72
+_LEADING_INT = re.compile(r"\s*([-+]?\d+)")
+
+
+def checksum(cmd):
+    return sum(ord(c) for c in cmd) % 256
+
+
+def to_int(text):
+    """String.toInt() z Arduino: liczba z początku napisu, inaczej 0"""
+    match = _LEADING_INT.match(text)
+    return int(match.group(1)) if match else 0
+
+
+def to_float(text):
+    """String.toFloat() z Arduino"""
+    match = re.match(r"\s*([-+]?\d*\.?\d*)", text)
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return 0.0
+
+
+def validate_frame(frame):
+    sep = frame.find('|')
+    if sep == -1:
+        return False
+    return to_int(frame[sep + 1:]) == checksum(frame[:sep])
+
+
+class FirmwareSim:
+    """Wspólna część firmware: ramki, suma kontrolna, |@seq, tryb binarny.
+
+    Czas jest wirtualny - advance(dt) przesuwa model obiektu i pętlę
+    sterowania, więc symulacja może iść dowolnie szybciej niż zegar."""
+
+    IGNORE_CRLF = False
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.output = bytearray()
+        self.binary_mode = False
+        self.seq_tag = ""
+        self.busy_until = BOOT_TIME
+        self.frames = 0
+        self.bad_frames = 0
+        self._input = bytearray()
+        self._text = ""
+        self._bin = bytearray()
+        self._next_control = BOOT_TIME
+        self._deferred = []     # (czas, wiadomość, seq_tag)
+        # Prędkość UART; wyjście wysłane przed zmianą zostaje przy starej
+        self.baud = SERIAL_BAUD_RATE
+        self._previous_baud = None
+        self._baud_deadline = 0.0
+        self._sent = []         # (prędkość, bajty)
+
+    # ----------------------------- czas -----------------------------
+
+    def advance(self, dt):
+        end = self.now + dt
+        while True:
+            if self._previous_baud and self.now >= self._baud_deadline:
+                self.switch_baud(self._previous_baud)
+                self._previous_baud = None
+            if self.now >= self.busy_until:
+                self._flush_deferred()
+                self._process_input()
+            if self.now >= end:
+                break
+            step = min(PHYSICS_DT, end - self.now)
+            self.step_plant(step)
+            self.now += step
+            if self.now >= self._next_control and self.now >= self.busy_until:
+                self._next_control = self.now + self.control_period()
+                self.control()
+
+    def _flush_deferred(self):
+        while self._deferred and self._deferred[0][0] <= self.now:
+            _, msg, tag = self._deferred.pop(0)
+            self.seq_tag = tag
+            self.reply(msg)
+            self.seq_tag = ""
+
+    # ----------------------------- wejście -----------------------------
+
+    def feed(self, data):
+        if self.now < BOOTLOADER_TIME:
+            return
+        self._input += data
+
+    def _process_input(self):
+        i = 0
+        while i < len(self._input) and self.now >= self.busy_until:
+            c = self._input[i]
+            i += 1
+            if self.binary_mode:
+                self._binary_byte(c)
+            elif c == ord('#'):
+                frame, self._text = self._text, ""
+                self.handle_frame(frame)
+            elif not (self.IGNORE_CRLF and c in b'\r\n'):
+                self._text += chr(c)
+        del self._input[:i]
+
+    def _binary_byte(self, c):
+        if c != 0:
+            self._bin.append(c)
+            return
+        packet, self._bin = bytes(self._bin), bytearray()
+        try:
+            if len(packet) > BIN_BUFFER_SIZE:
+                raise ValueError("Za długa ramka")
+            ftype, payload = BinaryProtocol.decode_frame(packet)
+            if ftype != BinaryProtocol.FRAME_TEXT:
+                raise ValueError("Nie ramka tekstowa")
+        except ValueError:
+            self.reply("NACK|BAD_CHECKSUM")
+            return
+        self.handle_frame(payload.decode('ascii', errors='replace'))
+
+    def handle_frame(self, frame):
+        self.frames += 1
+        at = frame.find("|@")
+        self.seq_tag = frame[at:] if at != -1 else ""
+        if validate_frame(frame):
+            cmd = frame[:frame.find('|')]
+            if not self.link_command(cmd):
+                self.parse_command(cmd)
+        else:
+            self.bad_frames += 1
+            self.reply("NACK|BAD_CHECKSUM")
+        self.seq_tag = ""
+
+    def set_binary(self, on):
+        """BIN_ON: ACK jeszcze tekstowo; BIN_OFF: ACK już binarnie"""
+        if on:
+            self.reply("ACK|BIN_ON")
+            self.binary_mode = True
+            self._bin = bytearray()
+        else:
+            self.reply("ACK|BIN_OFF")
+            self.binary_mode = False
+            self._text = ""
+
+    def link_command(self, cmd):
+        """BAUD / BAUD_OK / ECHO - wspólne dla wszystkich firmware"""
+        if cmd.startswith("BAUD "):
+            rate = to_int(cmd[5:])
+            if rate not in BAUD_RATES:
+                self.reply("NACK|BAD_BAUD")
+                return True
+            self.reply(f"ACK|BAUD={rate}")  # jeszcze na starej prędkości
+            if self._previous_baud is None:
+                self._previous_baud = self.baud
+            self._baud_deadline = self.now + BAUD_CONFIRM
+            self.switch_baud(rate)
+        elif cmd == "BAUD_OK":
+            self._previous_baud = None
+            self.reply(f"ACK|BAUD_OK={self.baud}")
+        elif cmd.startswith("ECHO "):
+            self.reply("ACK|ECHO=" + cmd[5:])
+        else:
+            return False
+        return True
+
+    def switch_baud(self, rate):
+        """Serial.flush() + Serial.begin(rate); bufory wejścia wyczyszczone"""
+        if self.output:
+            self._sent.append((self.baud, bytes(self.output)))
+            self.output = bytearray()
+        self.baud = rate
+        self._text = ""
+        self._bin = bytearray()
+
+    # ----------------------------- wyjście -----------------------------
+
+    def send_text(self, msg):
+        if self.binary_mode:
+            self.output += BinaryProtocol.encode_text(msg)
+        else:
+            self.output += (msg + "#\r\n").encode()
+
+    def reply(self, msg):
+        self.send_text(msg + self.seq_tag)
+
+    def send_telemetry(self, text, ftype, packed):
+        if self.binary_mode:
+            self.output += BinaryProtocol.encode_frame(ftype, packed)
+        else:
+            self.output += (text + "\r\n").encode()
+
+    def take_output(self):
+        return b"".join(data for _, data in self.take_output_chunks())
+
+    def take_output_chunks(self):
+        """[(prędkość, bajty)] - do symulacji łącza o innej prędkości"""
+        chunks, self._sent = self._sent, []
+        if self.output:
+            chunks.append((self.baud, bytes(self.output)))
+            self.output = bytearray()
+        return chunks
+
+    # ----------------------------- do nadpisania -----------------------------
+
+    def control_period(self):
+        raise NotImplementedError
+
+    def control(self):
+        raise NotImplementedError
+
+    def step_plant(self, dt):
+        raise NotImplementedError
+
+    def parse_command(self, cmd):
+        raise NotImplementedError
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def clamp16(value):
+    return int(clamp(value, -32768, 32767))
+
+
+class ExamMixin:
+    """Tryb egzaminacyjny jak w RobotArduino.ino: 10 s dojazd + 3 s MAE"""
+
+    def start_exam(self):
+        self.exam_mode = True
+        self.exam_start = self.now
+        self.stabilization_phase = False
+        self.error_sum = 0.0
+        self.error_count = 0
+
+    def stop_exam(self):
+        self.exam_mode = False
+        self.stabilization_phase = False
+
+    def accumulate_exam(self, error):
+        if self.stabilization_phase:
+            self.error_sum += abs(error)
+            self.error_count += 1
+
+    def update_exam(self):
+        """Wywoływane po PID w każdym cyklu; True gdy egzamin się skończył"""
+        if not self.exam_mode:
+            return False
+        if self.now - self.exam_start >= 10.0 and not self.stabilization_phase:
+            self.stabilization_phase = True
+            self.stabilization_start = self.now
+            self.error_sum = 0.0
+            self.error_count = 0
+        if self.stabilization_phase and self.now - self.stabilization_start >= 3.0:
+            mae = self.error_sum / self.error_count if self.error_count else 0.0
+            self.send_text(f"RESULT|MAE:{mae:.2f}")
+            self.last_mae = mae
+            self.exam_mode = False
+            self.stabilization_phase = False
+            return True
+        return False
+
+
+class BeamSim(ExamMixin, FirmwareSim):
+    """RobotArduino.ino - kulka na pochylni z serwem i czujnikiem IR"""
+
+    SERVO_LEVEL = 95.0      # kąt serwa, przy którym belka jest pozioma
+    BEAM_RATIO = 0.1        # kąt belki / kąt serwa
+    SERVO_TAU = 0.05        # stała czasowa serwa [s]
+    FRICTION = 0.5          # tłumienie toczenia [1/s]
+    RANGE = (5.0, 45.0)     # zakres ruchu kulki [cm]
+    NOISE = 0.15            # szum czujnika IR [cm]
+
+    def __init__(self, seed=0):
+        super().__init__(seed)
+        self.kp = self.ki = self.kd = 0.0
+        self.integral = 0.0
+        self.previous_error = 0.0
+        self.distance_point = 0.0
+        self.servo_zero = 95
+        self.t = 100
+        self.distance = 0.0
+        self.test_mode = False
+        self.exam_mode = False
+        self.stabilization_phase = False
+        self.last_mae = None
+        # Obiekt: położenie i prędkość kulki, kąt serwa
+        self.x = 30.0
+        self.v = 0.0
+        self.servo = float(self.servo_zero)
+        self.servo_cmd = float(self.servo_zero)
+
+    def get_dist(self):
+        return self.x + self.rng.gauss(0.0, self.NOISE)
+
+    def step_plant(self, dt):
+        self.servo += (self.servo_cmd - self.servo) * min(1.0, dt / self.SERVO_TAU)
+        theta = math.radians((self.servo - self.SERVO_LEVEL) * self.BEAM_RATIO)
+        # Dodatni kąt serwa podnosi belkę - kulka toczy się do czujnika
+        self.v += (-5.0 / 7.0 * 981.0 * math.sin(theta) - self.FRICTION * self.v) * dt
+        self.x += self.v * dt
+        low, high = self.RANGE
+        if self.x < low or self.x > high:
+            self.x = clamp(self.x, low, high)
+            self.v = 0.0
+
+    def control_period(self):
+        return self.t / 1000.0 + 0.001    # millis() > myTime + t
+
+    def pid(self):
+        dt = self.t / 1000.0
+        error = self.distance - self.distance_point
+        self.integral += error * dt
+        derivative = (error - self.previous_error) / dt
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        output = clamp(output, -float(self.servo_zero), 180.0 - self.servo_zero)
+        if self.test_mode or self.exam_mode:
+            text = f"{self.distance:.2f} : {error:.2f} : {output:.2f}"
+            packed = BinaryProtocol.BEAM_STRUCT.pack(
+                clamp16(self.distance * 100), clamp16(error * 100), clamp16(output * 100))
+            self.send_telemetry(text, BinaryProtocol.FRAME_BEAM, packed)
+        self.accumulate_exam(error)
+        self.previous_error = error
+        self.servo_cmd = clamp(self.servo_zero + int(output), 0, 180)
+
+    def control(self):
+        self.distance = self.get_dist()
+        if self.test_mode or self.exam_mode:
+            self.pid()
+        if self.update_exam():
+            self.integral = 0.0
+            self.previous_error = 0.0
+            self.servo_cmd = self.servo_zero
+
+    def parse_command(self, cmd):
+        if cmd.startswith("CFG("):
+            for item in cmd[4:-1].split(','):
+                key, _, val = item.partition('=')
+                if key == "KP": self.kp = to_float(val)
+                elif key == "KI": self.ki = to_float(val)
+                elif key == "KD": self.kd = to_float(val)
+                elif key == "DIST_POINT": self.distance_point = to_float(val)
+                elif key == "SERVO_ZERO": self.servo_zero = to_int(val)
+                elif key == "T": self.t = to_int(val)
+            self.reply("ACK")
+        elif cmd == "TEST_START":
+            self.test_mode = True
+            self.exam_mode = False
+            self.integral = 0.0
+            self.previous_error = 0.0
+            self.reply("ACK|TEST_MODE_ON")
+        elif cmd == "TEST_STOP":
+            self.test_mode = False
+            self.reply("ACK|TEST_MODE_OFF")
+        elif cmd.startswith("SET_TARGET("):
+            self.distance_point = to_float(cmd[11:-1])
+            self.reply("ACK|TARGET_SET")
+        elif cmd.startswith("SET_SERVO_ZERO("):
+            self.servo_zero = to_int(cmd[15:-1])
+            self.servo_cmd = self.servo_zero
+            self.reply("ACK|SERVO_ZERO_SET")
+        elif cmd == "EXAM_START":
+            self.test_mode = False
+            self.integral = 0.0
+            self.previous_error = 0.0
+            self.start_exam()
+            self.reply("ACK|EXAM_STARTED")
+        elif cmd == "EXAM_STOP":
+            self.stop_exam()
+            self.integral = 0.0
+            self.previous_error = 0.0
+            self.servo_cmd = self.servo_zero
+            self.reply("ACK|EXAM_STOPPED")
+        elif cmd == "PING":
+            self.reply("ACK|PONG")
+        elif cmd == "STATUS":
+            self.reply(f"ACK|KP:{self.kp:.2f},KI:{self.ki:.2f},KD:{self.kd:.2f},"
+                       f"DIST_POINT:{self.distance_point:.2f},SERVO_ZERO:{self.servo_zero},T:{self.t}")
+        elif cmd == "READ_DISTANCE":
+            self.reply(f"ACK|DIST:{self.get_dist():.2f}")
+        elif cmd in ("BIN_ON", "BIN_OFF"):
+            self.set_binary(cmd == "BIN_ON")
+        else:
+            self.reply("NACK|UNKNOWN_CMD")
+
+
+class LineSim(FirmwareSim):
+    """LineFollowerPID.ino - robot różnicowy na torze z zakrętami"""
+
+    IGNORE_CRLF = True
+    MAX_INTEGRAL = 1000.0
+    MIN_PWM = 30
+    MAX_PWM = 255
+    ALPHA = 0.7
+    TELEMETRY_INTERVAL = 0.2
+    KV = 2.0                # prędkość koła [mm/s] na jednostkę PWM
+    MOTOR_TAU = 0.08        # stała czasowa silnika [s]
+    TRACK_WIDTH = 130.0     # rozstaw kół [mm]
+    SENSOR_HALF = 30.0      # połowa szerokości listwy czujników [mm]
+    TICKS_PER_MM = 0.1
+    # Tor: (długość [mm], krzywizna [1/mm]) - powtarzany w kółko
+    TRACK = ((800.0, 0.0), (785.4, 1 / 500.0), (400.0, 0.0),
+             (1256.6, -1 / 400.0), (600.0, 0.0), (785.4, 1 / 500.0))
+
+    def __init__(self, seed=0):
+        super().__init__(seed)
+        self.kp, self.ki, self.kd = 60.0, 0.0, 12.0
+        self.vref = 70
+        self.t_sample = 100
+        self.line_follow = False
+        self.telemetry = False
+        self.integral = 0.0
+        self.previous_error = 0.0
+        self.filtered_derivative = 0.0
+        self.last_telemetry = 0.0
+        self.enc_l = self.enc_r = 0.0
+        # Obiekt: odsunięcie od linii [mm], kąt [rad], droga [mm], koła [mm/s]
+        self.y = 0.0
+        self.psi = 0.0
+        self.s = 0.0
+        self.v_l = self.v_r = 0.0
+        self.pwm_l = self.pwm_r = 0
+        self._deferred.append((BOOT_TIME, "ACK|READY", ""))
+
+    def reply(self, msg):
+        self.send_text(f"{msg}|{checksum(msg)}{self.seq_tag}")
+
+    def curvature(self):
+        total = sum(length for length, _ in self.TRACK)
+        s = self.s % total
+        for length, kappa in self.TRACK:
+            if s < length:
+                return kappa
+            s -= length
+        return 0.0
+
+    def step_plant(self, dt):
+        k = min(1.0, dt / self.MOTOR_TAU)
+        self.v_l += (self.KV * self.pwm_l - self.v_l) * k
+        self.v_r += (self.KV * self.pwm_r - self.v_r) * k
+        v = (self.v_l + self.v_r) / 2
+        omega = (self.v_r - self.v_l) / self.TRACK_WIDTH
+        self.y += v * math.sin(self.psi) * dt
+        self.psi += (omega - v * self.curvature()) * dt
+        self.s += v * math.cos(self.psi) * dt
+        self.enc_l += abs(self.v_l) * dt * self.TICKS_PER_MM
+        self.enc_r += abs(self.v_r) * dt * self.TICKS_PER_MM
+
+    def line_detected(self):
+        return abs(self.y) < self.SENSOR_HALF + 10.0
+
+    def read_line(self):
+        # Czujniki ustawione tak, że POS > 2000 -> skręt w lewo jak w firmware
+        pos = 2000.0 - 2000.0 * self.y / self.SENSOR_HALF + self.rng.gauss(0.0, 20.0)
+        return int(clamp(pos, 0, 4000))
+
+    def set_motors(self, left, right):
+        self.pwm_l, self.pwm_r = left, right
+
+    def control_period(self):
+        return self.t_sample / 1000.0
+
+    def control(self):
+        if not self.line_follow:
+            self.set_motors(0, 0)
+            return
+        if not self.line_detected():
+            self.set_motors(0, 0)
+            self.previous_error = 0.0
+            self.integral = 0.0
+            self.filtered_derivative = 0.0
+            return
+        position = self.read_line()
+        error = (position - 2000.0) / 2000.0
+        dt = self.t_sample / 1000.0
+        self.integral = clamp(self.integral + error * dt, -self.MAX_INTEGRAL, self.MAX_INTEGRAL)
+        derivative = (error - self.previous_error) / dt
+        self.filtered_derivative = self.ALPHA * derivative + (1 - self.ALPHA) * self.filtered_derivative
+        output = self.kp * error + self.ki * self.integral + self.kd * self.filtered_derivative
+        left = int(clamp(self.vref - int(output), -self.MAX_PWM, self.MAX_PWM))
+        right = int(clamp(self.vref + int(output), -self.MAX_PWM, self.MAX_PWM))
+        if 0 < left < self.MIN_PWM: left = self.MIN_PWM
+        if -self.MIN_PWM < left < 0: left = -self.MIN_PWM
+        if 0 < right < self.MIN_PWM: right = self.MIN_PWM
+        if -self.MIN_PWM < right < 0: right = -self.MIN_PWM
+        self.set_motors(left, right)
+        if self.telemetry and self.now - self.last_telemetry >= self.TELEMETRY_INTERVAL:
+            enc_l, enc_r = int(self.enc_l), int(self.enc_r)
+            text = (f"POS:{position} ERR:{error:.3f} OUT:{output:.2f} L:{left} R:{right} "
+                    f"ENC_L:{enc_l} ENC_R:{enc_r}")
+            packed = BinaryProtocol.LINE_STRUCT.pack(
+                position, clamp16(error * 10000), clamp16(output * 100),
+                left, right, clamp16(enc_l), clamp16(enc_r))
+            self.send_telemetry(text, BinaryProtocol.FRAME_LINE, packed)
+            self.enc_l = self.enc_r = 0.0
+            self.last_telemetry = self.now
+        self.previous_error = error
+
+    def parse_command(self, cmd):
+        cmd = cmd.strip()
+        if cmd == "P":
+            self.line_follow = True
+            self.integral = 0.0
+            self.previous_error = 0.0
+            self.filtered_derivative = 0.0
+            self.enc_l = self.enc_r = 0.0
+            self.reply("ACK|LINE_FOLLOW_ON")
+        elif cmd == "S":
+            self.line_follow = False
+            self.set_motors(0, 0)
+            self.reply("ACK|LINE_FOLLOW_OFF")
+        elif cmd.startswith("Kp "):
+            self.kp = to_float(cmd[3:])
+            self.reply(f"ACK|Kp={self.kp:.2f}")
+        elif cmd.startswith("Ki "):
+            self.ki = to_float(cmd[3:])
+            self.integral = 0.0
+            self.reply(f"ACK|Ki={self.ki:.2f}")
+        elif cmd.startswith("Kd "):
+            self.kd = to_float(cmd[3:])
+            self.reply(f"ACK|Kd={self.kd:.2f}")
+        elif cmd.startswith("Vref "):
+            self.vref = int(clamp(to_int(cmd[5:]), 0, self.MAX_PWM))
+            self.reply(f"ACK|Vref={self.vref}")
+        elif cmd.startswith("T "):
+            self.t_sample = int(clamp(to_int(cmd[2:]), 50, 300))
+            self.reply(f"ACK|T_sample={self.t_sample}")
+        elif cmd == "TELEMETRY_ON":
+            self.telemetry = True
+            self.reply("ACK|TELEMETRY_ON")
+        elif cmd == "TELEMETRY_OFF":
+            self.telemetry = False
+            self.reply("ACK|TELEMETRY_OFF")
+        elif cmd == "STATUS":
+            self.reply(f"ACK|Kp:{self.kp:.2f},Ki:{self.ki:.2f},Kd:{self.kd:.2f},"
+                       f"Vref:{self.vref},T:{self.t_sample},Mode:{'ON' if self.line_follow else 'OFF'}")
+        elif cmd == "CALIBRATE":
+            # Firmware blokuje się na 5 s (delay + kalibracja)
+            self.reply("ACK|CALIBRATE_START")
+            self.busy_until = self.now + 5.1
+            self._deferred.append((self.busy_until, "ACK|CALIBRATION_DONE", self.seq_tag))
+        elif cmd in ("BIN_ON", "BIN_OFF"):
+            self.set_binary(cmd == "BIN_ON")
+        elif cmd == "PING":
+            self.reply("ACK|PONG")
+        elif cmd == "READ_LINE":
+            self.reply(f"ACK|POS:{self.read_line()}")
+        else:
+            self.reply("NACK|UNKNOWN_CMD")
+
+
+class WallSim(ExamMixin, FirmwareSim):
+    """Projekt 4 - jazda do ściany (WallApproachFuzzy.ino): PID prędkości kół,
+    zadana prędkość proporcjonalna do uchybu albo z tablicy regulatora
+    rozmytego (FZ_*, FuzzyController.py)."""
+
+    KV = 0.25               # prędkość koła [cm/s] na jednostkę PWM
+    MOTOR_TAU = 0.1         # stała czasowa silnika [s]
+    RIGHT_GAIN = 0.95       # słabszy prawy silnik
+    K_APPROACH = 1.5        # zadana prędkość / odległość od celu [1/s]
+    START_DISTANCE = 100.0  # [cm]
+    TARGET = 20.0           # domyślny cel [cm]
+    T_SAMPLE = 50           # okres regulatora [ms]
+    NOISE = 0.2             # [cm]
+    FZ_MAX_CELLS = 576      # tablica regulatora rozmytego (int8)
+    FZ_ALPHA = 0.7          # filtr pochodnej uchybu
+
+    def __init__(self, seed=0):
+        super().__init__(seed)
+        self.fz_dim = None          # (n_e, n_de, e_min, e_max, de_min, de_max)
+        self.fz_table = bytearray()
+        self.fz_ready = False
+        self.fz_on = False
+        self.fz_de = 0.0
+        self.fz_previous = None
+        self.gains = {'L': [2.0, 0.5, 0.1], 'R': [2.0, 0.5, 0.1]}
+        self.vmax = 50.0
+        self.target = self.TARGET
+        self.t = self.T_SAMPLE
+        self.running = False
+        self.telemetry = False
+        self.exam_mode = False
+        self.stabilization_phase = False
+        self.last_mae = None
+        self.integral = {'L': 0.0, 'R': 0.0}
+        self.previous_error = {'L': 0.0, 'R': 0.0}
+        self.pwm = {'L': 0.0, 'R': 0.0}
+        self.wheel = {'L': 0.0, 'R': 0.0}
+        self.d = self.START_DISTANCE
+
+    def get_dist(self):
+        return self.d + self.rng.gauss(0.0, self.NOISE)
+
+    def step_plant(self, dt):
+        k = min(1.0, dt / self.MOTOR_TAU)
+        self.wheel['L'] += (self.KV * self.pwm['L'] - self.wheel['L']) * k
+        self.wheel['R'] += (self.KV * self.RIGHT_GAIN * self.pwm['R'] - self.wheel['R']) * k
+        self.d -= (self.wheel['L'] + self.wheel['R']) / 2 * dt
+        if self.d < 2.0:    # zderzenie ze ścianą
+            self.d = 2.0
+            self.wheel = {'L': 0.0, 'R': 0.0}
+
+    def control_period(self):
+        return self.t / 1000.0
+
+    def reset_motion(self, distance=None):
+        self.integral = {'L': 0.0, 'R': 0.0}
+        self.previous_error = {'L': 0.0, 'R': 0.0}
+        self.pwm = {'L': 0.0, 'R': 0.0}
+        self.fz_de = 0.0
+        self.fz_previous = None
+        if distance is not None:
+            self.d = distance
+            self.wheel = {'L': 0.0, 'R': 0.0}
+
+    def control(self):
+        if not (self.running or self.exam_mode):
+            self.pwm = {'L': 0.0, 'R': 0.0}
+            return
+        dt = self.t / 1000.0
+        dist = self.get_dist()
+        error = dist - self.target
+        if self.fz_on:
+            if self.fz_previous is not None:
+                raw = (error - self.fz_previous) / dt
+                self.fz_de = self.FZ_ALPHA * self.fz_de + (1 - self.FZ_ALPHA) * raw
+            self.fz_previous = error
+            v_set = self.fuzzy_lookup(error, self.fz_de) * self.vmax
+        else:
+            v_set = clamp(self.K_APPROACH * error, -self.vmax, self.vmax)
+        for side in 'LR':
+            kp, ki, kd = self.gains[side]
+            e = v_set - self.wheel[side]
+            self.integral[side] += e * dt
+            derivative = (e - self.previous_error[side]) / dt
+            self.previous_error[side] = e
+            self.pwm[side] = clamp(kp * e + ki * self.integral[side] + kd * derivative, -255, 255)
+        if self.telemetry or self.exam_mode:
+            text = f"{dist:.2f} : {error:.2f} : {v_set:.2f}"
+            packed = BinaryProtocol.BEAM_STRUCT.pack(
+                clamp16(dist * 100), clamp16(error * 100), clamp16(v_set * 100))
+            self.send_telemetry(text, BinaryProtocol.FRAME_BEAM, packed)
+        self.accumulate_exam(error)
+        if self.update_exam():
+            self.reset_motion()
+
+    def fuzzy_lookup(self, e, de):
+        """Interpolacja dwuliniowa w tablicy int8 - jak w firmware"""
+        n_e, n_de, e0, e1, d0, d1 = self.fz_dim
+
+        def axis(x, low, high, n):
+            pos = clamp((x - low) * (n - 1) / (high - low), 0, n - 1)
+            i = min(int(pos), n - 2)
+            return i, pos - i
+
+        def cell(i, j):
+            v = self.fz_table[i * n_de + j]
+            return v - 256 if v > 127 else v
+
+        i, fx = axis(e, e0, e1, n_e)
+        j, fy = axis(de, d0, d1, n_de)
+        value = ((1 - fx) * ((1 - fy) * cell(i, j) + fy * cell(i, j + 1)) +
+                 fx * ((1 - fy) * cell(i + 1, j) + fy * cell(i + 1, j + 1)))
+        return value / 127.0
+
+    def fuzzy_command(self, name, cmd):
+        """FZ_DIM / FZ_LUT / FZ_CRC / FZ_ON / FZ_OFF"""
+        if name.startswith("FZ_DIM("):
+            args = cmd[7:-1].split(',')
+            n_e, n_de = (to_int(a) for a in (args + ['0', '0'])[:2])
+            limits = [to_float(a) for a in args[2:6]]
+            if (len(limits) < 4 or n_e < 2 or n_de < 2 or n_e * n_de > self.FZ_MAX_CELLS
+                    or limits[1] <= limits[0] or limits[3] <= limits[2]):
+                self.reply("NACK|FZ_SIZE")
+                return
+            self.fz_dim = (n_e, n_de, *limits)
+            self.fz_table = bytearray(n_e * n_de)
+            self.fz_ready = self.fz_on = False
+            self.reply(f"ACK|FZ_DIM={n_e}x{n_de}")
+        elif name == "FZ_LUT":
+            offset, _, data = cmd[7:].partition(' ')
+            offset = to_int(offset)
+            try:
+                chunk = bytes.fromhex(data)
+            except ValueError:
+                chunk = b""
+            if self.fz_dim is None:
+                self.reply("NACK|FZ_NO_DIM")
+            elif not chunk or offset < 0 or offset + len(chunk) > len(self.fz_table):
+                self.reply("NACK|FZ_RANGE")
+            else:
+                self.fz_table[offset:offset + len(chunk)] = chunk
+                self.fz_ready = self.fz_on = False
+                self.reply(f"ACK|FZ_LUT={offset}")
+        elif name == "FZ_CRC":
+            self.fz_ready = (self.fz_dim is not None and
+                             BinaryProtocol.crc8(self.fz_table) == to_int(cmd[7:]))
+            self.reply("ACK|FZ_READY" if self.fz_ready else "NACK|FZ_CRC")
+        elif name == "FZ_ON":
+            if not self.fz_ready:
+                self.reply("NACK|FZ_NOT_READY")
+                return
+            self.fz_on = True
+            self.fz_de = 0.0
+            self.fz_previous = None
+            self.reply("ACK|FZ_ON")
+        elif name == "FZ_OFF":
+            self.fz_on = False
+            self.reply("ACK|FZ_OFF")
+        else:
+            self.reply("NACK|UNKNOWN_CMD")
+
+    def parse_command(self, cmd):
+        name, _, arg = cmd.partition(' ')
+        if name.startswith("FZ_"):
+            self.fuzzy_command(name, cmd)
+        elif name in ("KP_L", "KI_L", "KD_L", "KP_R", "KI_R", "KD_R"):
+            self.gains[name[-1]]["PID".index(name[1])] = to_float(arg)
+            self.reply(f"ACK|{name}={to_float(arg):.2f}")
+        elif name == "VMAX":
+            self.vmax = to_float(arg)
+            self.reply(f"ACK|VMAX={self.vmax:.2f}")
+        elif name.startswith("SET_TARGET("):
+            self.target = to_float(cmd[11:-1])
+            self.reply("ACK|TARGET_SET")
+        elif name == "START":
+            self.running = True
+            self.telemetry = True
+            self.reset_motion()
+            self.reply("ACK|WALL_APPROACH_ON")
+        elif name == "STOP":
+            self.running = False
+            self.telemetry = False
+            self.reset_motion()
+            self.reply("ACK|WALL_APPROACH_OFF")
+        elif name == "EXAM_START":
+            self.running = False
+            self.reset_motion(self.START_DISTANCE)
+            self.start_exam()
+            self.reply("ACK|EXAM_STARTED")
+        elif name == "EXAM_STOP":
+            self.stop_exam()
+            self.reset_motion()
+            self.reply("ACK|EXAM_STOPPED")
+        elif name == "TELEMETRY_ON":
+            self.telemetry = True
+            self.reply("ACK|TELEMETRY_ON")
+        elif name == "TELEMETRY_OFF":
+            self.telemetry = False
+            self.reply("ACK|TELEMETRY_OFF")
+        elif name == "READ_DISTANCE":
+            self.reply(f"ACK|DIST:{self.get_dist():.2f}")
+        elif name == "STATUS":
+            (kpl, kil, kdl), (kpr, kir, kdr) = self.gains['L'], self.gains['R']
+            self.reply(f"ACK|KP_L:{kpl:.2f},KI_L:{kil:.2f},KD_L:{kdl:.2f},"
+                       f"KP_R:{kpr:.2f},KI_R:{kir:.2f},KD_R:{kdr:.2f},"
+                       f"VMAX:{self.vmax:.2f},DIST_POINT:{self.target:.2f}")
+        elif name == "PING":
+            self.reply("ACK|PONG")
+        elif name in ("BIN_ON", "BIN_OFF"):
+            self.set_binary(name == "BIN_ON")
+        else:
+            self.reply("NACK|UNKNOWN_CMD")
+
+
+PROFILES = {'beam': BeamSim, 'line': LineSim, 'wall': WallSim}
+
+
+class SimulatorSerial:
+    """Port w tym samym procesie: czas wirtualny = czas ścienny * speed"""
+
+    def __init__(self, sim, speed=1.0, timeout=0.05, port=SIM_SCHEME, reset=False,
+                 max_baud=None):
+        self.sim = sim
+        self.speed = speed
+        self.timeout = timeout
+        self.port = port
+        self.baudrate = SERIAL_BAUD_RATE
+        self.max_baud = max_baud    # powyżej łącze przekłamuje bajty
+        self.is_open = True
+        self.frames_received = 0
+        self._lock = threading.Lock()
+        self._wall = time.monotonic()
+        self._rx = bytearray()
+        self._noise = random.Random(0)
+        # Port otwierany po starcie płytki - setup() już za nami;
+        # reset=True - jak otwarcie portu z resetem przez DTR
+        if not reset:
+            self.sim.advance(BOOT_TIME)
+
+    def _sync(self):
+        now = time.monotonic()
+        dt = min((now - self._wall) * self.speed, MAX_ADVANCE)
+        self._wall = now
+        if dt > 0:
+            self.sim.advance(dt)
+        self._receive()
+
+    def _garbled(self, baud):
+        return baud != self.baudrate or (self.max_baud is not None and baud > self.max_baud)
+
+    def _garble(self, data):
+        """Odbiór na złej prędkości: mniej bajtów, przypadkowe wartości"""
+        return bytes(self._noise.randrange(256) for _ in range(len(data) // 2))
+
+    def _receive(self):
+        for baud, data in self.sim.take_output_chunks():
+            self._rx += self._garble(data) if self._garbled(baud) else data
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            self._sync()
+            return len(self._rx)
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        while True:
+            with self._lock:
+                self._sync()
+                if self._rx or not self.is_open or time.monotonic() >= deadline:
+                    data = bytes(self._rx[:size])
+                    del self._rx[:size]
+                    return data
+            time.sleep(0.001)
+
+    def readline(self):
+        line = bytearray()
+        while not line.endswith(b'\n'):
+            chunk = self.read(1)
+            if not chunk:
+                break
+            line += chunk
+        return bytes(line)
+
+    def write(self, data):
+        with self._lock:
+            self._sync()
+            data = bytes(data)
+            self.sim.feed(self._garble(data) if self._garbled(self.sim.baud) else data)
+            self.sim.advance(0)
+            self._receive()
+            self.frames_received += 1
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def open_sim(url, timeout=0.05):
+    """sim://profil[?speed=x&seed=n&reset=1&maxbaud=r] -> SimulatorSerial"""
+    parsed = urlparse(url)
+    profile = parsed.netloc or parsed.path.strip('/') or 'beam'
+    query = parse_qs(parsed.query)
+    if profile not in PROFILES:
+        raise ValueError(f"Nieznany profil symulatora: {profile}")
+    sim = PROFILES[profile](seed=int(query.get('seed', ['0'])[0]))
+    return SimulatorSerial(sim, speed=float(query.get('speed', ['1'])[0]),
+                           timeout=timeout, port=url,
+                           reset=query.get('reset', ['0'])[0] == '1',
+                           max_baud=int(query['maxbaud'][0]) if 'maxbaud' in query else None)
+
+
+def run_pty(sim, speed=1.0):
+    """Symulator za pseudoterminalem - klient otwiera wypisaną ścieżkę"""
+    import select
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    print(f"Symulator {type(sim).__name__} na porcie: {os.ttyname(slave)}")
+    print(f"Prędkość: x{speed}  (Ctrl+C aby zakończyć)")
+    wall = time.monotonic()
+    try:
+        while True:
+            ready, _, _ = select.select([master], [], [], 0.005)
+            if ready:
+                sim.feed(os.read(master, 1024))
+            now = time.monotonic()
+            sim.advance(min((now - wall) * speed, MAX_ADVANCE))
+            wall = now
+            out = sim.take_output()
+            if out:
+                os.write(master, out)
+    except KeyboardInterrupt:
+        print(f"\nRamek: {sim.frames}, błędnych: {sim.bad_frames}, czas wirtualny: {sim.now:.1f}s")
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symulator firmware robota")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='beam')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="krotność czasu rzeczywistego")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run_pty(PROFILES[args.profile](seed=args.seed), speed=args.speed)
+
+
+if __name__ == "__main__":
+    main()
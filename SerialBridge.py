@@ -0,0 +1,333 @@
+"""
+Serial Bridge
+Jeden proces trzyma port robota, narzędzia łączą się przez lokalne gniazdo
+
+Mostek otwiera port przez RobotInterface (szybkie łączenie, negocjacja
+prędkości i tryb binarny po stronie robota) i wystawia go na gnieździe TCP
+albo Unix. Klient mówi tym samym protokołem ramek ASCII co firmware
+(CMD|checksum|@seq#), więc RobotInterface łączy się jak z portem:
+
+    robot.connect("socket://localhost:7777")
+    robot.connect("unix:///tmp/iss_robot.sock")
+
+- komendy wielu klientów idą do robota potokowo (send_batch mostka); każda
+  odpowiedź wraca tylko do nadawcy, z jego numerem sekwencyjnym,
+- telemetria i ramki RESULT idą do wszystkich klientów; wolny klient traci
+  telemetrię (CLIENT_QUEUE), ale nie zatrzymuje mostka ani innych,
+- BIN_ON / BAUD dotyczą łącza, nie robota: mostek sam odpowiada NACK (klient
+  zostaje przy ASCII), ECHO odbija lokalnie,
+- port jest cały czas otwarty: podłączenie narzędzia nie resetuje Arduino.
+
+    python SerialBridge.py --port COM3                    # TCP 127.0.0.1:7777
+    python SerialBridge.py --port /dev/ttyUSB0 --unix /tmp/iss_robot.sock
+"""
+
+import argparse
+import os
+import queue
+import re
+import select
+import socket
+import socketserver
+import sys
+import threading
+
+from ArduinoRobotPython import RobotInterface
+
+BRIDGE_HOST = "127.0.0.1"
+BRIDGE_PORT = 7777
+UNIX_SCHEME = "unix://"
+CLIENT_QUEUE = 1000         # linii czekających na wysłanie do jednego klienta
+CLIENT_BUFFER = 4096        # maks. bajtów niezakończonej ramki od klienta
+# Komendy łącza klient <-> mostek; do robota nie trafiają
+LINK_COMMANDS = ('BIN_ON', 'BIN_OFF', 'BAUD', 'BAUD_OK')
+CLIENT_FRAME = re.compile(r"^([^|]*)\|(\d+)(?:\|@(\d+))?$")
+
+
+class BridgeClient:
+    """Połączony klient: własna kolejka wyjściowa i wątek wysyłający"""
+
+    def __init__(self, sock, name):
+        self.sock = sock
+        self.name = name
+        self.out = queue.Queue(maxsize=CLIENT_QUEUE)
+        self.dropped = 0
+        self.commands = 0
+        self.closed = threading.Event()
+        self._sender = threading.Thread(target=self._send_loop, name=f"bridge-{name}", daemon=True)
+        self._sender.start()
+
+    def send_line(self, text, droppable=True):
+        """Linia do klienta; telemetria przy pełnej kolejce przepada"""
+        if self.closed.is_set():
+            return
+        try:
+            if droppable:
+                self.out.put_nowait(text)
+            else:
+                self.out.put(text, timeout=1.0)
+        except queue.Full:
+            self.dropped += 1
+
+    def reply(self, frame, seq):
+        tag = f"|@{seq}" if seq is not None else ""
+        self.send_line(f"{frame}{tag}#", droppable=False)
+
+    def _send_loop(self):
+        while not self.closed.is_set():
+            try:
+                text = self.out.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                self.sock.sendall((text + "\r\n").encode())
+            except OSError:
+                self.close()
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class BridgeRobot(RobotInterface):
+    """RobotInterface mostka: telemetria i RESULT do klientów zamiast kolejek"""
+
+    def __init__(self, bridge, telemetry_buffer=False):
+        super().__init__(telemetry_buffer)
+        self.bridge = bridge
+
+    def _deliver_telemetry(self, line):
+        self.bridge.broadcast(line)
+
+    def _deliver_result(self, frame):
+        self.bridge.broadcast(frame + "#")
+
+
+class SerialBridge:
+    """Rozdział jednego RobotInterface między klientów gniazda"""
+
+    def __init__(self, window=None):
+        self.robot = BridgeRobot(self)
+        self.window = window
+        self.clients = set()
+        self._lock = threading.Lock()
+        self.server = None
+
+    def attach(self, client):
+        with self._lock:
+            self.clients.add(client)
+        print(f"+ klient {client.name} (razem {len(self.clients)})")
+
+    def detach(self, client):
+        client.close()
+        with self._lock:
+            self.clients.discard(client)
+        note = f", utracona telemetria: {client.dropped}" if client.dropped else ""
+        print(f"- klient {client.name}: {client.commands} komend{note}")
+
+    def broadcast(self, text):
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.send_line(text)
+
+    def execute(self, client, frames):
+        """Ramki klienta [(tekst ramki)] -> robot jedną paczką, odpowiedzi do klienta"""
+        replies = [None] * len(frames)
+        seqs = [None] * len(frames)
+        forward = []    # (indeks ramki, komenda)
+        for k, frame in enumerate(frames):
+            m = CLIENT_FRAME.match(frame)
+            if m is None:
+                replies[k] = "NACK|BAD_CHECKSUM"
+                continue
+            cmd, checksum, seq = m.groups()
+            seqs[k] = seq
+            name = cmd.split(' ', 1)[0]
+            if self.robot.calculate_checksum(cmd) != int(checksum):
+                replies[k] = "NACK|BAD_CHECKSUM"
+            elif name in LINK_COMMANDS:
+                replies[k] = "NACK|BRIDGE_LINK"
+            elif name == "ECHO":
+                replies[k] = f"ACK|ECHO={cmd[5:]}"
+            else:
+                forward.append((k, cmd))
+        if forward:
+            client.commands += len(forward)
+            nacks = {}
+            kwargs = {'window': self.window} if self.window else {}
+            results = self.robot.send_batch([cmd for _, cmd in forward], nacks=nacks, **kwargs)
+            for n, ((k, _), result) in enumerate(zip(forward, results)):
+                replies[k] = result or nacks.get(n) or "NACK|NO_REPLY"
+        for reply, seq in zip(replies, seqs):
+            client.reply(reply, seq)
+
+    def serve(self, client):
+        """Pętla odczytu jednego klienta (wątek serwera)"""
+        self.attach(client)
+        buf = bytearray()
+        try:
+            while not client.closed.is_set():
+                data = client.sock.recv(4096)
+                if not data:
+                    break
+                buf += data
+                # 0x00 kończy ramkę binarną (sonda klienta po BIN_ON) - do kosza
+                zero = buf.rfind(b'\0')
+                if zero >= 0:
+                    del buf[:zero + 1]
+                *complete, rest = buf.split(b'#')
+                buf = bytearray(rest if len(rest) <= CLIENT_BUFFER else b"")
+                frames = [f.decode('utf-8', errors='ignore').strip() for f in complete]
+                frames = [f for f in frames if f]
+                if frames:
+                    self.execute(client, frames)
+        except OSError:
+            pass
+        finally:
+            self.detach(client)
+
+    def listen(self, host=BRIDGE_HOST, port=BRIDGE_PORT, unix=None):
+        bridge = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                name = self.client_address if isinstance(self.client_address, str) else \
+                    f"{self.client_address[0]}:{self.client_address[1]}"
+                bridge.serve(BridgeClient(self.request, name or "unix"))
+
+        if unix:
+            if os.path.exists(unix):
+                os.unlink(unix)     # pozostałość po poprzednim mostku
+            base, address = socketserver.ThreadingUnixStreamServer, unix
+        else:
+            base, address = socketserver.ThreadingTCPServer, (host, port)
+
+        class Server(base):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(address, Handler)
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(self.server.server_address, str) and os.path.exists(self.server.server_address):
+                os.unlink(self.server.server_address)
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+        self.robot.disconnect()
+
+
+class UnixSocketSerial:
+    """Klient gniazda Unix z interfejsem portu, jakiego używa RobotInterface"""
+
+    def __init__(self, path, timeout=0.05):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.port = f"{UNIX_SCHEME}{path}"
+        self.baudrate = None    # stałe tempo - bez negocjacji prędkości
+        self.timeout = timeout
+        self.is_open = True
+        self._rx = bytearray()
+
+    def _fill(self, timeout):
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if readable:
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionResetError("mostek zamknął połączenie")
+            self._rx += data
+
+    @property
+    def in_waiting(self):
+        if not self._rx:
+            self._fill(0)
+        return len(self._rx)
+
+    def read(self, size=1):
+        if not self._rx:
+            self._fill(self.timeout)
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def write(self, data):
+        self.sock.sendall(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.sock.close()
+
+
+def open_unix(url, timeout=0.05):
+    """unix:///ścieżka/gniazda -> UnixSocketSerial"""
+    return UnixSocketSerial(url[len(UNIX_SCHEME):], timeout=timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mostek port robota <-> lokalne gniazdo dla wielu klientów")
+    parser.add_argument('--port', required=True, help="port robota (także sim://...)")
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--host', default=BRIDGE_HOST)
+    parser.add_argument('--listen', type=int, default=BRIDGE_PORT, metavar='PORT_TCP')
+    parser.add_argument('--unix', metavar='ŚCIEŻKA', help="gniazdo Unix zamiast TCP")
+    parser.add_argument('--window', type=int, help="ramek do robota bez potwierdzenia")
+    parser.add_argument('--no-negotiate', action='store_true', help="bez podnoszenia prędkości łącza")
+    parser.add_argument('--supervise', action='store_true', help="wznawianie sesji po zerwaniu łącza")
+    parser.add_argument('--publish', action='store_true',
+                        help="telemetria także w pamięci współdzielonej (SharedTelemetry)")
+    args = parser.parse_args()
+
+    bridge = SerialBridge(args.window)
+    robot = bridge.robot
+    if not robot.connect(args.port, args.baud, negotiate=not args.no_negotiate) or not robot.connected:
+        robot.disconnect()
+        return 3
+    if args.supervise:
+        from LinkSupervisor import LinkSupervisor
+        LinkSupervisor(robot).start()
+    if args.publish:
+        robot.publish_telemetry()
+    try:
+        server = bridge.listen(args.host, args.listen, args.unix)
+    except OSError as e:
+        print(f"✗ Nie można nasłuchiwać: {e}")
+        robot.disconnect()
+        return 1
+    where = f"{UNIX_SCHEME}{args.unix}" if args.unix else f"socket://{args.host}:{args.listen}"
+    print(f"Mostek {args.port} -> {where} (Ctrl+C - koniec)")
+    thread = threading.Thread(target=server.serve_forever, name="bridge-server", daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\nZamykanie mostka...")
+    finally:
+        bridge.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Session Export
+Zapis przebiegu do formatu kolumnowego: zdekodowana telemetria + zdarzenia komend
+
+Dane idą na dysk paczkami po CHUNK_ROWS wierszy (stała pamięć przez całą
+sesję). NPZ wymaga tylko numpy, Parquet - pyarrow. Wczytanie godzinnego
+przebiegu to jedno load_session() zamiast parsowania tekstowego logu.
+
+  NPZ:     telemetry_00000.npy, ..., events_00000.npy, ..., meta.json
+  Parquet: <plik>_telemetry.parquet, <plik>_events.parquet, <plik>_meta.json
+
+Użycie:
+  exporter = SessionExporter(robot, "przebieg.npz").start()
+  ...
+  exporter.close()
+  data = load_session("przebieg.npz")     # data['telemetry']['err'], data['meta']
+
+  python SessionExport.py --port COM3 --out przebieg.npz --duration 60
+  python SessionExport.py --info przebieg.npz
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+import SessionLog
+from TelemetryBuffer import TELEMETRY_DTYPE, add_start_argument, start_telemetry
+
+CHUNK_ROWS = 8192           # wierszy w jednej paczce na dysku
+EXPORT_POLL = 0.5           # odczyt nowych rekordów z TelemetryRing [s]
+META_NAME = "meta.json"
+
+
+def _events_array(rows):
+    """[(t, kind, tekst)] -> tablica kolumnowa zdarzeń"""
+    texts = [text.encode('utf-8') for _, _, text in rows]
+    width = max((len(t) for t in texts), default=1) or 1
+    events = np.zeros(len(rows), dtype=[('t', 'f8'), ('kind', 'u1'), ('text', f'S{width}')])
+    events['t'] = [t for t, _, _ in rows]
+    events['kind'] = [kind for _, kind, _ in rows]
+    events['text'] = texts
+    return events
+
+
+class NpzWriter:
+    """Kolejne paczki jako osobne pliki .npy w jednym archiwum zip"""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True)
+        self._chunks = {}
+
+    def write(self, table, array):
+        n = self._chunks.get(table, 0)
+        self._chunks[table] = n + 1
+        with self._zip.open(f"{table}_{n:05d}.npy", 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def close(self, meta):
+        self._zip.writestr(META_NAME, json.dumps(meta, indent=1))
+        self._zip.close()
+
+
+class ParquetWriter:
+    """Paczki jako grupy wierszy w plikach Parquet (pyarrow)"""
+
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.base = path[:-len('.parquet')] if path.endswith('.parquet') else path
+        self._writers = {}
+
+    def _table(self, array):
+        columns = {}
+        for name in array.dtype.names:
+            column = array[name]
+            if column.dtype.kind == 'S':
+                column = [v.decode('utf-8', errors='replace') for v in column]
+            columns[name] = column
+        return self.pa.table(columns)
+
+    def write(self, table, array):
+        data = self._table(array)
+        writer = self._writers.get(table)
+        if writer is None:
+            writer = self._writers[table] = self.pq.ParquetWriter(
+                f"{self.base}_{table}.parquet", data.schema)
+        writer.write_table(data)
+
+    def close(self, meta):
+        for writer in self._writers.values():
+            writer.close()
+        with open(f"{self.base}_meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=1)
+
+
+def open_writer(path):
+    if path.endswith('.parquet'):
+        try:
+            return ParquetWriter(path)
+        except ImportError:
+            path = path[:-len('.parquet')] + '.npz'
+            print(f"Brak pyarrow - zapis do {path}")
+    return NpzWriter(path)
+
+
+class SessionExporter:
+    """Eksport telemetrii (z TelemetryRing) i zdarzeń TX/RX (z log_message)"""
+
+    def __init__(self, robot, path, chunk_rows=CHUNK_ROWS, poll=EXPORT_POLL):
+        if robot.telemetry_buffer is None:
+            raise RuntimeError("Eksport wymaga numpy (bufor TelemetryRing)")
+        self.robot = robot
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.poll = poll
+        self.rows = {'telemetry': 0, 'events': 0}
+        self.dropped = 0
+        self._writer = None
+        self._telemetry = []
+        self._telemetry_rows = 0
+        self._events = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = 0
+        self._meta = {}
+
+    def _config(self):
+        return {'params': self.robot.params.snapshot(), 'settings': self.robot.params.restore_commands()}
+
+    def start(self):
+        ring = self.robot.telemetry_buffer
+        self._writer = open_writer(self.path)
+        self._seq = ring.count
+        self._meta = {
+            'port': getattr(self.robot, 'port', None),
+            'baudrate': getattr(self.robot, 'link_baud', None),
+            # czas ścienny = wall + (t - monotonic)
+            'wall': time.time(),
+            'monotonic': time.monotonic(),
+            'config_start': self._config(),
+        }
+        self.robot.log_hooks.append(self._on_log)
+        self._thread = threading.Thread(target=self._run, name="session-export", daemon=True)
+        self._thread.start()
+        return self
+
+    def _on_log(self, t_ns, msg):
+        kind, text = SessionLog.split_kind(msg)
+        with self._lock:
+            self._events.append((t_ns / 1e9, kind, text))
+            full = len(self._events) >= self.chunk_rows
+        if full:
+            self._flush_events()
+
+    def _flush_events(self):
+        with self._lock:
+            rows, self._events = self._events, []
+            if rows:
+                self._writer.write('events', _events_array(rows))
+                self.rows['events'] += len(rows)
+
+    def _flush_telemetry(self):
+        if not self._telemetry:
+            return
+        chunk = np.concatenate(self._telemetry)
+        self._telemetry, self._telemetry_rows = [], 0
+        with self._lock:
+            self._writer.write('telemetry', chunk)
+        self.rows['telemetry'] += len(chunk)
+
+    def _collect(self):
+        records, self._seq, dropped = self.robot.telemetry_buffer.read_since(self._seq)
+        self.dropped += dropped
+        while len(records):
+            take = records[:self.chunk_rows - self._telemetry_rows]
+            records = records[len(take):]
+            self._telemetry.append(take)
+            self._telemetry_rows += len(take)
+            if self._telemetry_rows >= self.chunk_rows:
+                self._flush_telemetry()
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            self._collect()
+
+    def close(self):
+        """Zapis zaległych paczek i metadanych; zwraca liczby wierszy"""
+        if self._thread is None:
+            return self.rows
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._on_log in self.robot.log_hooks:
+            self.robot.log_hooks.remove(self._on_log)
+        self._collect()
+        self._flush_telemetry()
+        self._flush_events()
+        self._meta.update({
+            'config_end': self._config(),
+            'rows': self.rows,
+            'dropped': self.dropped,
+            'duration': time.monotonic() - self._meta['monotonic'],
+        })
+        self._writer.close(self._meta)
+        return self.rows
+
+
+def _concat(chunks, dtype):
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+
+def load_session(path):
+    """{'telemetry': tablica TELEMETRY_DTYPE, 'events': (t, kind, text), 'meta': dict}"""
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as z:
+            names = sorted(z.files)
+            telemetry = _concat([z[n] for n in names if n.startswith('telemetry_')], TELEMETRY_DTYPE)
+            events = _concat([z[n] for n in names if n.startswith('events_')],
+                             _events_array([]).dtype)
+            meta = json.loads(z[META_NAME]) if META_NAME in names else {}
+        return {'telemetry': telemetry, 'events': events, 'meta': meta}
+
+    import pyarrow.parquet as pq
+    base = path[:-len('.parquet')] if path.endswith('.parquet') else path
+    telemetry = np.zeros(0, dtype=TELEMETRY_DTYPE)
+    if os.path.exists(f"{base}_telemetry.parquet"):
+        table = pq.read_table(f"{base}_telemetry.parquet")
+        telemetry = np.zeros(table.num_rows, dtype=TELEMETRY_DTYPE)
+        for name in TELEMETRY_DTYPE.names:
+            telemetry[name] = table.column(name).to_numpy()
+    rows = []
+    if os.path.exists(f"{base}_events.parquet"):
+        table = pq.read_table(f"{base}_events.parquet").to_pydict()
+        rows = list(zip(table['t'], table['kind'], table['text']))
+    meta = {}
+    if os.path.exists(f"{base}_meta.json"):
+        with open(f"{base}_meta.json", encoding='utf-8') as f:
+            meta = json.load(f)
+    return {'telemetry': telemetry, 'events': _events_array(rows), 'meta': meta}
+
+
+def print_info(path):
+    start = time.perf_counter()
+    data = load_session(path)
+    elapsed = time.perf_counter() - start
+    telemetry, events, meta = data['telemetry'], data['events'], data['meta']
+    print(f"Plik: {path} (wczytany w {elapsed * 1000:.1f} ms)")
+    print(f"Port: {meta.get('port')}, czas: {meta.get('duration', 0):.1f}s")
+    print(f"Telemetria: {len(telemetry)} rekordów, zdarzenia: {len(events)}, "
+          f"utracone: {meta.get('dropped', 0)}")
+    config = meta.get('config_start', {})
+    if config.get('params'):
+        print(f"Parametry na starcie: {config['params']}")
+    if len(telemetry):
+        span = telemetry['t'][-1] - telemetry['t'][0]
+        print(f"Telemetria: {span:.1f}s, |uchyb| średnio {np.nanmean(np.abs(telemetry['err'])):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksport przebiegu do NPZ / Parquet")
+    parser.add_argument('--port')
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--out', default='przebieg.npz', help="plik .npz lub .parquet")
+    parser.add_argument('--duration', type=float, default=0, help="czas nagrania [s], 0 - do Ctrl+C")
+    add_start_argument(parser)
+    parser.add_argument('--info', metavar='PLIK', help="podsumowanie zapisanego przebiegu")
+    args = parser.parse_args()
+
+    if args.info:
+        print_info(args.info)
+        return 0
+    if not args.port:
+        parser.error("wymagany --port lub --info")
+
+    from ArduinoRobotPython import RobotInterface
+    robot = RobotInterface()
+    if not robot.connect(args.port, args.baud):
+        return 3
+    exporter = None
+    started = False
+    try:
+        exporter = SessionExporter(robot, args.out).start()
+        started = start_telemetry(robot, args.start)
+        deadline = time.monotonic() + args.duration if args.duration else None
+        while started and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            rows = exporter.close()
+            if started:
+                print(f"Zapisano {rows['telemetry']} rekordów telemetrii i {rows['events']} zdarzeń")
+            else:
+                print(f"{args.out}: tylko {rows['events']} zdarzeń komend, bez telemetrii")
+        robot.disconnect()
+    return 0 if started else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Session Log
+Strumieniowy zapis logu komunikacji na dysk (wątek w tle, rotacja plików)
+
+Plik:   nagłówek LOG_MAGIC + LOG_HEADER (czas ścienny i monotoniczny kotwicy,
+        flagi), potem rekordy:
+  - format wierszowy:   '<qBH' (czas mono [ns], rodzaj, długość) + tekst UTF-8
+  - format kolumnowy:   bloki '<II' (liczba rekordów, długość) + zlib(
+                        czasy int64, rodzaje uint8, długości uint16, teksty)
+Konwersja do tekstu:    python SessionLog.py logs/robot_log_*.isslog
+"""
+
+import glob
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+LOG_MAGIC = b'ISSLOG1\n'
+LOG_HEADER = struct.Struct('<dqB')      # czas ścienny, czas mono [ns], flagi
+ROW_HEADER = struct.Struct('<qBH')
+BLOCK_HEADER = struct.Struct('<II')
+FLAG_COLUMNAR = 0x01
+
+# Rodzaj wpisu - prefiks wiadomości "TX: ..." / "RX: ..."
+KIND_OTHER = 0
+KIND_TX = 1
+KIND_RX = 2
+KIND_PREFIX = {KIND_TX: "TX: ", KIND_RX: "RX: "}
+
+# Format znacznika czasu w tekstowym logu (jak w README)
+LOG_TIME_FORMAT = "%H:%M:%S.%f"
+
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_MAX_AGE = 3600.0
+LOG_FLUSH_INTERVAL = 0.5
+LOG_EXTENSION = ".isslog"
+
+
+def split_kind(msg):
+    for kind, prefix in KIND_PREFIX.items():
+        if msg.startswith(prefix):
+            return kind, msg[len(prefix):]
+    return KIND_OTHER, msg
+
+
+def format_entry(wall, kind, text):
+    """Wpis w układzie tekstowego logu: [HH:MM:SS.fff] TX: ..."""
+    stamp = datetime.fromtimestamp(wall).strftime(LOG_TIME_FORMAT)[:-3]
+    return f"[{stamp}] {KIND_PREFIX.get(kind, '')}{text}"
+
+
+class LogSink:
+    """Asynchroniczny zapis wpisów logu z rotacją po rozmiarze i czasie"""
+
+    def __init__(self, directory, prefix="robot_log", max_bytes=LOG_MAX_BYTES,
+                 max_age=LOG_MAX_AGE, columnar=False,
+                 flush_interval=LOG_FLUSH_INTERVAL):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.columnar = columnar
+        self.flush_interval = flush_interval
+        self.files = []
+        self.records = 0
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._opened_at = 0.0
+        self._flushed = threading.Event()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, t_ns, msg):
+        """Wpis z czasem time.monotonic_ns() - bez blokowania wywołującego"""
+        self._queue.put((t_ns, msg))
+
+    def flush(self, timeout=2.0):
+        """Oczekiwanie, aż wszystko z kolejki trafi na dysk"""
+        self._flushed.clear()
+        self._queue.put(None)
+        self._flushed.wait(timeout)
+
+    def close(self):
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+    # ----------------------------- wątek zapisu -----------------------------
+
+    def _run(self):
+        while True:
+            batch = []
+            flush_requested = False
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is None:
+                        flush_requested = True
+                    else:
+                        batch.append(item)
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    print(f"Błąd zapisu logu: {e}")
+            if flush_requested:
+                if self._file:
+                    self._file.flush()
+                self._flushed.set()
+            if self._stop.is_set():
+                break
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        if self._file:
+            self._file.close()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{len(self.files):03d}{LOG_EXTENSION}")
+        self._file = open(path, 'wb')
+        self._file.write(LOG_MAGIC)
+        self._file.write(LOG_HEADER.pack(time.time(), time.monotonic_ns(),
+                                         FLAG_COLUMNAR if self.columnar else 0))
+        self._opened_at = time.monotonic()
+        self.files.append(path)
+
+    def _write_batch(self, batch):
+        if (self._file is None or self._file.tell() >= self.max_bytes or
+                time.monotonic() - self._opened_at >= self.max_age):
+            self._open()
+        kinds, texts = [], []
+        for _, msg in batch:
+            kind, text = split_kind(msg)
+            kinds.append(kind)
+            texts.append(text.encode('utf-8')[:0xFFFF])
+        if self.columnar:
+            times = array('q', (t for t, _ in batch))
+            lengths = array('H', (len(t) for t in texts))
+            body = zlib.compress(times.tobytes() + bytes(kinds) + lengths.tobytes() + b''.join(texts))
+            self._file.write(BLOCK_HEADER.pack(len(batch), len(body)) + body)
+        else:
+            self._file.write(b''.join(ROW_HEADER.pack(t, kind, len(text)) + text
+                                      for (t, _), kind, text in zip(batch, kinds, texts)))
+        self.records += len(batch)
+
+
+# ----------------------------- odczyt -----------------------------
+
+def read_log(path):
+    """Wpisy z pliku logu: (czas ścienny, rodzaj, tekst)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(LOG_MAGIC):
+        raise ValueError(f"{path}: to nie jest plik logu sesji")
+    wall0, mono0, flags = LOG_HEADER.unpack_from(data, len(LOG_MAGIC))
+    pos = len(LOG_MAGIC) + LOG_HEADER.size
+    to_wall = lambda t_ns: wall0 + (t_ns - mono0) / 1e9
+    if flags & FLAG_COLUMNAR:
+        while pos + BLOCK_HEADER.size <= len(data):
+            n, size = BLOCK_HEADER.unpack_from(data, pos)
+            pos += BLOCK_HEADER.size
+            if pos + size > len(data):
+                break   # niedokończony blok (przerwany zapis)
+            body = zlib.decompress(data[pos:pos + size])
+            pos += size
+            times = array('q')
+            times.frombytes(body[:8 * n])
+            kinds = body[8 * n:9 * n]
+            lengths = array('H')
+            lengths.frombytes(body[9 * n:11 * n])
+            offset = 11 * n
+            for t, kind, length in zip(times, kinds, lengths):
+                yield to_wall(t), kind, body[offset:offset + length].decode('utf-8', errors='replace')
+                offset += length
+    else:
+        while pos + ROW_HEADER.size <= len(data):
+            t, kind, length = ROW_HEADER.unpack_from(data, pos)
+            pos += ROW_HEADER.size
+            if pos + length > len(data):
+                break
+            yield to_wall(t), kind, data[pos:pos + length].decode('utf-8', errors='replace')
+            pos += length
+
+
+def convert_to_text(paths, out):
+    """Zapis wpisów z plików binarnych w tekstowym układzie save_log"""
+    for path in paths:
+        for wall, kind, text in read_log(path):
+            out.write(format_entry(wall, kind, text) + '\n')
+
+
+def main():
+    paths = sorted(p for arg in sys.argv[1:] for p in glob.glob(arg))
+    if not paths:
+        print("Użycie: python SessionLog.py <plik.isslog> [...]")
+        return
+    convert_to_text(paths, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Session Recorder
+Nagrywanie i odtwarzanie sesji szeregowej (surowe bajty w obie strony)
+
+Plik:   nagłówek REC_MAGIC + '<I' długość + metadane JSON (port, baudrate,
+        opcje connect() - replay:// łączy się z tymi samymi), potem rekordy '<QBI' (czas od startu [ns], kierunek, długość) + bajty
+Użycie: robot.connect(port, record="sesja.issrec")
+        robot.connect("replay://sesja.issrec")            - w czasie rzeczywistym
+        robot.connect("replay://sesja.issrec?speed=0")    - najszybciej jak się da
+"""
+
+import json
+import struct
+import sys
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+REC_MAGIC = b'ISSREC1\n'
+REC_RECORD = struct.Struct('<QBI')
+REC_META = struct.Struct('<I')
+DIR_RX = 0      # Arduino -> PC
+DIR_TX = 1      # PC -> Arduino
+REPLAY_SCHEME = "replay://"
+
+
+class RecordingSerial:
+    """Nakładka na port szeregowy zapisująca każdy read/write do pliku"""
+
+    def __init__(self, ser, path, meta=None):
+        self.ser = ser
+        self.path = path
+        self._file = open(path, 'wb')
+        meta = json.dumps({
+            'port': getattr(ser, 'port', None),
+            'baudrate': getattr(ser, 'baudrate', None),
+            'started': time.time(),
+            **(meta or {}),
+        }).encode('utf-8')
+        self._file.write(REC_MAGIC + REC_META.pack(len(meta)) + meta)
+        self._t0 = time.monotonic_ns()
+        self._lock = threading.Lock()
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+
+    def _record(self, direction, data):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(REC_RECORD.pack(time.monotonic_ns() - self._t0, direction, len(data)))
+            self._file.write(data)
+
+    def read(self, size=1):
+        data = self.ser.read(size)
+        if data:
+            self.bytes_rx += len(data)
+            self._record(DIR_RX, data)
+        return data
+
+    def readline(self, *args, **kwargs):
+        data = self.ser.readline(*args, **kwargs)
+        if data:
+            self.bytes_rx += len(data)
+            self._record(DIR_RX, data)
+        return data
+
+    def write(self, data):
+        self.bytes_tx += len(data)
+        self._record(DIR_TX, data)
+        return self.ser.write(data)
+
+    def close(self):
+        self.ser.close()
+        with self._lock:
+            self._file.close()
+
+    def __getattr__(self, name):
+        # in_waiting, is_open, port, baudrate, flush, ... z prawdziwego portu
+        return getattr(self.ser, name)
+
+
+def load_recording(path):
+    """Metadane i lista rekordów (czas [s], kierunek, bajty)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(REC_MAGIC):
+        raise ValueError(f"{path}: to nie jest nagranie sesji")
+    pos = len(REC_MAGIC)
+    (meta_len,) = REC_META.unpack_from(data, pos)
+    pos += REC_META.size
+    meta = json.loads(data[pos:pos + meta_len].decode('utf-8'))
+    pos += meta_len
+    records = []
+    while pos + REC_RECORD.size <= len(data):
+        t_ns, direction, length = REC_RECORD.unpack_from(data, pos)
+        pos += REC_RECORD.size
+        if pos + length > len(data):
+            break   # nagranie przerwane w trakcie zapisu
+        records.append((t_ns / 1e9, direction, data[pos:pos + length]))
+        pos += length
+    return meta, records
+
+
+class ReplaySerial:
+    """Port odtwarzający nagranie przez ten sam kod co prawdziwy Serial.
+
+    Dane RX są wydawane według znaczników czasu (speed=1.0 - czas
+    rzeczywisty, speed=0 - bez czekania), ale nigdy dalej niż do
+    następnego nagranego TX: odpowiedź pojawia się dopiero po tym,
+    jak klient wyśle swoją ramkę. Prędkość (baudrate) można zmieniać jak
+    w prawdziwym porcie - negocjacja z nagrania przebiega tak samo."""
+
+    def __init__(self, path, speed=1.0, timeout=0.05):
+        self.meta, records = load_recording(path)
+        self.port = f"{REPLAY_SCHEME}{path}"
+        self.baudrate = self.meta.get('baudrate') or 9600
+        self.timeout = timeout
+        self.speed = speed
+        self.is_open = True
+        self._records = records
+        self._pos = 0
+        self._rx = bytearray()
+        self._cond = threading.Condition()
+        # Kotwica czasu: (czas w nagraniu, czas monotoniczny odtwarzania)
+        self._anchor = (0.0, time.monotonic())
+        self.tx_mismatches = 0
+        self.frames_received = 0
+
+    @property
+    def finished(self):
+        return self._pos >= len(self._records) and not self._rx
+
+    def _due(self, t):
+        if self.speed <= 0:
+            return True
+        rec0, wall0 = self._anchor
+        return time.monotonic() - wall0 >= (t - rec0) / self.speed
+
+    def _release(self):
+        """Przeniesienie należnych rekordów RX do bufora; czas do następnego"""
+        while self._pos < len(self._records):
+            t, direction, data = self._records[self._pos]
+            if direction == DIR_TX:
+                return None     # czekamy na write() klienta
+            if not self._due(t):
+                rec0, wall0 = self._anchor
+                return wall0 + (t - rec0) / self.speed - time.monotonic()
+            self._rx += data
+            self._pos += 1
+        return None
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            self._release()
+            return len(self._rx)
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        with self._cond:
+            while True:
+                wait = self._release()
+                if self._rx or not self.is_open:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def readline(self):
+        line = bytearray()
+        while not line.endswith(b'\n'):
+            chunk = self.read(1)
+            if not chunk:
+                break
+            line += chunk
+        return bytes(line)
+
+    def write(self, data):
+        with self._cond:
+            # Pominięcie zaległych RX (klient nie czekał na nie) i nagranego TX
+            while self._pos < len(self._records) and self._records[self._pos][1] == DIR_RX:
+                self._rx += self._records[self._pos][2]
+                self._pos += 1
+            if self._pos < len(self._records):
+                t, _, expected = self._records[self._pos]
+                if expected != bytes(data):
+                    self.tx_mismatches += 1
+                self._pos += 1
+                self._anchor = (t, time.monotonic())
+            self.frames_received += 1
+            self._cond.notify_all()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+
+
+def open_replay(url, timeout=0.05):
+    """replay://plik[?speed=x] -> ReplaySerial"""
+    parsed = urlparse(url)
+    path = parsed.netloc + parsed.path
+    speed = float(parse_qs(parsed.query).get('speed', ['1'])[0])
+    return ReplaySerial(path, speed=speed, timeout=timeout)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Użycie: python SessionRecorder.py <nagranie.issrec>")
+        return
+    meta, records = load_recording(sys.argv[1])
+    rx = sum(len(d) for _, direction, d in records if direction == DIR_RX)
+    tx = sum(len(d) for _, direction, d in records if direction == DIR_TX)
+    duration = records[-1][0] if records else 0.0
+    print(f"Port: {meta.get('port')} ({meta.get('baudrate')} baud)")
+    print(f"Czas: {duration:.2f}s, rekordów: {len(records)}")
+    print(f"RX: {rx} B, TX: {tx} B")
+
+
+if __name__ == "__main__":
+    main()
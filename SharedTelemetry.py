@@ -0,0 +1,331 @@
+"""
+Shared Telemetry
+Telemetria z jednego portu dla wielu lokalnych procesów (shared memory)
+
+Port szeregowy może mieć tylko jeden proces. Wydawca (RobotInterface z
+publish_telemetry) zapisuje zdekodowane rekordy TELEMETRY_DTYPE do bufora
+cyklicznego w multiprocessing.shared_memory; dowolna liczba czytelników
+(wykres, logger, tuner) czyta go bez portu i bez kopiowania przez potoki.
+
+Układ segmentu: nagłówek (HEADER_DTYPE) | numery slotów u8[capacity] |
+rekordy TELEMETRY_DTYPE[capacity]. Wydawca przed zapisem slotu zeruje jego
+numer, po zapisie wpisuje numer rekordu + 1, na końcu zwiększa licznik w
+nagłówku. Czytelnik porównuje numery slotów przed i po skopiowaniu - rekord
+nadpisany w trakcie odczytu liczy się jako utracony. Wydawca nigdy nie czeka
+na czytelników; wolny czytelnik dostaje w read_since liczbę pominiętych.
+
+    python SharedTelemetry.py --port COM3 --start TELEMETRY_ON   # wydawca
+    python SharedTelemetry.py --port COM3 --start TEST_START     # wydawca (pochylnia)
+    python SharedTelemetry.py                                    # podgląd
+    python LivePlot.py --shared                                  # wykres
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from TelemetryBuffer import (TELEMETRY_CAPACITY, TELEMETRY_DTYPE, RECORD_BUILDERS, decode_line,
+                             add_start_argument, start_telemetry)
+
+SHARED_NAME = "iss_telemetry"
+SHARED_MAGIC = 0x49535354     # "ISST"
+SHARED_VERSION = 1
+READER_POLL = 0.01            # czekanie czytelnika na nowe rekordy [s]
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'u4'),
+    ('version', 'u2'),
+    ('record_size', 'u2'),
+    ('capacity', 'u8'),
+    ('count', 'u8'),          # łączna liczba zapisanych rekordów
+    ('rejected', 'u8'),
+    ('writer_pid', 'u4'),
+    ('closed', 'u1'),         # wydawca zakończył pracę
+], align=True)
+HEADER_SIZE = 64
+
+# Segmenty utworzone w tym procesie (ich rejestracji w resource_tracker nie ruszamy)
+_created = set()
+
+
+def _segment_size(capacity):
+    return HEADER_SIZE + capacity * (8 + TELEMETRY_DTYPE.itemsize)
+
+
+def _open_segment(name):
+    """Dołączenie do istniejącego segmentu bez przejmowania go na własność"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Starszy Python: resource_tracker czytelnika usunąłby segment wydawcy
+        # przy wyjściu z procesu
+        if os.name == 'posix' and name not in _created:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _pid_alive(pid):
+    if os.name != 'posix':
+        return True     # Windows usuwa segment razem z ostatnim procesem
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedTelemetryRing:
+    """Bufor cykliczny rekordów telemetrii w pamięci współdzielonej.
+
+    Ten sam interfejs co TelemetryRing (count, capacity, append, push_line,
+    push_values, latest, read_since), więc PlotWindow i inne odbiory działają
+    bez zmian. create() - wydawca (jedyny zapisujący), attach() - czytelnik."""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        capacity = int(self.header['capacity'])
+        self.capacity = capacity
+        self.slots = np.ndarray((capacity,), dtype='u8', buffer=shm.buf, offset=HEADER_SIZE)
+        self.data = np.ndarray((capacity,), dtype=TELEMETRY_DTYPE, buffer=shm.buf,
+                               offset=HEADER_SIZE + capacity * 8)
+
+    @classmethod
+    def create(cls, name=SHARED_NAME, capacity=TELEMETRY_CAPACITY):
+        """Nowy segment; pozostałość po wydawcy, który padł, jest zastępowana"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        except FileExistsError:
+            stale = _open_segment(name)
+            header = np.ndarray((), dtype=HEADER_DTYPE, buffer=stale.buf)
+            pid, closed = int(header['writer_pid']), bool(header['closed'])
+            del header
+            if not closed and _pid_alive(pid):
+                stale.close()
+                raise FileExistsError(f"telemetrię '{name}' publikuje już proces {pid}") from None
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        _created.add(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header[()] = (SHARED_MAGIC, SHARED_VERSION, TELEMETRY_DTYPE.itemsize,
+                      capacity, 0, 0, os.getpid(), 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=SHARED_NAME):
+        """Dołączenie czytelnika; FileNotFoundError, gdy nikt nie publikuje"""
+        shm = _open_segment(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        valid = (int(header['magic']) == SHARED_MAGIC and int(header['version']) == SHARED_VERSION
+                 and int(header['record_size']) == TELEMETRY_DTYPE.itemsize)
+        del header
+        if not valid:
+            shm.close()
+            raise ValueError(f"segment '{name}' nie jest buforem telemetrii tej wersji")
+        return cls(shm, owner=False)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def count(self):
+        return int(self.header['count'])
+
+    @property
+    def rejected(self):
+        return int(self.header['rejected'])
+
+    @property
+    def closed(self):
+        """Wydawca zakończył pracę (czytelnik może odczytać resztę i wyjść)"""
+        return bool(self.header['closed'])
+
+    # ----------------------------- wydawca -----------------------------
+
+    def push_line(self, line, t=None):
+        """Dekodowanie linii i zapis do bufora; False gdy format nieznany"""
+        record = decode_line(line)
+        if record is None:
+            self.header['rejected'] += 1
+            return False
+        self.append(time.monotonic() if t is None else t, record)
+        return True
+
+    def push_values(self, kind, values, t=None):
+        """Zapis wartości już zdekodowanych (np. z ramki binarnej)"""
+        self.append(time.monotonic() if t is None else t, RECORD_BUILDERS[kind](*values))
+
+    def append(self, t, record):
+        if not self.owner:
+            raise RuntimeError("czytelnik nie zapisuje do bufora telemetrii")
+        n = int(self.header['count'])
+        slot = n % self.capacity
+        self.slots[slot] = 0            # slot w trakcie zapisu
+        self.data[slot] = (t,) + record
+        self.slots[slot] = n + 1
+        self.header['count'] = n + 1
+
+    # ----------------------------- czytelnik -----------------------------
+
+    def _read(self, start, stop):
+        """Kopia rekordów [start, stop); zwraca (rekordy, pierwszy numer)"""
+        if stop <= start:
+            return self.data[:0].copy(), stop
+        idx = np.arange(start, stop) % self.capacity
+        expected = np.arange(start + 1, stop + 1, dtype='u8')
+        before = self.slots[idx]
+        records = self.data[idx]
+        after = self.slots[idx]
+        valid = (before == expected) & (after == expected)
+        # Nadpisywane są zawsze najstarsze - poprawne rekordy to końcówka
+        first = len(valid) - int(np.argmin(valid[::-1])) if not valid.all() else 0
+        return records[first:], start + first
+
+    def latest(self, n=None):
+        """Ostatnie n rekordów (domyślnie wszystkie zachowane)"""
+        count = self.count
+        n = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+        return self._read(count - n, count)[0]
+
+    def read_since(self, seq):
+        """Rekordy zapisane od numeru seq: (rekordy, nowy seq, ile przepadło)"""
+        count = self.count
+        start = max(seq, count - self.capacity, 0)
+        records, first = self._read(start, count)
+        return records, count, max(0, first - seq)
+
+    def close(self):
+        """Wydawca: oznaczenie końca i usunięcie segmentu; czytelnik: odłączenie"""
+        if self._shm is None:
+            return
+        if self.owner:
+            self.header['closed'] = 1
+        self.header = self.slots = self.data = None
+        self._shm.close()
+        if self.owner:
+            _created.discard(self.name)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TelemetryReader:
+    """Czytelnik z własnym numerem sekwencyjnym i licznikiem pominiętych"""
+
+    def __init__(self, name=SHARED_NAME, from_start=False):
+        self.ring = SharedTelemetryRing.attach(name)
+        count = self.ring.count
+        self.seq = max(0, count - self.ring.capacity) if from_start else count
+        self.dropped = 0
+
+    @property
+    def lag(self):
+        """Rekordy zapisane, a jeszcze nieodczytane"""
+        return self.ring.count - self.seq
+
+    def read(self, timeout=0):
+        """Nowe rekordy; czeka do timeout [s], jeśli jeszcze nic nie przyszło"""
+        deadline = time.monotonic() + timeout
+        while self.ring.count == self.seq and not self.ring.closed and time.monotonic() < deadline:
+            time.sleep(READER_POLL)
+        records, self.seq, dropped = self.ring.read_since(self.seq)
+        self.dropped += dropped
+        return records
+
+    def close(self):
+        self.ring.close()
+
+
+def publish(args):
+    from ArduinoRobotPython import RobotInterface
+
+    robot = RobotInterface()
+    if not robot.connect(args.port, args.baud):
+        return 3
+    try:
+        if robot.publish_telemetry(args.name, args.capacity) is None:
+            return 1
+        if not start_telemetry(robot, args.start):
+            return 1
+        start = time.monotonic()
+        while not args.duration or time.monotonic() - start < args.duration:
+            time.sleep(1.0)
+            if args.echo:
+                robot.pump_telemetry()
+            else:
+                drain(robot)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        robot.disconnect()
+    return 0
+
+
+def drain(robot):
+    """Kolejka tekstowej telemetrii nie jest tu czytana - tylko bufor"""
+    while not robot.telemetry.empty():
+        robot.telemetry.get_nowait()
+
+
+def monitor(args):
+    try:
+        reader = TelemetryReader(args.name)
+    except FileNotFoundError:
+        print(f"Brak publikowanej telemetrii '{args.name}' (uruchom wydawcę: --port)")
+        return 1
+    print(f"Podgląd '{args.name}' (pojemność {reader.ring.capacity}), Ctrl+C - koniec")
+    start = last = time.monotonic()
+    received = 0
+    try:
+        while not reader.ring.closed and (not args.duration or time.monotonic() - start < args.duration):
+            records = reader.read(timeout=1.0)
+            received += len(records)
+            now = time.monotonic()
+            if now - last >= 1.0:
+                tail = records[-1] if len(records) else None
+                value = (f", ostatni err={tail['err']:.3f}" if tail is not None else "")
+                print(f"{received / (now - last):7.1f} rek/s, zaległe {reader.lag}, "
+                      f"pominięte {reader.dropped}{value}")
+                received, last = 0, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetria robota w pamięci współdzielonej")
+    parser.add_argument('--name', default=SHARED_NAME, help="nazwa segmentu")
+    parser.add_argument('--port', help="tryb wydawcy: port robota")
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--capacity', type=int, default=TELEMETRY_CAPACITY)
+    add_start_argument(parser)
+    parser.add_argument('--echo', action='store_true', help="wydawca wypisuje też telemetrię")
+    parser.add_argument('--duration', type=float, default=0, help="czas działania [s]")
+    args = parser.parse_args()
+    return publish(args) if args.port else monitor(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
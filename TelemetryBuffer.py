@@ -0,0 +1,150 @@
+"""
+Telemetry Buffer
+Dekodowanie linii telemetrii do rekordów i bufor cykliczny NumPy
+"""
+
+import re
+import threading
+import time
+
+import numpy as np
+
+# Domyślna pojemność bufora (ok. 10 min telemetrii 100 Hz)
+TELEMETRY_CAPACITY = 65536
+
+# Rodzaj rekordu
+KIND_BEAM = 1   # RobotArduino.ino:     "dist : error : output"
+KIND_LINE = 2   # LineFollowerPID.ino:  "POS:.. ERR:.. OUT:.. L:.. R:.. ENC_L:.. ENC_R:.."
+
+TELEMETRY_DTYPE = np.dtype([
+    ('t', 'f8'),        # time.monotonic() odbioru
+    ('kind', 'u1'),
+    ('dist', 'f4'),
+    ('err', 'f4'),
+    ('out', 'f4'),
+    ('pos', 'f4'),
+    ('pwm_l', 'i2'),
+    ('pwm_r', 'i2'),
+    ('enc_l', 'i4'),
+    ('enc_r', 'i4'),
+])
+
+# Start telemetrii zależy od firmware (--start w LivePlot / SessionExport /
+# SharedTelemetry, można podać kilka):
+#   RobotArduino.ino (pochylnia):   TEST_START (TELEMETRY_ON dostaje NACK)
+#   LineFollowerPID.ino:            TELEMETRY_ON + P (dane tylko podczas jazdy)
+#   WallApproachFuzzy.ino:          TELEMETRY_ON albo START (z jazdą)
+DEFAULT_START = ["TELEMETRY_ON"]
+START_HELP = ("komenda uruchamiająca telemetrię, można powtórzyć (domyślnie TELEMETRY_ON; "
+              "pochylnia: TEST_START, Line Follower: TELEMETRY_ON i P, ściana: TELEMETRY_ON / START)")
+
+_NUM = r"([-+]?\d+(?:\.\d+)?)"
+_INT = r"([-+]?\d+)"
+BEAM_LINE = re.compile(rf"^{_NUM}\s*:\s*{_NUM}\s*:\s*{_NUM}$")
+LINE_FOLLOWER_LINE = re.compile(
+    rf"^POS:{_INT} ERR:{_NUM} OUT:{_NUM} L:{_INT} R:{_INT} ENC_L:{_INT} ENC_R:{_INT}$")
+
+_NAN = float('nan')
+
+
+def beam_record(dist, err, out):
+    return (KIND_BEAM, float(dist), float(err), float(out), _NAN, 0, 0, 0, 0)
+
+
+def line_record(pos, err, out, l, r, enc_l, enc_r):
+    return (KIND_LINE, _NAN, float(err), float(out), float(pos),
+            int(l), int(r), int(enc_l), int(enc_r))
+
+
+RECORD_BUILDERS = {'beam': beam_record, 'line': line_record}
+
+
+def decode_line(line):
+    """Linia telemetrii -> krotka pól TELEMETRY_DTYPE (bez 't'); None gdy nieznana"""
+    m = LINE_FOLLOWER_LINE.match(line)
+    if m:
+        return line_record(*m.groups())
+    m = BEAM_LINE.match(line)
+    if m:
+        return beam_record(*m.groups())
+    return None
+
+
+def add_start_argument(parser):
+    parser.add_argument('--start', action='append', default=[], metavar='CMD', help=START_HELP)
+
+
+def start_telemetry(robot, cmds=None):
+    """Komendy startu telemetrii; False (z komunikatem), gdy któraś nie ma ACK"""
+    cmds = cmds or DEFAULT_START
+    nacks = {}
+    for i, (cmd, response) in enumerate(zip(cmds, robot.send_batch(cmds, nacks=nacks))):
+        if response is None or not response.startswith("ACK"):
+            print(f"✗ {cmd}: {nacks.get(i) or response or 'brak odpowiedzi'} - telemetria nie ruszyła "
+                  f"(firmware pochylni: --start TEST_START, Line Follower: --start TELEMETRY_ON --start P)")
+            return False
+    return True
+
+
+class TelemetryRing:
+    """Prealokowany bufor cykliczny rekordów telemetrii.
+
+    `count` to łączna liczba zapisanych rekordów - służy czytelnikom jako
+    numer sekwencyjny (read_since) i pozwala wykryć, że coś ich ominęło."""
+
+    def __init__(self, capacity=TELEMETRY_CAPACITY):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.count = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def push_line(self, line, t=None):
+        """Dekodowanie linii i zapis do bufora; False gdy format nieznany"""
+        record = decode_line(line)
+        if record is None:
+            self.rejected += 1
+            return False
+        self.append(time.monotonic() if t is None else t, record)
+        return True
+
+    def push_values(self, kind, values, t=None):
+        """Zapis wartości już zdekodowanych (np. z ramki binarnej)"""
+        record = RECORD_BUILDERS[kind](*values)
+        self.append(time.monotonic() if t is None else t, record)
+
+    def append(self, t, record):
+        with self._lock:
+            self.data[self.count % self.capacity] = (t,) + record
+            self.count += 1
+
+    def _slice(self, start, stop):
+        """Kopia rekordów o numerach [start, stop) w kolejności chronologicznej"""
+        a, b = start % self.capacity, stop % self.capacity
+        if stop - start <= 0:
+            return self.data[:0].copy()
+        if a < b:
+            return self.data[a:b].copy()
+        return np.concatenate((self.data[a:], self.data[:b]))
+
+    def latest(self, n=None):
+        """Ostatnie n rekordów (domyślnie wszystkie zachowane)"""
+        with self._lock:
+            n = len(self) if n is None else min(n, len(self))
+            return self._slice(self.count - n, self.count)
+
+    def read_since(self, seq):
+        """Rekordy zapisane od numeru seq: (rekordy, nowy seq, ile przepadło)"""
+        with self._lock:
+            oldest = max(0, self.count - self.capacity)
+            dropped = max(0, oldest - seq)
+            start = max(seq, oldest)
+            return self._slice(start, self.count), self.count, dropped
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+            self.rejected = 0
@@ -0,0 +1,641 @@
+#define SERIAL_BAUD_RATE 9600
+
+// Projekt 4 - jazda do ściany: PID prędkości kół + zadana prędkość
+// proporcjonalna do uchybu albo z tablicy regulatora rozmytego.
+// Tablica jest liczona na PC (FuzzyController.py) i przychodzi komendami FZ_*;
+// w pętli sterowania tylko interpolacja z czterech sąsiednich komórek.
+
+// Piny silników
+#define PIN_LEFT_MOTOR_SPEED 5
+#define PIN_LEFT_MOTOR_FORWARD A1
+#define PIN_LEFT_MOTOR_REVERSE A0
+#define PIN_LEFT_ENCODER 2
+
+#define PIN_RIGHT_MOTOR_SPEED 6
+#define PIN_RIGHT_MOTOR_FORWARD A2
+#define PIN_RIGHT_MOTOR_REVERSE A3
+#define PIN_RIGHT_ENCODER 3
+
+// Czujnik odległości IR (ta sama charakterystyka co w Projekcie 1)
+#define PIN_DISTANCE A5
+
+// Enkodery: droga koła na jeden impuls [cm]
+#define CM_PER_TICK 1.04
+volatile int left_encoder_count = 0;
+volatile int right_encoder_count = 0;
+
+// PID prędkości kół: [0] - lewe, [1] - prawe
+float kp[2] = {2.0, 2.0};
+float ki[2] = {0.5, 0.5};
+float kd[2] = {0.1, 0.1};
+float integral[2] = {0.0, 0.0};
+float previousError[2] = {0.0, 0.0};
+float wheelSpeed[2] = {0.0, 0.0};  // [cm/s]
+int pwm[2] = {0, 0};
+
+#define MAX_INTEGRAL 1000.0
+#define MIN_PWM 30  // Dead-zone kompensacja
+#define MAX_PWM 255
+
+// Dojazd do ściany
+float vmax = 50.0;            // [cm/s]
+float distance_point = 20.0;  // [cm]
+#define K_APPROACH 1.5        // zadana prędkość / uchyb bez tablicy [1/s]
+int t = 50;                   // okres regulatora [ms]
+unsigned long lastControlTime = 0;
+
+// Regulator rozmyty: tablica int8 [n_e][n_de], wyjście 127 = VMAX
+#define FZ_MAX_CELLS 576
+#define FZ_SCALE 127.0
+#define FZ_ALPHA 0.7          // filtr pochodnej uchybu
+int8_t fzTable[FZ_MAX_CELLS];
+int fzNE = 0, fzNDE = 0;
+float fzEMin, fzEMax, fzDEMin, fzDEMax;
+bool fzReady = false;   // FZ_CRC zgodne z zawartością tablicy
+bool fzOn = false;
+float fzDerivative = 0.0;
+float fzPrevious = 0.0;
+bool fzHasPrevious = false;
+
+// Stan
+bool running = false;
+bool telemetry = false;
+String inputBuffer = "";
+String seqTag = "";  // "|@<seq>" z ostatniej ramki, odsyłany w odpowiedzi
+bool examMode = false;
+unsigned long examStartTime = 0;
+unsigned long stabilizationStartTime = 0;
+bool stabilizationPhase = false;
+float errorSum = 0.0;
+int errorCount = 0;
+
+// Tryb binarny: COBS([typ, dane..., crc8]) + 0x00 (BinaryProtocol.py)
+#define FRAME_TEXT 0x01
+#define FRAME_BEAM 0x10
+#define BIN_BUFFER_SIZE 72
+bool binaryMode = false;
+uint8_t binBuffer[BIN_BUFFER_SIZE];
+uint8_t binLen = 0;
+
+// Zmiana prędkości łącza (BaudNegotiation.py): BAUD <r> -> ACK jeszcze na starej
+// prędkości, przełączenie; BAUD_OK na nowej zatwierdza, bez niego po
+// BAUD_CONFIRM_MS powrót do poprzedniej - nieudana próba nie zrywa łącza
+#define BAUD_CONFIRM_MS 1000
+long baudRate = SERIAL_BAUD_RATE;
+long previousBaud = 0;  // != 0 - nowa prędkość czeka na BAUD_OK
+unsigned long baudSwitchTime = 0;
+
+// ========================= FUNKCJE POMOCNICZE =========================
+
+void left_encoder() {
+  left_encoder_count++;
+}
+
+void right_encoder() {
+  right_encoder_count++;
+}
+
+// Pomiar odległości z czujnika IR
+float get_dist(int n) {
+  long sum = 0;
+  for (int i = 0; i < n; i++) {
+    sum = sum + analogRead(PIN_DISTANCE);
+  }
+  float adc = sum / n;
+  float distance_cm = 17569.7 * pow(adc, -1.2062);
+  return distance_cm;
+}
+
+// ========================= TRYB BINARNY =========================
+
+uint8_t crc8(const uint8_t* data, int len) {
+  uint8_t crc = 0;
+  for (int i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+int16_t clamp16(float v) {
+  if (v > 32767.0) return 32767;
+  if (v < -32768.0) return -32768;
+  return (int16_t)v;
+}
+
+// Wysłanie ramki: COBS([typ, dane..., crc8]) + 0x00
+void sendFrame(uint8_t type, const uint8_t* data, uint8_t len) {
+  uint8_t raw[BIN_BUFFER_SIZE];
+  uint8_t out[BIN_BUFFER_SIZE + 2];
+  if (len > BIN_BUFFER_SIZE - 2) len = BIN_BUFFER_SIZE - 2;
+  raw[0] = type;
+  memcpy(raw + 1, data, len);
+  raw[len + 1] = crc8(raw, len + 1);
+
+  uint8_t codeIdx = 0, code = 1, o = 1;
+  for (uint8_t i = 0; i < len + 2; i++) {
+    if (raw[i] == 0) {
+      out[codeIdx] = code;
+      codeIdx = o++;
+      code = 1;
+    } else {
+      out[o++] = raw[i];
+      code++;
+    }
+  }
+  out[codeIdx] = code;
+  Serial.write(out, o);
+  Serial.write((uint8_t)0);
+}
+
+// Dekodowanie COBS w miejscu; zwraca długość lub 0 przy błędzie
+uint8_t cobsDecode(uint8_t* buf, uint8_t len) {
+  uint8_t i = 0, o = 0;
+  while (i < len) {
+    uint8_t code = buf[i++];
+    if (code == 0 || i + code - 1 > len) return 0;
+    for (uint8_t k = 1; k < code; k++) buf[o++] = buf[i++];
+    if (code < 0xFF && i < len) buf[o++] = 0;
+  }
+  return o;
+}
+
+// ========================= PRĘDKOŚĆ ŁĄCZA =========================
+
+bool baudAllowed(long rate) {
+  return rate == 9600 || rate == 19200 || rate == 38400 || rate == 57600 ||
+         rate == 115200 || rate == 250000 || rate == 500000;
+}
+
+void switchBaud(long rate) {
+  Serial.flush();  // ACK musi wyjść na starej prędkości
+  Serial.end();
+  Serial.begin(rate);
+  baudRate = rate;
+  inputBuffer = "";
+  binLen = 0;
+}
+
+// ========================= KOMUNIKACJA =========================
+
+// Walidacja ramki
+bool validateFrame(String frame) {
+  int sepIndex = frame.indexOf('|');
+  if (sepIndex == -1) return false;
+
+  String cmd = frame.substring(0, sepIndex);
+  String checksumStr = frame.substring(sepIndex + 1);
+  int receivedChecksum = checksumStr.toInt();
+
+  int calculatedChecksum = 0;
+  for (int i = 0; i < cmd.length(); i++) {
+    calculatedChecksum += cmd[i];
+  }
+  calculatedChecksum %= 256;
+
+  return receivedChecksum == calculatedChecksum;
+}
+
+// Numer sekwencyjny ramki (CMD|checksum|@seq) - pusty dla starych klientów
+String extractSeq(String frame) {
+  int at = frame.indexOf("|@");
+  if (at == -1) return "";
+  return frame.substring(at);
+}
+
+// Ramka tekstowa: "msg#" w ASCII lub FRAME_TEXT w trybie binarnym
+void sendText(String msg) {
+  if (binaryMode) {
+    sendFrame(FRAME_TEXT, (const uint8_t*)msg.c_str(), msg.length());
+  } else {
+    Serial.print(msg);
+    Serial.println("#");
+  }
+}
+
+// Odpowiedź z echem numeru sekwencyjnego
+void reply(String msg) {
+  sendText(msg + seqTag);
+}
+
+// ========================= SILNIKI =========================
+
+void setMotors(int leftPWM, int rightPWM) {
+  // Lewy silnik
+  if (leftPWM >= 0) {
+    digitalWrite(PIN_LEFT_MOTOR_FORWARD, HIGH);
+    digitalWrite(PIN_LEFT_MOTOR_REVERSE, LOW);
+    analogWrite(PIN_LEFT_MOTOR_SPEED, leftPWM == 0 ? 0 : constrain(leftPWM, MIN_PWM, MAX_PWM));
+  } else {
+    digitalWrite(PIN_LEFT_MOTOR_FORWARD, LOW);
+    digitalWrite(PIN_LEFT_MOTOR_REVERSE, HIGH);
+    analogWrite(PIN_LEFT_MOTOR_SPEED, constrain(-leftPWM, MIN_PWM, MAX_PWM));
+  }
+
+  // Prawy silnik
+  if (rightPWM >= 0) {
+    digitalWrite(PIN_RIGHT_MOTOR_FORWARD, HIGH);
+    digitalWrite(PIN_RIGHT_MOTOR_REVERSE, LOW);
+    analogWrite(PIN_RIGHT_MOTOR_SPEED, rightPWM == 0 ? 0 : constrain(rightPWM, MIN_PWM, MAX_PWM));
+  } else {
+    digitalWrite(PIN_RIGHT_MOTOR_FORWARD, LOW);
+    digitalWrite(PIN_RIGHT_MOTOR_REVERSE, HIGH);
+    analogWrite(PIN_RIGHT_MOTOR_SPEED, constrain(-rightPWM, MIN_PWM, MAX_PWM));
+  }
+}
+
+void stopMotors() {
+  analogWrite(PIN_LEFT_MOTOR_SPEED, 0);
+  analogWrite(PIN_RIGHT_MOTOR_SPEED, 0);
+}
+
+void resetMotion() {
+  for (int s = 0; s < 2; s++) {
+    integral[s] = 0.0;
+    previousError[s] = 0.0;
+    pwm[s] = 0;
+  }
+  fzDerivative = 0.0;
+  fzHasPrevious = false;
+  stopMotors();
+}
+
+// ========================= REGULATOR ROZMYTY =========================
+
+// Komórka i ułamek położenia między węzłami osi (przycięte do zakresu)
+int fuzzyAxis(float x, float low, float high, int n, float* frac) {
+  float pos = (x - low) * (n - 1) / (high - low);
+  if (pos < 0.0) pos = 0.0;
+  if (pos > n - 1) pos = n - 1;
+  int i = (int)pos;
+  if (i > n - 2) i = n - 2;
+  *frac = pos - i;
+  return i;
+}
+
+// Zadana prędkość z tablicy: interpolacja dwuliniowa, ułamek VMAX
+float fuzzyLookup(float e, float de) {
+  float fx, fy;
+  int i = fuzzyAxis(e, fzEMin, fzEMax, fzNE, &fx);
+  int j = fuzzyAxis(de, fzDEMin, fzDEMax, fzNDE, &fy);
+  int k = i * fzNDE + j;
+  float low = (1 - fy) * fzTable[k] + fy * fzTable[k + 1];
+  float high = (1 - fy) * fzTable[k + fzNDE] + fy * fzTable[k + fzNDE + 1];
+  return ((1 - fx) * low + fx * high) / FZ_SCALE;
+}
+
+int hexDigit(char c) {
+  if (c >= '0' && c <= '9') return c - '0';
+  if (c >= 'A' && c <= 'F') return c - 'A' + 10;
+  if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+  return -1;
+}
+
+// FZ_DIM(n_e,n_de,e_min,e_max,de_min,de_max)
+void fuzzyDim(String body) {
+  float values[6];
+  int pos = 0;
+  for (int k = 0; k < 6; k++) {
+    int comma = body.indexOf(',', pos);
+    if (comma == -1) comma = body.length();
+    values[k] = body.substring(pos, comma).toFloat();
+    pos = comma + 1;
+  }
+  int ne = (int)values[0], nde = (int)values[1];
+  if (ne < 2 || nde < 2 || (long)ne * nde > FZ_MAX_CELLS ||
+      values[3] <= values[2] || values[5] <= values[4]) {
+    reply("NACK|FZ_SIZE");
+    return;
+  }
+  fzNE = ne;
+  fzNDE = nde;
+  fzEMin = values[2];
+  fzEMax = values[3];
+  fzDEMin = values[4];
+  fzDEMax = values[5];
+  memset(fzTable, 0, sizeof(fzTable));
+  fzReady = false;
+  fzOn = false;
+  reply("ACK|FZ_DIM=" + String(fzNE) + "x" + String(fzNDE));
+}
+
+// FZ_LUT <offset> <hex> - kawałek tablicy wierszami po e
+void fuzzyChunk(String args) {
+  int space = args.indexOf(' ');
+  if (fzNE == 0) {
+    reply("NACK|FZ_NO_DIM");
+    return;
+  }
+  int offset = args.substring(0, space).toInt();
+  String hex = args.substring(space + 1);
+  int count = hex.length() / 2;
+  if (space == -1 || count == 0 || hex.length() % 2 != 0 ||
+      offset < 0 || offset + count > fzNE * fzNDE) {
+    reply("NACK|FZ_RANGE");
+    return;
+  }
+  for (int k = 0; k < count; k++) {
+    int hi = hexDigit(hex[2 * k]), lo = hexDigit(hex[2 * k + 1]);
+    if (hi < 0 || lo < 0) {
+      reply("NACK|FZ_RANGE");
+      return;
+    }
+    fzTable[offset + k] = (int8_t)(hi * 16 + lo);
+  }
+  fzReady = false;
+  fzOn = false;
+  reply("ACK|FZ_LUT=" + String(offset));
+}
+
+// ========================= STEROWANIE =========================
+
+void control() {
+  float dt = t / 1000.0;
+  float dist = get_dist(20);
+  float error = dist - distance_point;
+  float vSet;
+
+  if (fzOn) {
+    if (fzHasPrevious) {
+      float raw = (error - fzPrevious) / dt;
+      fzDerivative = FZ_ALPHA * fzDerivative + (1 - FZ_ALPHA) * raw;
+    }
+    fzPrevious = error;
+    fzHasPrevious = true;
+    vSet = fuzzyLookup(error, fzDerivative) * vmax;
+  } else {
+    vSet = constrain(K_APPROACH * error, -vmax, vmax);
+  }
+
+  // Prędkość kół z impulsów enkoderów (kierunek z ostatniego PWM)
+  noInterrupts();
+  int ticks[2] = {left_encoder_count, right_encoder_count};
+  left_encoder_count = 0;
+  right_encoder_count = 0;
+  interrupts();
+
+  for (int s = 0; s < 2; s++) {
+    wheelSpeed[s] = ticks[s] * CM_PER_TICK / dt * (pwm[s] < 0 ? -1 : 1);
+    float e = vSet - wheelSpeed[s];
+    integral[s] = constrain(integral[s] + e * dt, -MAX_INTEGRAL, MAX_INTEGRAL);
+    float derivative = (e - previousError[s]) / dt;
+    previousError[s] = e;
+    pwm[s] = (int)constrain(kp[s] * e + ki[s] * integral[s] + kd[s] * derivative, -MAX_PWM, MAX_PWM);
+  }
+  setMotors(pwm[0], pwm[1]);
+
+  if (telemetry || examMode) {
+    if (binaryMode) {
+      int16_t packed[3] = {clamp16(dist * 100), clamp16(error * 100), clamp16(vSet * 100)};
+      sendFrame(FRAME_BEAM, (uint8_t*)packed, sizeof(packed));
+    } else {
+      Serial.print(dist);
+      Serial.print(" : ");
+      Serial.print(error);
+      Serial.print(" : ");
+      Serial.println(vSet);
+    }
+  }
+
+  // Akumulacja MAE w fazie 2 EXAM
+  if (stabilizationPhase) {
+    errorSum += (error >= 0) ? error : -error;
+    errorCount++;
+  }
+}
+
+// Tryb egzaminacyjny: 10 s dojazd + 3 s pomiar MAE
+void updateExam() {
+  unsigned long elapsed = millis() - examStartTime;
+  if (elapsed >= 10000 && !stabilizationPhase) {
+    stabilizationPhase = true;
+    stabilizationStartTime = millis();
+    errorSum = 0.0;
+    errorCount = 0;
+  }
+  if (stabilizationPhase && millis() - stabilizationStartTime >= 3000) {
+    float mae = (errorCount > 0) ? (errorSum / errorCount) : 0.0;
+    sendText("RESULT|MAE:" + String(mae, 2));
+    examMode = false;
+    stabilizationPhase = false;
+    resetMotion();
+  }
+}
+
+// ========================= KOMENDY =========================
+
+void parseCommand(String frame) {
+  int sepIndex = frame.indexOf('|');
+  String cmd = frame.substring(0, sepIndex);
+  int space = cmd.indexOf(' ');
+  String name = (space == -1) ? cmd : cmd.substring(0, space);
+  String arg = (space == -1) ? "" : cmd.substring(space + 1);
+
+  if (name.length() == 4 && (name.startsWith("KP_") || name.startsWith("KI_") || name.startsWith("KD_")) &&
+      (name[3] == 'L' || name[3] == 'R')) {
+    int s = (name[3] == 'L') ? 0 : 1;
+    float value = arg.toFloat();
+    if (name[1] == 'P') kp[s] = value;
+    else if (name[1] == 'I') ki[s] = value;
+    else kd[s] = value;
+    reply("ACK|" + name + "=" + String(value, 2));
+  }
+  else if (name == "VMAX") {
+    vmax = arg.toFloat();
+    reply("ACK|VMAX=" + String(vmax, 2));
+  }
+  else if (cmd.startsWith("SET_TARGET(")) {
+    distance_point = cmd.substring(11, cmd.length() - 1).toFloat();
+    reply("ACK|TARGET_SET");
+  }
+  else if (cmd == "START") {
+    running = true;
+    telemetry = true;
+    resetMotion();
+    reply("ACK|WALL_APPROACH_ON");
+  }
+  else if (cmd == "STOP") {
+    running = false;
+    telemetry = false;
+    resetMotion();
+    reply("ACK|WALL_APPROACH_OFF");
+  }
+  else if (cmd == "EXAM_START") {
+    running = false;
+    examMode = true;
+    stabilizationPhase = false;
+    examStartTime = millis();
+    errorSum = 0.0;
+    errorCount = 0;
+    resetMotion();
+    reply("ACK|EXAM_STARTED");
+  }
+  else if (cmd == "EXAM_STOP") {
+    examMode = false;
+    stabilizationPhase = false;
+    resetMotion();
+    reply("ACK|EXAM_STOPPED");
+  }
+  else if (cmd.startsWith("FZ_DIM(")) {
+    fuzzyDim(cmd.substring(7, cmd.length() - 1));
+  }
+  else if (name == "FZ_LUT") {
+    fuzzyChunk(arg);
+  }
+  else if (name == "FZ_CRC") {
+    fzReady = fzNE > 0 && crc8((const uint8_t*)fzTable, fzNE * fzNDE) == arg.toInt();
+    reply(fzReady ? "ACK|FZ_READY" : "NACK|FZ_CRC");
+  }
+  else if (cmd == "FZ_ON") {
+    if (!fzReady) {
+      reply("NACK|FZ_NOT_READY");
+    } else {
+      fzOn = true;
+      fzDerivative = 0.0;
+      fzHasPrevious = false;
+      reply("ACK|FZ_ON");
+    }
+  }
+  else if (cmd == "FZ_OFF") {
+    fzOn = false;
+    reply("ACK|FZ_OFF");
+  }
+  else if (cmd == "TELEMETRY_ON") {
+    telemetry = true;
+    reply("ACK|TELEMETRY_ON");
+  }
+  else if (cmd == "TELEMETRY_OFF") {
+    telemetry = false;
+    reply("ACK|TELEMETRY_OFF");
+  }
+  else if (cmd == "READ_DISTANCE") {
+    reply("ACK|DIST:" + String(get_dist(100), 2));
+  }
+  else if (cmd == "STATUS") {
+    reply("ACK|KP_L:" + String(kp[0]) + ",KI_L:" + String(ki[0]) + ",KD_L:" + String(kd[0]) +
+          ",KP_R:" + String(kp[1]) + ",KI_R:" + String(ki[1]) + ",KD_R:" + String(kd[1]) +
+          ",VMAX:" + String(vmax) + ",DIST_POINT:" + String(distance_point));
+  }
+  else if (cmd == "PING") {
+    reply("ACK|PONG");
+  }
+  else if (name == "BAUD") {
+    long rate = arg.toInt();
+    if (!baudAllowed(rate)) {
+      reply("NACK|BAD_BAUD");
+    } else {
+      reply("ACK|BAUD=" + String(rate));
+      if (previousBaud == 0) previousBaud = baudRate;
+      baudSwitchTime = millis();
+      switchBaud(rate);
+    }
+  }
+  else if (cmd == "BAUD_OK") {
+    previousBaud = 0;
+    reply("ACK|BAUD_OK=" + String(baudRate));
+  }
+  else if (name == "ECHO") {
+    reply("ACK|ECHO=" + arg);
+  }
+  else if (cmd == "BIN_ON") {
+    reply("ACK|BIN_ON");   // potwierdzenie jeszcze tekstowo
+    binaryMode = true;
+    binLen = 0;
+  }
+  else if (cmd == "BIN_OFF") {
+    reply("ACK|BIN_OFF");  // potwierdzenie już binarnie
+    binaryMode = false;
+    inputBuffer = "";
+  }
+  else {
+    reply("NACK|UNKNOWN_CMD");
+  }
+}
+
+// Obsługa kompletnej ramki CMD|checksum[|@seq]
+void handleFrame(String frame) {
+  seqTag = extractSeq(frame);
+  if (validateFrame(frame)) {
+    parseCommand(frame);
+  } else {
+    reply("NACK|BAD_CHECKSUM");
+  }
+  seqTag = "";
+}
+
+// Bajt w trybie binarnym - ramka kończy się na 0x00
+void handleBinaryByte(uint8_t c) {
+  if (c != 0) {
+    if (binLen < BIN_BUFFER_SIZE) binBuffer[binLen] = c;
+    if (binLen <= BIN_BUFFER_SIZE) binLen++;   // nasycenie: za długa ramka nie zawija uint8_t
+    return;
+  }
+  uint8_t n = (binLen <= BIN_BUFFER_SIZE) ? cobsDecode(binBuffer, binLen) : 0;
+  binLen = 0;
+  if (n < 2 || crc8(binBuffer, n - 1) != binBuffer[n - 1] || binBuffer[0] != FRAME_TEXT) {
+    reply("NACK|BAD_CHECKSUM");
+    return;
+  }
+  binBuffer[n - 1] = 0;  // CRC -> terminator napisu
+  handleFrame(String((char*)(binBuffer + 1)));
+}
+
+// ========================= SETUP / LOOP =========================
+
+void setup() {
+  Serial.begin(SERIAL_BAUD_RATE);
+
+  pinMode(PIN_LEFT_MOTOR_SPEED, OUTPUT);
+  pinMode(PIN_LEFT_MOTOR_FORWARD, OUTPUT);
+  pinMode(PIN_LEFT_MOTOR_REVERSE, OUTPUT);
+  pinMode(PIN_RIGHT_MOTOR_SPEED, OUTPUT);
+  pinMode(PIN_RIGHT_MOTOR_FORWARD, OUTPUT);
+  pinMode(PIN_RIGHT_MOTOR_REVERSE, OUTPUT);
+  stopMotors();
+
+  pinMode(PIN_LEFT_ENCODER, INPUT);
+  pinMode(PIN_RIGHT_ENCODER, INPUT);
+  attachInterrupt(digitalPinToInterrupt(PIN_LEFT_ENCODER), left_encoder, RISING);
+  attachInterrupt(digitalPinToInterrupt(PIN_RIGHT_ENCODER), right_encoder, RISING);
+
+  pinMode(PIN_DISTANCE, INPUT);
+  lastControlTime = millis();
+}
+
+void loop() {
+  unsigned long currentTime = millis();
+
+  // Nowa prędkość niezatwierdzona przez BAUD_OK - powrót do poprzedniej
+  if (previousBaud != 0 && currentTime - baudSwitchTime >= BAUD_CONFIRM_MS) {
+    switchBaud(previousBaud);
+    previousBaud = 0;
+  }
+
+  // Nieblokująca obsługa komunikacji szeregowej
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (binaryMode) {
+      handleBinaryByte((uint8_t)c);
+    } else if (c == '#') {
+      handleFrame(inputBuffer);
+      inputBuffer = "";
+    } else if (c != '\r' && c != '\n') {
+      inputBuffer += c;
+    }
+  }
+
+  // Pętla sterowania
+  if ((running || examMode) && currentTime - lastControlTime >= (unsigned long)t) {
+    lastControlTime = currentTime;
+    control();
+    if (examMode) {
+      updateExam();
+    }
+  }
+
+  if (!running && !examMode) {
+    stopMotors();
+  }
+}
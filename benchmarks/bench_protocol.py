@@ -0,0 +1,276 @@
+"""
+Benchmark: stos protokołu po stronie PC
+
+Mierzy bez sprzętu (FakeSerial w pamięci):
+  checksum    - calculate_checksum / build_frame / ramka binarna [ops/s]
+  rtt         - czas send_command przy różnych opóźnieniach i stratach łącza
+  telemetry   - dekodowanie telemetrii ASCII i binarnej przez _feed [linie/s]
+  log         - koszt log_message na wpis (sama pamięć / z LogSink na dysk)
+  memory      - przyrost pamięci (tracemalloc) w długiej sesji
+
+Wynik to JSON (stdout albo --out), do porównania między wersjami:
+
+    python benchmarks/bench_protocol.py --out wynik.json
+    python benchmarks/bench_protocol.py --quick --only checksum telemetry
+    python benchmarks/bench_protocol.py --compare stary.json --out nowy.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import BinaryProtocol
+from ArduinoRobotPython import RobotInterface
+from fake_serial import FakeSerial
+
+SECTIONS = ('checksum', 'rtt', 'telemetry', 'log', 'memory')
+LATENCIES = (0.001, 0.005, 0.02)    # opóźnienie odpowiedzi urządzenia [s]
+LOSSES = (0.0, 0.05, 0.2)           # prawdopodobieństwo zgubienia ramki
+READ_SIZE = 256                     # bajty na jeden odczyt wątku czytającego
+
+BEAM_TEXT = b"23.45 : -1.55 : 12.30\r\n"
+LINE_TEXT = b"POS:2012 ERR:0.006 OUT:0.84 L:70 R:70 ENC_L:120 ENC_R:118\r\n"
+BEAM_PACKED = BinaryProtocol.encode_frame(
+    BinaryProtocol.FRAME_BEAM, BinaryProtocol.BEAM_STRUCT.pack(2345, -155, 1230))
+LINE_PACKED = BinaryProtocol.encode_frame(
+    BinaryProtocol.FRAME_LINE, BinaryProtocol.LINE_STRUCT.pack(2012, 60, 84, 70, 70, 120, 118))
+
+
+def rate(fn, n):
+    """Wywołania fn(i) na sekundę"""
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return round(n / (time.perf_counter() - start))
+
+
+def drain(q):
+    while not q.empty():
+        q.get_nowait()
+
+
+# ----------------------------- sekcje -----------------------------
+
+def bench_checksum(scale):
+    robot = RobotInterface()
+    n = 200000 // scale
+    return {
+        'calculate_checksum_ops': rate(lambda i: robot.calculate_checksum("KP_L 2.50"), n),
+        'build_frame_ops': rate(lambda i: robot.build_frame("KP_L 2.50", i), n),
+        'encode_binary_ops': rate(lambda i: BinaryProtocol.encode_text(
+            robot.build_frame("KP_L 2.50", i).rstrip('#')), n // 4),
+    }
+
+
+def bench_rtt(scale):
+    count = max(10, 100 // scale)
+    results = {}
+    for latency in LATENCIES:
+        for loss in LOSSES:
+            ser = FakeSerial(latency=latency, loss=loss, seed=1)
+            robot = RobotInterface()
+            robot.ser = ser
+            robot.start_reader()
+            robot.send_batch(["PING"] * 5)     # rozgrzanie RTO
+            times, failed = [], 0
+            for i in range(count):
+                start = time.perf_counter()
+                if robot.send_command(f"KP_L {i / 10:.1f}") is None:
+                    failed += 1
+                times.append(time.perf_counter() - start)
+            robot.stop_reader()
+            ser.close()
+            ms = [t * 1000 for t in times]
+            cuts = statistics.quantiles(ms, n=100, method='inclusive')
+            results[f"latency_{latency * 1000:g}ms_loss_{loss:g}"] = {
+                'latency_ms': latency * 1000,
+                'loss': loss,
+                'commands': count,
+                'failed': failed,
+                'mean_ms': round(statistics.fmean(ms), 3),
+                'p50_ms': round(cuts[49], 3),
+                'p95_ms': round(cuts[94], 3),
+                'max_ms': round(max(ms), 3),
+                'rto_ms': round(robot.rto.timeout() * 1000, 1),
+            }
+    return results
+
+
+def feed_rate(data, lines, binary):
+    robot = RobotInterface()
+    robot.binary_mode = binary
+    buf = bytearray()
+    start = time.perf_counter()
+    for pos in range(0, len(data), READ_SIZE):
+        buf.extend(data[pos:pos + READ_SIZE])
+        robot._feed(buf)
+        drain(robot.telemetry)
+    elapsed = time.perf_counter() - start
+    assert robot.metrics.telemetry_lines == lines, "nie wszystkie linie zdekodowane"
+    return round(lines / elapsed)
+
+
+def bench_telemetry(scale):
+    n = 50000 // scale
+    return {
+        'ascii_beam_lines_per_s': feed_rate(BEAM_TEXT * n, n, False),
+        'ascii_line_lines_per_s': feed_rate(LINE_TEXT * n, n, False),
+        'binary_beam_frames_per_s': feed_rate(BEAM_PACKED * n, n, True),
+        'binary_line_frames_per_s': feed_rate(LINE_PACKED * n, n, True),
+    }
+
+
+def log_cost(robot, n):
+    start = time.perf_counter_ns()
+    for i in range(n):
+        robot.log_message(f"TX: KP_L 2.50|123|@{i}")
+    return round((time.perf_counter_ns() - start) / n)
+
+
+def bench_log(scale):
+    n = 100000 // scale
+    results = {'memory_ns_per_msg': log_cost(RobotInterface(), n)}
+    with tempfile.TemporaryDirectory() as directory:
+        robot = RobotInterface()
+        robot.open_log(directory)
+        results['sink_ns_per_msg'] = log_cost(robot, n)
+        start = time.perf_counter()
+        robot.close_log()
+        results['sink_close_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        results['sink_bytes_per_msg'] = round(
+            sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / n, 1)
+    return results
+
+
+def session_step(robot, i):
+    """Jeden cykl sesji: linia telemetrii, co 10 - komenda z odpowiedzią"""
+    buf = bytearray(BEAM_TEXT)
+    if i % 10 == 0:
+        cmd = f"KP_L {i % 100 / 10:.1f}"
+        seq = robot._next_seq()
+        robot.log_message(f"TX: {robot.build_frame(cmd, seq).strip('#')}")
+        robot.metrics.on_send(cmd)
+        buf += f"ACK|{cmd.replace(' ', '=')}|@{seq}#\r\n".encode()
+        robot._feed(buf)
+        robot.metrics.on_reply(cmd, robot.wait_reply(0)[1], 0.004)
+    else:
+        robot._feed(buf)
+    drain(robot.telemetry)
+
+
+def bench_memory(scale):
+    steps = 400000 // scale
+    checkpoints = 8
+    robot = RobotInterface()
+    tracemalloc.start()
+    try:
+        # Rozgrzanie: zapełnienie ostatnich wpisów logu (deque) - dalej
+        # pamięć nie powinna już rosnąć
+        warmup = 0
+        while len(robot.log) < robot.log.maxlen or warmup < steps // checkpoints:
+            session_step(robot, warmup)
+            warmup += 1
+        base = tracemalloc.get_traced_memory()[0]
+        samples = []
+        for c in range(checkpoints):
+            for i in range(steps // checkpoints):
+                session_step(robot, warmup + c * steps // checkpoints + i)
+            samples.append(tracemalloc.get_traced_memory()[0] - base)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    measured = checkpoints * (steps // checkpoints)
+    return {
+        'warmup_steps': warmup,
+        'steps': measured,
+        'growth_bytes': samples,
+        'growth_bytes_per_1k_steps': round(samples[-1] / measured * 1000, 2),
+        'peak_bytes': peak,
+        'log_entries_kept': len(robot.log),
+    }
+
+
+BENCHMARKS = {
+    'checksum': bench_checksum,
+    'rtt': bench_rtt,
+    'telemetry': bench_telemetry,
+    'log': bench_log,
+    'memory': bench_memory,
+}
+
+
+# ----------------------------- wynik -----------------------------
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def flatten(data, prefix=""):
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, path + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def compare(old, new):
+    """Stosunek nowy/stary dla każdej wspólnej liczby"""
+    before = dict(flatten(old['results']))
+    for path, value in flatten(new['results']):
+        if before.get(path):
+            print(f"{path:60s} {before[path]:>12g} -> {value:>12g}  x{value / before[path]:.2f}",
+                  file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--quick", action="store_true", help="10x mniej iteracji")
+    parser.add_argument("--out", help="plik JSON (domyślnie stdout)")
+    parser.add_argument("--compare", metavar="JSON", help="poprzedni wynik do porównania")
+    args = parser.parse_args()
+
+    scale = 10 if args.quick else 1
+    report = {'environment': environment(), 'quick': args.quick, 'results': {}}
+    # Komunikaty klienta (timeouty, ponowienia) nie mogą zepsuć JSON na stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        for name in args.only:
+            start = time.perf_counter()
+            report['results'][name] = BENCHMARKS[name](scale)
+            print(f"{name}: {time.perf_counter() - start:.1f}s")
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
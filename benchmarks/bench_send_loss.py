@@ -0,0 +1,110 @@
+"""
+Benchmark: utrata telemetrii podczas wysyłania komend
+
+Porównuje dawną ścieżkę send_command (reset_input_buffer przed każdą
+ramką, odczyt tylko w trakcie oczekiwania na ACK) z obecną: wątek
+czytający + wysyłka bez czyszczenia bufora. Urządzenie nadaje telemetrię
+100 Hz i co 50 linii ramkę RESULT, a w tym czasie co `--gap` sekund
+zmieniane jest wzmocnienie.
+
+    python benchmarks/bench_send_loss.py [--commands 100] [--hz 100] [--gap 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ArduinoRobotPython import RobotInterface
+from fake_serial import FakeSerial
+
+
+def legacy_send_command(ser, cmd, counts, timeout=1.0):
+    """Kopia dawnej ścieżki wysyłki (jedna próba), zlicza odebrane linie"""
+    checksum = sum(ord(c) for c in cmd) % 256
+    ser.reset_input_buffer()
+    ser.reset_output_buffer()
+    ser.write(f"{cmd}|{checksum}#".encode())
+    ser.flush()
+    start = time.time()
+    while (time.time() - start) < timeout:
+        if ser.in_waiting > 0:
+            line = ser.readline().decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            if not line.endswith('#'):
+                counts["telemetry"] += 1
+                continue
+            if line.startswith("ACK"):
+                return line.strip('#')
+            if line.startswith("RESULT"):
+                counts["results"] += 1
+        else:
+            time.sleep(0.01)
+    return None
+
+
+def drain(q):
+    n = 0
+    while not q.empty():
+        q.get_nowait()
+        n += 1
+    return n
+
+
+def run_legacy(ser, commands, gap):
+    counts = {"telemetry": 0, "results": 0}
+    for i in range(commands):
+        legacy_send_command(ser, f"KP_L {i / 10:.1f}", counts)
+        time.sleep(gap)
+    ser.stop_telemetry()
+    return counts
+
+
+def run_current(ser, commands, gap):
+    counts = {"telemetry": 0, "results": 0}
+    robot = RobotInterface()
+    robot.ser = ser
+    robot.start_reader()
+    for i in range(commands):
+        robot.send_command(f"KP_L {i / 10:.1f}")
+        time.sleep(gap)
+    ser.stop_telemetry()
+    time.sleep(0.1)
+    robot.stop_reader()
+    counts["telemetry"] = drain(robot.telemetry)
+    counts["results"] = drain(robot.results)
+    return counts
+
+
+def run(runner, commands, hz, gap):
+    ser = FakeSerial(telemetry_hz=hz, latency=0.01, result_every=50)
+    start = time.monotonic()
+    counts = runner(ser, commands, gap)
+    return {
+        "telemetry_sent": ser.telemetry_sent,
+        "telemetry_lost": ser.telemetry_sent - counts["telemetry"],
+        "results_sent": ser.results_sent,
+        "results_lost": ser.results_sent - counts["results"],
+        "seconds": round(time.monotonic() - start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--hz", type=float, default=100.0)
+    parser.add_argument("--gap", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for name, runner in (("przed (flush)", run_legacy), ("po", run_current)):
+        r = run(runner, args.commands, args.hz, args.gap)
+        print(f"{name:14s} telemetria: {r['telemetry_lost']:5d}/{r['telemetry_sent']:5d} "
+              f"utraconych, RESULT: {r['results_lost']}/{r['results_sent']}, "
+              f"{r['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
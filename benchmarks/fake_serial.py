@@ -0,0 +1,141 @@
+"""
+Fake Serial
+Pamięciowa atrapa portu szeregowego do benchmarków (bez sprzętu)
+"""
+
+import heapq
+import random
+import threading
+import time
+
+
+class FakeSerial:
+    """Udaje `serial.Serial` podłączony do prostego urządzenia.
+
+    Urządzenie odsyła ACK (z echem |@seq) po czasie `latency`, gubi ramki
+    z prawdopodobieństwem `loss` i nadaje telemetrię z częstotliwością
+    `telemetry_hz`. Co `result_every` linii telemetrii wysyła ramkę RESULT."""
+
+    def __init__(self, telemetry_hz=0.0, latency=0.002, loss=0.0,
+                 echo_seq=True, result_every=0, seed=0):
+        self.port = "fake://"
+        self.baudrate = 9600
+        self.timeout = 0.05
+        self.is_open = True
+        self.latency = latency
+        self.loss = loss
+        self.echo_seq = echo_seq
+        self.result_every = result_every
+        self.telemetry_hz = telemetry_hz
+        self.telemetry_sent = 0
+        self.results_sent = 0
+        self.frames_received = 0
+        self._rng = random.Random(seed)
+        self._cond = threading.Condition()
+        self._rx = bytearray()
+        self._pending = []      # kopiec (czas dostarczenia, nr, bajty)
+        self._counter = 0
+        self._tx = ""
+        self._next_telemetry = time.monotonic()
+
+    # ----------------------------- model urządzenia -----------------------------
+
+    def _schedule(self, when, data):
+        self._counter += 1
+        heapq.heappush(self._pending, (when, self._counter, data))
+
+    def _pump(self):
+        now = time.monotonic()
+        if self.telemetry_hz > 0:
+            period = 1.0 / self.telemetry_hz
+            while self._next_telemetry <= now:
+                self.telemetry_sent += 1
+                if self.result_every and self.telemetry_sent % self.result_every == 0:
+                    self.results_sent += 1
+                    self._schedule(self._next_telemetry, b"RESULT|MAE:0.50#\r\n")
+                line = f"{self.telemetry_sent} : 0.00 : 0.00\r\n".encode()
+                self._schedule(self._next_telemetry, line)
+                self._next_telemetry += period
+        while self._pending and self._pending[0][0] <= now:
+            self._rx.extend(heapq.heappop(self._pending)[2])
+
+    def _reply(self, frame):
+        cmd = frame.split("|", 1)[0]
+        tag = ""
+        if self.echo_seq and "|@" in frame:
+            tag = frame[frame.index("|@"):]
+        if cmd == "PING":
+            body = "ACK|PONG"
+        elif cmd.startswith("BIN_"):
+            body = "NACK|UNKNOWN_CMD"   # urządzenie tylko ASCII
+        else:
+            body = f"ACK|{cmd.replace(' ', '=')}"
+        return f"{body}{tag}#\r\n".encode()
+
+    def stop_telemetry(self):
+        with self._cond:
+            self._pump()
+            self.telemetry_hz = 0.0
+
+    # ----------------------------- API pyserial -----------------------------
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            self._pump()
+            return len(self._rx)
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        with self._cond:
+            while True:
+                self._pump()
+                if self._rx or not self.is_open:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wake = self._pending[0][0] - time.monotonic() if self._pending else remaining
+                if self.telemetry_hz > 0:
+                    wake = min(wake, self._next_telemetry - time.monotonic())
+                self._cond.wait(max(0.0, min(remaining, wake)))
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def readline(self):
+        line = bytearray()
+        while not line.endswith(b"\n"):
+            chunk = self.read(1)
+            if not chunk:
+                break
+            line.extend(chunk)
+        return bytes(line)
+
+    def write(self, data):
+        with self._cond:
+            self._tx += data.decode()
+            while "#" in self._tx:
+                frame, self._tx = self._tx.split("#", 1)
+                self.frames_received += 1
+                if self._rng.random() < self.loss:
+                    continue
+                self._schedule(time.monotonic() + self.latency, self._reply(frame))
+            self._cond.notify_all()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._pump()
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
@@ -0,0 +1,19 @@
+"""Wspólne fixture testów"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BaudNegotiation
+
+
+@pytest.fixture
+def baud_file(tmp_path, monkeypatch):
+    """Pamięć prędkości w katalogu testu zamiast ~/.iss_baud.json"""
+    path = tmp_path / "baud.json"
+    monkeypatch.setattr(BaudNegotiation.memory, 'path', str(path))
+    monkeypatch.setattr(BaudNegotiation.memory, '_rates', None)
+    return path
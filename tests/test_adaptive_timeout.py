@@ -0,0 +1,109 @@
+"""
+Zegar retransmisji (RFC 6298) i ręczny timeout instancji robota.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AdaptiveTimeout
+from AdaptiveTimeout import ALPHA, BETA, GRANULARITY, K, MAX_RTO, MIN_RTO, RetransmitTimer
+from ArduinoRobotPython import RobotInterface, SendWindow
+
+
+def test_first_sample_initialises_srtt_and_rttvar():
+    timer = RetransmitTimer()
+    assert timer.timeout() == AdaptiveTimeout.INITIAL_RTO
+    timer.sample(0.2)
+    assert timer.srtt == 0.2 and timer.rttvar == 0.1
+    assert timer.timeout() == pytest.approx(0.2 + K * 0.1)
+
+
+def test_following_samples_use_rfc6298_weights():
+    timer = RetransmitTimer()
+    timer.sample(0.2)
+    timer.sample(0.4)
+    rttvar = (1 - BETA) * 0.1 + BETA * abs(0.2 - 0.4)
+    srtt = (1 - ALPHA) * 0.2 + ALPHA * 0.4
+    assert timer.rttvar == pytest.approx(rttvar)
+    assert timer.srtt == pytest.approx(srtt)
+    assert timer.timeout() == pytest.approx(srtt + K * rttvar)
+
+
+def test_rto_is_clamped():
+    timer = RetransmitTimer()
+    for _ in range(50):
+        timer.sample(0.001)
+    assert timer.timeout() == MIN_RTO
+    timer = RetransmitTimer()
+    timer.sample(30.0)
+    assert timer.timeout() == MAX_RTO
+    # Stałe RTT: RTTVAR -> 0, zapas nie mniejszy niż GRANULARITY
+    timer = RetransmitTimer()
+    for _ in range(200):
+        timer.sample(0.5)
+    assert timer.timeout() == pytest.approx(0.5 + GRANULARITY, abs=1e-3)
+
+
+def test_backoff_doubles_until_next_sample():
+    timer = RetransmitTimer()
+    timer.sample(0.2)
+    rto = timer.timeout()
+    timer.backoff()
+    timer.backoff()
+    assert timer.timeout() == pytest.approx(4 * rto) and timer.backoffs == 2
+    for _ in range(10):
+        timer.backoff()
+    assert timer.timeout() == MAX_RTO
+    timer.sample(0.2)
+    assert timer.backoffs == 0 and timer.timeout() < MAX_RTO
+
+
+def karn_window(retransmit):
+    """Okno jednej komendy z robotem bez portu i świeżym zegarem"""
+    robot = RobotInterface(telemetry_buffer=False)
+    robot.rto = RetransmitTimer()
+    window = SendWindow(robot, ["VMAX 40"], [0], [None], 1, retransmit=retransmit)
+    list(window.frames())
+    (seq,) = window.inflight
+    return robot, window, seq
+
+
+def test_karn_rule_skips_ambiguous_retransmission_samples():
+    # Ponowienie bez numeru seq w odpowiedzi: nie wiadomo, której próby dotyczy
+    robot, window, _ = karn_window(retransmit=True)
+    window.handle((None, "ACK|VMAX=40.00"))
+    assert window.results == ["ACK|VMAX=40.00"]
+    assert robot.rto.samples == 0
+
+
+def test_karn_rule_samples_tagged_retransmission_and_first_send():
+    robot, window, seq = karn_window(retransmit=True)
+    window.handle((seq, "ACK|VMAX=40.00"))
+    assert robot.rto.samples == 1
+    robot, window, _ = karn_window(retransmit=False)
+    window.handle((None, "ACK|VMAX=40.00"))
+    assert robot.rto.samples == 1
+
+
+def test_manual_timeout_stays_on_instance(baud_file):
+    first = RobotInterface(telemetry_buffer=False)
+    first.timeout = 2.5
+    second = RobotInterface(telemetry_buffer=False)
+    assert first.connect("sim://wall") and second.connect("sim://wall")
+    try:
+        # Wspólny zegar portu, ale ręczna wartość tylko w pierwszej instancji
+        assert first.rto is second.rto is AdaptiveTimeout.timer_for("sim://wall")
+        assert first.timeout == 2.5
+        assert second.timeout == second.rto.timeout() < 2.5
+        assert first.stats()['settings']['timeout'] == 2.5
+        first.timeout = None
+        assert first.timeout == first.rto.timeout()
+    finally:
+        first.disconnect()
+        second.disconnect()
@@ -0,0 +1,80 @@
+"""
+Ramki binarne: COBS i CRC-8 w obie strony, telemetria spakowana do int16
+oraz odrzucanie uszkodzonych pakietów.
+
+    python -m pytest tests
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BinaryProtocol
+from BinaryProtocol import (DELIMITER, FRAME_BEAM, FRAME_LINE, FRAME_TEXT, cobs_decode, cobs_encode,
+                            crc8, decode_frame, decode_telemetry, encode_frame, encode_text)
+
+PAYLOADS = [b"", b"\x00", b"\x00\x00", b"abc", b"a\x00b\x00", bytes(range(256)),
+            b"\x01" * 254, b"\x01" * 255, b"\x01" * 600, b"\x00" * 300]
+
+
+def test_crc8_check_value():
+    # CRC-8/SMBUS (wielomian 0x07, start 0x00): wartość kontrolna "123456789"
+    assert crc8(b"123456789") == 0xF4
+    assert crc8(b"") == 0
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_cobs_round_trip_without_zero_bytes(payload):
+    encoded = cobs_encode(payload)
+    assert b"\x00" not in encoded
+    assert cobs_decode(encoded) == payload
+
+
+def test_cobs_round_trip_random():
+    rng = random.Random(0)
+    for _ in range(500):
+        payload = bytes(rng.choice((0, rng.randrange(256))) for _ in range(rng.randrange(700)))
+        assert cobs_decode(cobs_encode(payload)) == payload
+
+
+def test_frame_round_trip():
+    packet = encode_text("Kp 20|123|@7")
+    assert packet.endswith(DELIMITER) and packet.count(DELIMITER) == 1
+    assert decode_frame(packet[:-1]) == (FRAME_TEXT, b"Kp 20|123|@7")
+
+
+def test_telemetry_round_trip():
+    beam = BinaryProtocol.BEAM_STRUCT.pack(2012, -350, 1275)
+    assert decode_telemetry(*decode_frame(encode_frame(FRAME_BEAM, beam)[:-1])) == \
+        ('beam', (20.12, -3.5, 12.75))
+    line = BinaryProtocol.LINE_STRUCT.pack(3500, -1234, 250, 120, -80, 1000, -1000)
+    kind, values = decode_telemetry(*decode_frame(encode_frame(FRAME_LINE, line)[:-1]))
+    assert kind == 'line' and values == (3500, -0.1234, 2.5, 120, -80, 1000, -1000)
+    assert BinaryProtocol.format_telemetry(kind, values).startswith("POS:3500 ERR:-0.123")
+    with pytest.raises(ValueError):
+        decode_telemetry(0x7F, b"")
+
+
+def test_single_bit_errors_are_rejected():
+    raw = bytes((FRAME_TEXT,)) + b"VMAX 40|77|@3"
+    raw += bytes((crc8(raw),))
+    for bit in range(len(raw) * 8):
+        damaged = bytearray(raw)
+        damaged[bit // 8] ^= 1 << (bit % 8)
+        with pytest.raises(ValueError):
+            decode_frame(cobs_encode(bytes(damaged)))
+
+
+@pytest.mark.parametrize("packet", [
+    b"",                    # pusty pakiet - brak typu i CRC
+    b"\x05ab",              # kod COBS wskazuje poza pakiet (obcięta ramka)
+    b"\x02a\x00b",          # zero w środku pakietu
+    b"\x02\x01",            # sam typ, bez CRC
+])
+def test_malformed_packets_are_rejected(packet):
+    with pytest.raises(ValueError):
+        decode_frame(packet)
@@ -0,0 +1,95 @@
+"""
+Tablica regulatora rozmytego: kompilacja do int8, podział na ramki FZ_*,
+CRC-8 i ta sama interpolacja po stronie robota (sim://wall).
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+import BinaryProtocol
+from ArduinoRobotPython import RobotInterface
+from FuzzyController import LUT_MAX_CELLS, LUT_SCALE, FuzzyController, LookupTable, push_lut
+
+
+@pytest.fixture(scope="module")
+def controller():
+    return FuzzyController()
+
+
+@pytest.fixture(scope="module")
+def lut(controller):
+    return controller.compile_lut(12, 16)
+
+
+def test_compiled_table_matches_inference_at_nodes(controller, lut):
+    assert lut.shape == (12, 16) and lut.table.dtype == np.int8
+    e = np.linspace(*lut.e_range, 12)[:, None]
+    de = np.linspace(*lut.de_range, 16)[None, :]
+    exact = controller.evaluate(e, de)
+    assert np.abs(lut.table / LUT_SCALE - exact).max() <= 0.5 / LUT_SCALE + 1e-9
+    # W węzłach interpolacja zwraca dokładnie komórkę tablicy
+    assert np.allclose(lut.lookup(e, de), lut.table / LUT_SCALE)
+
+
+def test_lookup_error_is_small(controller, lut):
+    assert lut.error(controller, samples=5000)['max'] < 0.2
+
+
+def test_size_limits(controller):
+    with pytest.raises(ValueError):
+        controller.compile_lut(1, 10)
+    with pytest.raises(ValueError):
+        controller.compile_lut(LUT_MAX_CELLS, 2)
+
+
+def test_commands_reassemble_table_and_crc(lut):
+    cmds = lut.commands(chunk=16)
+    assert cmds[0].startswith("FZ_DIM(12,16,")
+    data = bytearray()
+    for cmd in cmds[1:-1]:
+        _, offset, chunk = cmd.split(' ')
+        assert int(offset) == len(data)
+        data += bytes.fromhex(chunk)
+    assert bytes(data) == lut.data() == lut.table.tobytes()
+    assert cmds[-1] == f"FZ_CRC {BinaryProtocol.crc8(lut.data())}"
+
+
+def test_push_to_simulator_uses_same_interpolation(lut, baud_file):
+    robot = RobotInterface(telemetry_buffer=False)
+    assert robot.connect("sim://wall")
+    try:
+        assert push_lut(robot, lut, enable=True)
+        sim = robot.ser.sim
+        rng = np.random.default_rng(1)
+        for e, de in zip(rng.uniform(-50, 50, 200), rng.uniform(-70, 70, 200)):
+            assert sim.fuzzy_lookup(e, de) == pytest.approx(float(lut.lookup(e, de)), abs=1e-9)
+    finally:
+        robot.disconnect()
+
+
+def test_corrupted_table_is_refused_by_crc(lut, baud_file):
+    robot = RobotInterface(telemetry_buffer=False)
+    assert robot.connect("sim://wall")
+    try:
+        cmds = lut.commands()
+        offset = cmds[1].split(' ')[1]
+        cmds[1] = f"FZ_LUT {offset} " + "00" * 16
+        nacks = {}
+        responses = robot.send_batch(cmds, nacks=nacks)
+        assert responses[-1] is None and nacks[len(cmds) - 1] == "NACK|FZ_CRC"
+        assert not robot.send_command("FZ_ON")
+    finally:
+        robot.disconnect()
+
+
+def test_table_bytes_are_signed_int8():
+    table = LookupTable(np.array([[-127, 0], [5, 127]]), (-1, 1), (-1, 1))
+    assert table.data() == bytes([0x81, 0x00, 0x05, 0x7F])
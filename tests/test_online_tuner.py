@@ -0,0 +1,67 @@
+"""
+OnlineTuner na atrapie egzaminu: budżet liczy każdy punkt metody (także
+powtórzone nastawy z pamięci), a zbiegły sympleks kończy strojenie.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OnlineTuner import OnlineTuner, nelder_mead
+
+
+class StubTuner(OnlineTuner):
+    """Tuner bez robota: nastawy zawsze przyjęte, MAE z funkcji celu"""
+
+    def __init__(self, objective, budget):
+        super().__init__(None, 'wall', budget)
+        self.objective = objective
+        self.gains = None
+
+    def push_gains(self, gains):
+        self.gains = gains
+        return True
+
+    def run_exam(self, best=None):
+        return self.objective(self.gains), False
+
+
+def test_flat_objective_stops_within_budget():
+    # Płaska funkcja: sympleks tylko się kurczy, nastawy po zaokrągleniu
+    # powtarzają się z pamięci - dawniej pętla bez końca
+    tuner = StubTuner(lambda gains: 1.0, budget=500)
+    gains, score = tuner.tune()
+    assert score == 1.0
+    assert tuner.evaluations <= tuner.budget
+    assert len(tuner.history) < tuner.evaluations
+
+
+def test_cached_points_count_against_budget():
+    tuner = StubTuner(lambda gains: 1.0, budget=6)
+    tuner.tune()
+    assert tuner.evaluations == 6
+
+
+def test_quadratic_objective_converges():
+    target = (4.0, 1.0, 0.3)
+    objective = lambda gains: sum((g - t) ** 2 for g, t in zip(gains, target))
+    tuner = StubTuner(objective, budget=200)
+    gains, score = tuner.tune()
+    assert score < 0.05
+    assert tuner.evaluations <= 200
+
+
+def test_nelder_mead_ends_when_simplex_collapses():
+    search = nelder_mead([0.5, 0.5], step=0.1, tol=1e-2)
+    point = next(search)
+    points = 0
+    try:
+        while points < 1000:
+            point = search.send(0.0)
+            points += 1
+    except StopIteration:
+        pass
+    assert points < 1000
@@ -0,0 +1,67 @@
+"""
+ParameterCache: wysyłka tylko zmian, unieważnianie po NACK / braku
+odpowiedzi i komendy odtwarzające stan po ponownym połączeniu.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ParameterCache import ParameterCache, command_params
+
+
+def test_command_params_forms():
+    assert command_params("KP_L 2.5") == {'KP_L': 2.5}
+    assert command_params("Vref 120") == {'Vref': 120}
+    assert command_params("SET_TARGET(20)") == {'DIST_POINT': 20.0}
+    assert command_params("CFG(KP=1.5,T=50)") == {'KP': 1.5, 'T': 50}
+    assert command_params("START") == {}
+
+
+def test_only_changed_commands_are_sent():
+    cache = ParameterCache()
+    cache.record_results(["KP_L 2", "KI_L 0.5"], ["ACK|KP_L=2.00", "ACK|KI_L=0.50"])
+    assert cache.changed(["KP_L 2", "KI_L 0.5", "KD_L 1"]) == [2]
+    assert cache.changed(["KP_L 3"]) == [0]
+    assert cache.skipped == 2
+
+
+def test_status_values_match_within_resolution():
+    cache = ParameterCache()
+    cache.record("STATUS", "ACK|KP:2.00,KI:0.33,DIST_POINT:20.00,SERVO_ZERO:90")
+    assert cache.complete
+    assert cache.matches("CFG(KP=2.001)")
+    assert cache.matches("SET_TARGET(20)")
+    assert not cache.matches("SET_SERVO_ZERO(91)")
+
+
+def test_nack_and_timeout_invalidate_parameter():
+    cache = ParameterCache()
+    cache.record_results(["KP_L 2", "VMAX 40"], ["ACK|KP_L=2.00", "ACK|VMAX=40.00"])
+    cache.record("KP_L 3", "NACK|OUT_OF_RANGE")
+    cache.record("VMAX 50", None)
+    assert cache.get('KP_L') is None and cache.get('VMAX') is None
+    assert cache.changed(["KP_L 2", "VMAX 40"]) == [0, 1]
+
+
+def test_firmware_clamped_echo_is_cached():
+    cache = ParameterCache()
+    cache.record("Vref 400", "ACK|Vref=255|12")
+    assert cache.get('Vref') == 255
+    assert cache.matches("Vref 255")
+
+
+def test_restore_commands_keep_last_acked_settings_in_order():
+    cache = ParameterCache()
+    cache.record_results(
+        ["KP_L 2", "SET_TARGET(20)", "TELEMETRY_ON", "KP_L 3", "KI_L 9", "CFG(KP=1)", "CFG(KD=4)"],
+        ["ACK|KP_L=2.00", "ACK|TARGET_SET", "ACK|TELEMETRY_ON", "ACK|KP_L=3.00",
+         "NACK|OUT_OF_RANGE", "ACK", "ACK"])
+    assert cache.restore_commands() == ["CFG(KP=1,KD=4)", "SET_TARGET(20)", "TELEMETRY_ON", "KP_L 3"]
+    # Ponowne połączenie unieważnia wartości, ale nie listę do odtworzenia
+    cache.invalidate()
+    assert cache.snapshot() == {}
+    assert cache.restore_commands()[-1] == "KP_L 3"
@@ -0,0 +1,117 @@
+"""
+SendWindow: dopasowanie odpowiedzi po numerze sekwencyjnym, ramki zgubione
+i spóźnione, oraz ponowienia send_batch na atrapie portu z utratą ramek.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from AdaptiveTimeout import RetransmitTimer
+from ArduinoRobotPython import RobotInterface, SendWindow
+from fake_serial import FakeSerial
+
+COMMANDS = ["KP_L 5", "KI_L 1", "KD_L 0.5", "VMAX 40"]
+
+
+def open_window(cmds, window=8, nacks=None):
+    """Okno bez portu: ramki 'wysłane', numery seq w kolejności komend"""
+    robot = RobotInterface(telemetry_buffer=False)
+    robot.rto = RetransmitTimer()
+    results = [None] * len(cmds)
+    win = SendWindow(robot, cmds, list(range(len(cmds))), results, window, nacks=nacks)
+    frames = [data.decode() for data in win.frames()]
+    return robot, win, frames, list(win.inflight)
+
+
+def test_frames_carry_checksum_and_seq():
+    robot, win, frames, seqs = open_window(COMMANDS)
+    assert frames == [robot.build_frame(cmd, seq) for cmd, seq in zip(COMMANDS, seqs)]
+    assert len(set(seqs)) == len(COMMANDS)
+
+
+def test_window_limits_frames_in_flight():
+    robot, win, frames, seqs = open_window(COMMANDS, window=2)
+    assert len(frames) == 2
+    win.handle((seqs[0], "ACK|KP_L=5.00"))
+    assert len([data for data in win.frames()]) == 1
+    assert not win.done
+
+
+def test_replies_out_of_order_match_by_seq():
+    robot, win, frames, seqs = open_window(COMMANDS)
+    replies = ["ACK|KP_L=5.00", "ACK|KI_L=1.00", "ACK|KD_L=0.50", "ACK|VMAX=40.00"]
+    for k in (3, 1, 0, 2):
+        win.handle((seqs[k], replies[k]))
+    assert win.done
+    assert win.results == replies
+    assert win.remaining() == []
+    assert robot.rto.samples == 4
+
+
+def test_reply_for_unknown_seq_is_ignored():
+    robot, win, frames, seqs = open_window(COMMANDS[:1])
+    win.handle((max(seqs) + 5, "ACK|VMAX=40.00"))
+    assert win.results == [None] and not win.done
+
+
+def test_lost_frame_is_retransmitted_and_late_ack_accepted():
+    robot, win, frames, seqs = open_window(COMMANDS[:2])
+    rto = robot.rto.timeout()
+    win.handle(None)                        # najstarsza ramka - timeout
+    assert win.remaining() == [0]
+    assert robot.rto.timeout() == 2 * rto   # jedno podwojenie na rundę
+    win.handle(None)
+    assert win.remaining() == [0, 1]
+    assert robot.rto.timeout() == 2 * rto
+    # ACK pierwszej przychodzi po czasie: nie trzeba jej ponawiać
+    win.handle((seqs[0], "ACK|KP_L=5.00"))
+    assert win.remaining() == [1]
+    assert win.results[0] == "ACK|KP_L=5.00"
+
+
+def test_nack_is_final_and_bad_checksum_is_retried():
+    nacks = {}
+    robot, win, frames, seqs = open_window(COMMANDS[:2], nacks=nacks)
+    win.handle((seqs[0], "NACK|OUT_OF_RANGE"))
+    win.handle((seqs[1], "NACK|BAD_CHECKSUM"))
+    assert win.done
+    assert win.results == [None, None]
+    assert nacks == {0: "NACK|OUT_OF_RANGE"}
+    assert win.remaining() == [1]
+
+
+def test_reply_without_seq_matches_command_echo():
+    # Firmware bez numerów seq (Line Follower): ramka po echu komendy
+    robot, win, frames, seqs = open_window(["Kp 5", "Vref 100"])
+    win.handle((None, "ACK|Vref=100"))
+    assert win.results == [None, "ACK|Vref=100"]
+    win.handle((None, "ACK|Kp=5.00"))
+    assert win.done
+
+
+def fake_robot(**options):
+    robot = RobotInterface(telemetry_buffer=False)
+    robot.rto = RetransmitTimer()
+    robot.ser = FakeSerial(**options)
+    robot.start_reader()
+    return robot
+
+
+def test_send_batch_retries_lost_frames():
+    robot = fake_robot(loss=0.3, latency=0.001, seed=3)
+    robot.timeout = 0.05
+    try:
+        cmds = [f"VMAX {v}" for v in range(20)]
+        results = robot.send_batch(cmds, retries=10)
+    finally:
+        robot.disconnect()
+    assert results == [f"ACK|VMAX={v}" for v in range(20)]
+    stats = robot.stats()
+    assert robot.ser.frames_received > len(cmds)
+    assert sum(c['retries'] for c in stats['commands'].values()) == robot.ser.frames_received - len(cmds)
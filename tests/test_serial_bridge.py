@@ -0,0 +1,74 @@
+"""
+SerialBridge: odpowiedź wraca tylko do klienta, który wysłał komendę,
+z jego numerem sekwencyjnym; komendy łącza mostek odrzuca sam.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ArduinoRobotPython import RobotInterface
+from SerialBridge import SerialBridge
+
+
+class RecordingClient:
+    """Klient mostka bez gniazda - zbiera odpowiedzi"""
+
+    def __init__(self):
+        self.commands = 0
+        self.replies = []
+
+    def reply(self, frame, seq):
+        self.replies.append((frame, seq))
+
+
+@pytest.fixture
+def bridge(baud_file):
+    bridge = SerialBridge()
+    assert bridge.robot.connect("sim://wall", negotiate=False)
+    yield bridge
+    bridge.close()
+
+
+def test_execute_replies_with_client_seq(bridge):
+    robot = bridge.robot
+    client = RecordingClient()
+    frames = [robot.build_frame("VMAX 40", 11).strip('#'),
+              robot.build_frame("BIN_ON", 12).strip('#'),
+              robot.build_frame("ECHO abc", 13).strip('#'),
+              "KP_L 5|0|@14",
+              robot.build_frame("KP_L 5").strip('#')]
+    bridge.execute(client, frames)
+    assert client.replies == [("ACK|VMAX=40.00", '11'), ("NACK|BRIDGE_LINK", '12'),
+                              ("ACK|ECHO=abc", '13'), ("NACK|BAD_CHECKSUM", '14'),
+                              ("ACK|KP_L=5.00", None)]
+    assert client.commands == 2
+
+
+def test_concurrent_clients_get_only_their_replies(bridge):
+    server = bridge.listen(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "socket://127.0.0.1:%d" % server.server_address[1]
+    results = {}
+
+    def run(name, side):
+        client = RobotInterface(telemetry_buffer=False)
+        assert client.connect(url, binary=False, negotiate=False)
+        cmds = [f"KP_{side} {v}" for v in range(1, 21)]
+        results[name] = (cmds, client.send_batch(cmds, window=4))
+        client.disconnect()
+
+    threads = [threading.Thread(target=run, args=(name, side)) for name, side in (("a", "L"), ("b", "R"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    for name, side in (("a", "L"), ("b", "R")):
+        cmds, replies = results[name]
+        assert replies == [f"ACK|KP_{side}={v}.00" for v in range(1, 21)]
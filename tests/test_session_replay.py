@@ -0,0 +1,60 @@
+"""
+Nagranie sesji z domyślnym connect() (negocjacja prędkości, BIN_ON) i jej
+odtworzenie przez replay:// - ta sama wymiana, zero rozjazdów TX.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BaudNegotiation
+from ArduinoRobotPython import RobotInterface
+
+COMMANDS = ["KP_L 5", "KI_L 1", "VMAX 40"]
+
+
+def record_and_replay(tmp_path, speed="0"):
+    rec = str(tmp_path / "sesja.issrec")
+    robot = RobotInterface(telemetry_buffer=False)
+    assert robot.connect("sim://wall", record=rec)
+    recorded = robot.send_batch(COMMANDS) + [robot.send_command("READ_DISTANCE")]
+    recorded_baud = robot.link_baud
+    robot.disconnect()
+
+    replay = RobotInterface(telemetry_buffer=False)
+    assert replay.connect(f"replay://{rec}?speed={speed}") and replay.connected
+    replayed = replay.send_batch(COMMANDS) + [replay.send_command("READ_DISTANCE")]
+    mismatches = replay.ser.tx_mismatches
+    replay_baud = replay.link_baud
+    replay.disconnect()
+    return recorded, replayed, mismatches, recorded_baud, replay_baud
+
+
+@pytest.mark.parametrize("speed", ["0", "1"])
+def test_default_connect_replays_in_sync(tmp_path, baud_file, speed):
+    recorded, replayed, mismatches, recorded_baud, replay_baud = record_and_replay(tmp_path, speed)
+    assert recorded[:3] == ['ACK|KP_L=5.00', 'ACK|KI_L=1.00', 'ACK|VMAX=40.00']
+    assert replayed == recorded
+    assert mismatches == 0
+    assert replay_baud == recorded_baud > BaudNegotiation.BASE_BAUD
+    # sim:// to nie urządzenie - nic w pamięci prędkości
+    assert not baud_file.exists()
+
+
+def test_replay_uses_remembered_baud_from_recording(tmp_path, baud_file, monkeypatch):
+    # Urządzenie z zapamiętaną prędkością: nagranie zawiera jedno przełączenie,
+    # odtworzenie musi je powtórzyć bez zaglądania do pamięci użytkownika
+    monkeypatch.setattr(BaudNegotiation, 'device_key',
+                        lambda port: None if port.startswith("replay://") else "usb:robot")
+    BaudNegotiation.memory.set("usb:robot", 115200)
+    recorded, replayed, mismatches, recorded_baud, replay_baud = record_and_replay(tmp_path)
+    assert recorded_baud == 115200
+    BaudNegotiation.memory.forget("usb:robot")
+    assert replayed == recorded
+    assert mismatches == 0
+    assert replay_baud == 115200